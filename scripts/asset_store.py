@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Content-addressed image store for Lone Wolf books
+Collects every image the book pages reference (illustrations, equipment
+icons, Action Chart and Combat Results Table images), hashes them on a
+thread pool straight from memory-mapped files and stores each distinct
+image once as <sha256>.<ext>. Images repeated across books (axe.png,
+crtpos.png, ...) therefore share one blob and one content id.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+STORE_VERSION = 1
+
+DEFAULT_STORE_DIR = 'extracted-content/assets'
+
+MANIFEST_NAME = 'manifest.json'
+
+_IMAGE_TAG = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+
+# src="..." of a local image (site scripts and CDN assets are absolute URLs)
+_IMAGE_SRC = re.compile(r'\bsrc="([^":]+\.(?:png|gif|jpe?g))"', re.IGNORECASE)
+
+
+def image_size(data) -> Optional[Tuple[int, int]]:
+    """(width, height) from a PNG, GIF or JPEG header, or None"""
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if data[:2] == b'\xff\xd8':
+        # Walk the segments to the first start-of-frame marker
+        pos = 2
+        while pos + 9 <= len(data):
+            if data[pos] != 0xFF:
+                return None
+            marker = data[pos + 1]
+            length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+                return width, height
+            pos += 2 + length
+    return None
+
+
+def hash_image(path: Path) -> Dict:
+    """sha256, byte size and dimensions of an image, read through mmap"""
+    size = path.stat().st_size
+    if size == 0:
+        return {'sha256': hashlib.sha256().hexdigest(), 'bytes': 0, 'width': None, 'height': None}
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # hashlib releases the GIL on large buffers, so threads hash in parallel
+        digest = hashlib.sha256(data).hexdigest()
+        dimensions = image_size(data)
+    width, height = dimensions or (None, None)
+    return {'sha256': digest, 'bytes': size, 'width': width, 'height': height}
+
+
+def hash_images(paths: Iterable[Path], jobs: int = 0) -> Dict[Path, Dict]:
+    """hash_image for each path on a thread pool (0 = one thread per CPU)"""
+    paths = list(dict.fromkeys(paths))
+    workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(paths, pool.map(hash_image, paths)))
+
+
+def referenced_images(book_path: Path) -> Tuple[List[str], Dict[str, str]]:
+    """Local images referenced by a book's pages, and illustration page -> its image
+
+    Images referenced but missing from the directory are left out.
+    """
+    images: Dict[str, None] = {}
+    pages: Dict[str, str] = {}
+    for page in sorted(book_path.glob('*.htm')):
+        html = page.read_text(encoding='utf-8')
+        for tag in _IMAGE_TAG.findall(html):
+            src = _IMAGE_SRC.search(tag)
+            if not src or not (book_path / src.group(1)).is_file():
+                continue
+            images[src.group(1)] = None
+            # Illustration pages (illN.htm) show their picture as alt="illustration"
+            if page.name.startswith('ill') and 'alt="illustration"' in tag and page.name not in pages:
+                pages[page.name] = src.group(1)
+    return list(images), pages
+
+
+def rewrite_illustrations(illustrations: List[str], refs: Dict[str, str]) -> List[str]:
+    """Replace illustration refs with content ids, once each, in order
+
+    An illustration page and the image it shows (ill8.htm, ill8.png) become
+    one id; refs with no stored image are kept as they are.
+    """
+    return list(dict.fromkeys(refs.get(ref, ref) for ref in illustrations))
+
+
+class AssetStore:
+    """Directory of <sha256>.<ext> blobs plus a manifest of their sizes and sources
+
+    Manifest: assets maps content id -> file, type, bytes, width, height
+    and sources (book code/filename); books maps book number -> the
+    source directory, its images (filename -> id) and its illustration
+    pages (page -> image filename).
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        self.root = Path(root)
+        self.assets: Dict[str, Dict] = {}
+        self.books: Dict[str, Dict] = {}
+        self.stored = 0
+        manifest_file = self.root / MANIFEST_NAME
+        if manifest_file.exists():
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == STORE_VERSION:
+                self.assets = data.get('assets', {})
+                self.books = data.get('books', {})
+
+    def add_books(self, books: Dict[int, Path], jobs: int = 0) -> Dict[int, Dict[str, str]]:
+        """Store the images of several books (book number -> directory) in one pass
+
+        Returns each book's illustration refs (see refs_for).
+        """
+        found = {number: referenced_images(Path(path)) for number, path in books.items()}
+        hashes = hash_images((Path(books[number]) / name
+                              for number, (images, _) in found.items() for name in images), jobs)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        for number, (images, pages) in found.items():
+            book_path = Path(books[number])
+            ids = {}
+            for name in images:
+                info = hashes[book_path / name]
+                ids[name] = self._store(book_path / name, info, f"{book_path.name}/{name}")
+            self.books[str(number)] = {'source': str(book_path), 'images': ids, 'pages': pages}
+        return {number: self.refs_for(number) for number in books}
+
+    def _store(self, path: Path, info: Dict, source: str) -> str:
+        """Copy a blob into the store unless its content is already there"""
+        content_id = info['sha256']
+        suffix = path.suffix.lower()
+        entry = self.assets.get(content_id)
+        if entry is None:
+            entry = self.assets[content_id] = {
+                'file': content_id + suffix,
+                'type': suffix.lstrip('.'),
+                'bytes': info['bytes'],
+                'width': info['width'],
+                'height': info['height'],
+                'sources': []
+            }
+        blob = self.root / entry['file']
+        if not blob.exists():
+            shutil.copyfile(path, blob)
+            self.stored += 1
+        if source not in entry['sources']:
+            entry['sources'].append(source)
+        return content_id
+
+    def refs_for(self, book_number: int) -> Dict[str, str]:
+        """Illustration ref (image or illustration page name) -> content id"""
+        book = self.books.get(str(book_number), {})
+        refs = dict(book.get('images', {}))
+        for page, image in book.get('pages', {}).items():
+            if image in refs:
+                refs[page] = refs[image]
+        return refs
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump({'version': STORE_VERSION, 'assets': self.assets, 'books': self.books},
+                      f, indent=2, ensure_ascii=False)
+
+    def stats(self) -> Dict:
+        references = sum(len(book['images']) for book in self.books.values())
+        return {
+            'references': references,
+            'unique': len(self.assets),
+            'bytes': sum(asset['bytes'] for asset in self.assets.values()),
+            'source_bytes': sum(asset['bytes'] * len(asset['sources']) for asset in self.assets.values())
+        }
+
+
+def main():
+    """Store the images of every book and optionally rewrite extracted books' refs"""
+    import argparse
+    import time
+    from scraper import find_books, BOOK_CODES
+
+    parser = argparse.ArgumentParser(description='Content-addressed Lone Wolf image store')
+    parser.add_argument('source_dir', nargs='?', default='source-materials',
+                        help='Directory of book directories (default: source-materials)')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR,
+                        help=f'Asset store directory (default: {DEFAULT_STORE_DIR})')
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help='Hashing threads (default: 0 = one per CPU)')
+    parser.add_argument('--rewrite', metavar='CONTENT_DIR',
+                        help='Rewrite illustration refs in CONTENT_DIR/book-N.json to content ids')
+
+    args = parser.parse_args()
+    books = {BOOK_CODES[path.name]: path for path in find_books(Path(args.source_dir)) if path.is_dir()}
+    if not books:
+        parser.error(f"no book directories ({', '.join(BOOK_CODES)}) in {args.source_dir}")
+
+    start = time.perf_counter()
+    store = AssetStore(args.store)
+    refs = store.add_books(books, args.jobs)
+    store.save()
+    elapsed = time.perf_counter() - start
+
+    stats = store.stats()
+    print(f"🖼️  {stats['references']} image references -> {stats['unique']} unique assets "
+          f"({stats['bytes'] / 1024:.0f} KB stored of {stats['source_bytes'] / 1024:.0f} KB, "
+          f"{store.stored} new) in {elapsed:.2f}s")
+    print(f"✅ Saved to: {store.root / MANIFEST_NAME}")
+
+    if args.rewrite:
+        for number, book_refs in refs.items():
+            book_file = Path(args.rewrite) / f"book-{number}.json"
+            if not book_file.exists():
+                continue
+            with open(book_file, 'r', encoding='utf-8') as f:
+                book = json.load(f)
+            for section in book.get('sections', {}).values():
+                section['illustrations'] = rewrite_illustrations(section.get('illustrations', []), book_refs)
+            with open(book_file, 'w', encoding='utf-8') as f:
+                json.dump(book, f, indent=2, ensure_ascii=False)
+            print(f"✅ Rewrote illustration refs in {book_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the extractor and validator
+Runs the full pipeline (rules, sections, JSON write, graph, search index,
+validation) on the real books in source-materials/ and on synthetic
+Project Aon-style books of 1k, 10k and 100k sections. Each workload runs in
+a fresh process so its peak memory is its own. Per-phase wall time and
+peak traced memory, whole-run peak RSS and sections/sec go to a JSON
+results file, which can be compared against a stored baseline to flag
+regressions.
+"""
+
+import io
+import json
+import platform
+import random
+import re
+import shutil
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Bump whenever the synthetic book layout changes so cached books are regenerated
+SYNTHETIC_VERSION = '1'
+
+DEFAULT_SCALES = (1000, 10000, 100000)
+DEFAULT_WORK_DIR = '.bench-cache'
+
+# Files besides sections that the extractor reads from a book directory
+RULE_FILES = ('discplnz.htm', 'equipmnt.htm', 'crtable.htm', 'crtneg.png', 'crtpos.png')
+
+DISCIPLINES = ('Sixth Sense', 'Camouflage', 'Hunting', 'Tracking', 'Healing',
+               'Weaponskill', 'Mindshield', 'Mindblast', 'Animal Kinship', 'Mind Over Matter')
+ENEMIES = ('Giak', 'Kraan', 'Vordak', 'Drakkar', 'Doomwolf', 'Gourgaz', 'Helghast', 'Bandit')
+
+
+def real_books(source_dir: Path) -> List[Path]:
+    """Book directories under source_dir (those with a sect1.htm)"""
+    return sorted(p for p in Path(source_dir).iterdir() if (p / 'sect1.htm').exists())
+
+
+def synthesize_book(output_dir: Path, section_count: int, template_dir: Path, seed: int = 0) -> Path:
+    """Write a book of section_count sections in Project Aon markup
+
+    Page chrome and rule files come from template_dir; narrative
+    paragraphs are sampled from its sections. Every section links to the
+    next one so the whole book is reachable, plus random forward choices,
+    Kai Discipline choices and combats at roughly the real books' rates.
+    Reuses output_dir if it already holds the same book.
+    """
+    output_dir = Path(output_dir)
+    marker = output_dir / 'synthetic.json'
+    settings = {'version': SYNTHETIC_VERSION, 'sections': section_count, 'seed': seed,
+                'template': Path(template_dir).name}
+    if marker.exists() and json.loads(marker.read_text()) == settings:
+        return output_dir
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    output_dir.mkdir(parents=True)
+
+    template_dir = Path(template_dir)
+    for name in RULE_FILES:
+        if (template_dir / name).exists():
+            shutil.copy(template_dir / name, output_dir / name)
+
+    page = (template_dir / 'sect1.htm').read_text(encoding='utf-8')
+    head, rest = page.split('<article>', 1)
+    tail = rest.split('</article>', 1)[1]
+    head = re.sub(r'<h1>[^<]*</h1>', f'<h1>Synthetic Book ({section_count} sections)</h1>', head)
+
+    paragraphs = []
+    for section_file in sorted(template_dir.glob('sect*.htm')):
+        paragraphs.extend(re.findall(r'<p>(.*?)</p>', section_file.read_text(encoding='utf-8'), re.S))
+
+    rng = random.Random(seed)
+    for number in range(1, section_count + 1):
+        body = [f'<p>{rng.choice(paragraphs)}</p>' for _ in range(rng.randint(1, 4))]
+        if number < section_count and rng.random() < 0.1:
+            body.append(f'<p class="combat">{rng.choice(ENEMIES)}: <span class="smallcaps">COMBAT&nbsp;SKILL</span>'
+                        f'&nbsp;{rng.randint(8, 28)} &nbsp;&nbsp;<span class="smallcaps">ENDURANCE</span>'
+                        f'&nbsp;{rng.randint(5, 40)}</p>')
+        if number < section_count:
+            targets = [number + 1] + [rng.randint(number + 1, min(section_count, number + 60))
+                                      for _ in range(rng.randint(0, 2))]
+            for i, target in enumerate(targets):
+                if i and rng.random() < 0.25:
+                    text = f'If you have the Kai Discipline of {rng.choice(DISCIPLINES)}, '
+                else:
+                    text = 'If you wish to press on, '
+                body.append(f'<p class="choice">{text}<a href="sect{target}.htm">turn to {target}</a>.</p>')
+
+        article = ('<article>\n    <div class="numbered">\n     <div class="maintext table-responsive">\n'
+                   f'      <h3>{number}</h3>\n      ' + '\n      '.join(body) +
+                   '\n     </div>\n    </div>\n   </article>')
+        (output_dir / f'sect{number}.htm').write_text(head + article + tail, encoding='utf-8')
+
+    marker.write_text(json.dumps(settings))
+    return output_dir
+
+
+def run_workload(book_path: str, work_dir: str, jobs: int = 1, trace_memory: bool = False) -> Dict:
+    """Run every pipeline phase on one book (call in a fresh process)
+
+    Each phase records its wall time and the workload its peak RSS. With
+    trace_memory, each phase also records peak_mb: the most memory it
+    allocated above what was held when it started (tracemalloc, peak reset
+    per phase). Tracing slows allocation-heavy phases several-fold, so the
+    times of a traced run are not comparable. Neither figure includes
+    extractor worker processes (jobs > 1).
+    """
+    import resource
+    import tracemalloc
+    from scraper import LoneWolfExtractor
+    from search_index import IndexBuilder
+    from section_graph import SectionGraph
+    from validate import check_book, validate_file
+
+    phases: Dict[str, Dict] = {}
+
+    def phase(name: str, fn):
+        if trace_memory:
+            tracemalloc.reset_peak()
+            held = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = fn()
+        phases[name] = {'seconds': time.perf_counter() - start}
+        if trace_memory:
+            phases[name]['peak_mb'] = (tracemalloc.get_traced_memory()[1] - held) / (1024 * 1024)
+        return result
+
+    output_path = Path(work_dir) / f"{Path(book_path).name}.json"
+
+    def write():
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(book, f, indent=2, ensure_ascii=False)
+
+    def index():
+        builder = IndexBuilder()
+        for section in book['sections'].values():
+            builder.add_section(section)
+        return builder.build()
+
+    if trace_memory:
+        tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        extractor = LoneWolfExtractor(book_path, jobs=jobs)
+        phase('rules', extractor.extract_rules)
+        phase('sections', extractor.extract_all_sections)
+        book = extractor.to_dict()
+        phase('write', write)
+        phase('graph', lambda: SectionGraph.from_sections(book['sections']))
+        phase('index', index)
+        phase('validate', lambda: check_book(book))
+        phase('validate_stream', lambda: validate_file(output_path, stream=True))
+    output_path.unlink()
+    if trace_memory:
+        tracemalloc.stop()
+
+    section_count = len(book['sections'])
+    total = sum(p['seconds'] for p in phases.values())
+    return {
+        'sections': section_count,
+        'phases': phases,
+        'total_seconds': total,
+        'sections_per_sec': section_count / phases['sections']['seconds'],
+        'pipeline_sections_per_sec': section_count / total,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def run_isolated(book_path: Path, work_dir: Path, jobs: int = 1, repeat: int = 1,
+                 trace_memory: bool = True) -> Dict:
+    """Best-of-repeat run_workload, each run in a new spawned process
+
+    Times and peak RSS come from the untraced runs; with trace_memory, one
+    more run adds each phase's peak_mb.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = multiprocessing.get_context('spawn')
+
+    def spawn(trace: bool) -> Dict:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            return pool.submit(run_workload, str(book_path), str(work_dir), jobs, trace).result()
+
+    best: Optional[Dict] = None
+    for _ in range(repeat):
+        result = spawn(False)
+        if best is None:
+            best = result
+            continue
+        # Keep the fastest time seen for each phase and the smallest peak RSS
+        for name, stats in result['phases'].items():
+            kept = best['phases'][name]
+            kept['seconds'] = min(kept['seconds'], stats['seconds'])
+        best['total_seconds'] = sum(p['seconds'] for p in best['phases'].values())
+        best['sections_per_sec'] = best['sections'] / best['phases']['sections']['seconds']
+        best['pipeline_sections_per_sec'] = best['sections'] / best['total_seconds']
+        best['peak_rss_mb'] = min(best['peak_rss_mb'], result['peak_rss_mb'])
+
+    if trace_memory:
+        for name, stats in spawn(True)['phases'].items():
+            best['phases'][name]['peak_mb'] = stats['peak_mb']
+    return best
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = 0.2,
+            min_seconds: float = 0.01, min_mb: float = 1.0) -> List[str]:
+    """Regressions of results against baseline
+
+    A phase regresses when its time grows by more than threshold (and by at
+    least min_seconds, to ignore timer noise) or its own traced peak memory
+    grows by more than threshold (and by at least min_mb). A workload
+    regresses when its whole-run peak RSS grows by more than threshold.
+    Workloads, phases and figures missing from either side are skipped.
+    """
+    regressions = []
+    for label, current in results['workloads'].items():
+        previous = baseline.get('workloads', {}).get(label)
+        if not previous:
+            continue
+        if ('peak_rss_mb' in previous
+                and current['peak_rss_mb'] > previous['peak_rss_mb'] * (1 + threshold)):
+            regressions.append(f"{label}: peak RSS {previous['peak_rss_mb']:.0f}MB → "
+                               f"{current['peak_rss_mb']:.0f}MB")
+        for name, stats in current['phases'].items():
+            before = previous['phases'].get(name)
+            if not before:
+                continue
+            if (stats['seconds'] > before['seconds'] * (1 + threshold)
+                    and stats['seconds'] - before['seconds'] >= min_seconds):
+                regressions.append(f"{label} {name}: {before['seconds']:.3f}s → {stats['seconds']:.3f}s "
+                                   f"(+{stats['seconds'] / before['seconds'] - 1:.0%})")
+            if ('peak_mb' in stats and 'peak_mb' in before
+                    and stats['peak_mb'] > before['peak_mb'] * (1 + threshold)
+                    and stats['peak_mb'] - before['peak_mb'] >= min_mb):
+                regressions.append(f"{label} {name}: peak {before['peak_mb']:.1f}MB → "
+                                   f"{stats['peak_mb']:.1f}MB")
+    return regressions
+
+
+def print_workload(label: str, result: Dict, previous: Optional[Dict] = None):
+    print(f"\n📖 {label}: {result['sections']} sections, {result['total_seconds']:.2f}s, "
+          f"{result['sections_per_sec']:.0f} sections/s extracted, peak {result['peak_rss_mb']:.0f}MB")
+    for name, stats in result['phases'].items():
+        line = f"  {name:<16} {stats['seconds']:>9.3f}s"
+        if 'peak_mb' in stats:
+            line += f"  {stats['peak_mb']:>8.1f}MB"
+        before = (previous or {}).get('phases', {}).get(name)
+        if before and before['seconds']:
+            line += f"  ({stats['seconds'] / before['seconds'] - 1:+.0%} vs baseline)"
+        print(line)
+
+
+def main():
+    """Benchmark the extractor and validator on real and synthetic books"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the extraction and validation pipeline')
+    parser.add_argument('--source-dir', default='source-materials',
+                        help='Directory with the real book directories (default: source-materials)')
+    parser.add_argument('--scales', type=int, nargs='*', default=list(DEFAULT_SCALES),
+                        help='Synthetic book sizes in sections (default: 1000 10000 100000; none to skip)')
+    parser.add_argument('--no-real', action='store_true', help='Skip the real books')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per workload, best kept (default: 1)')
+    parser.add_argument('--no-trace', action='store_true',
+                        help='Skip the extra tracemalloc run that measures per-phase peak memory')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Extractor worker processes (default: 1)')
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR,
+                        help=f'Where synthetic books are generated and kept (default: {DEFAULT_WORK_DIR})')
+    parser.add_argument('-o', '--output', default='benchmark-results.json',
+                        help='Results file (default: benchmark-results.json)')
+    parser.add_argument('--baseline', default='benchmark-baseline.json',
+                        help='Baseline to compare against, if it exists (default: benchmark-baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='Also write the results as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative slowdown / memory growth flagged as a regression (default: 0.2)')
+
+    args = parser.parse_args()
+    source_dir = Path(args.source_dir)
+    work_dir = Path(args.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    books = [] if args.no_real else real_books(source_dir)
+    workloads = [(book.name, book) for book in books]
+    if args.scales:
+        template = real_books(source_dir)[0]
+        for count in args.scales:
+            print(f"🏗️  Preparing synthetic book with {count} sections...")
+            workloads.append((f"synthetic-{count}",
+                              synthesize_book(work_dir / f"synthetic-{count}-{template.name}", count, template)))
+
+    baseline = None
+    if Path(args.baseline).exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'jobs': args.jobs,
+        'workloads': {}
+    }
+    for label, path in workloads:
+        result = run_isolated(path, work_dir, args.jobs, args.repeat, not args.no_trace)
+        results['workloads'][label] = result
+        print_workload(label, result, (baseline or {}).get('workloads', {}).get(label))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Results saved to: {args.output}")
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline saved to: {args.baseline}")
+        return
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions vs {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions vs {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Indexed binary book bundle (.lwb) for extracted Lone Wolf content
+One file per book with a fixed header, a section number -> offset/length
+index and zlib-compressed JSON records, so a reader can memory-map the
+bundle and decode a single section without parsing the rest of the book.
+
+Layout (little-endian):
+    header    MAGIC, format version, section count, manifest offset/length,
+              index offset (see HEADER)
+    manifest  compressed JSON of the book without "sections"
+    records   one compressed JSON record per section, in extraction order
+    index     section_count x (section number, offset, length), sorted by number
+"""
+
+import json
+import mmap
+import statistics
+import struct
+import time
+import zlib
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+MAGIC = b'LWBK'
+FORMAT_VERSION = 1
+
+# magic, format version, reserved, section count, manifest offset,
+# manifest length, index offset
+HEADER = struct.Struct('<4sHHIQIQ')
+INDEX_ENTRY = struct.Struct('<IQI')
+
+
+def _encode(obj: Dict) -> bytes:
+    return zlib.compress(json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def _decode(data) -> Dict:
+    return json.loads(zlib.decompress(data))
+
+
+class BundleWriter:
+    """Writes a bundle incrementally (same interface as the book_stream writers)"""
+
+    def __init__(self, output_path: Path):
+        self.output_path = Path(output_path)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.output_path, 'wb')
+        # Header is rewritten with real offsets on close
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0, 0, 0, 0))
+        self.manifest_offset = 0
+        self.manifest_length = 0
+        self.index: List = []
+        self.count = 0
+
+    def write_manifest(self, manifest: Dict):
+        data = _encode(manifest)
+        self.manifest_offset = self.file.tell()
+        self.manifest_length = len(data)
+        self.file.write(data)
+
+    def write_section(self, section: Dict):
+        data = _encode(section)
+        self.index.append((section['section'], self.file.tell(), len(data)))
+        self.file.write(data)
+        self.count += 1
+
+    def close(self):
+        index_offset = self.file.tell()
+        for entry in sorted(self.index):
+            self.file.write(INDEX_ENTRY.pack(*entry))
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(self.index),
+                                    self.manifest_offset, self.manifest_length, index_offset))
+        self.file.close()
+
+
+class BookBundle:
+    """Memory-mapped reader that decodes sections on demand"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, _, self.section_count, self._manifest_offset,
+         self._manifest_length, index_offset) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a book bundle")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: unsupported bundle version {version}")
+
+        self._index = memoryview(self._map)[index_offset:
+                                            index_offset + self.section_count * INDEX_ENTRY.size]
+        self._numbers = [number for number, _, _ in INDEX_ENTRY.iter_unpack(self._index)]
+        # Books number sections 1..N, so position = number - first in the common case
+        self._first = self._numbers[0] if self._numbers else 0
+        self._manifest: Optional[Dict] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._index.release()
+        self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.section_count
+
+    def __contains__(self, section_number: int) -> bool:
+        return self._position(section_number) is not None
+
+    @property
+    def manifest(self) -> Dict:
+        """Book metadata and rules (decoded on first access)"""
+        if self._manifest is None:
+            start = self._manifest_offset
+            self._manifest = _decode(self._map[start:start + self._manifest_length])
+        return self._manifest
+
+    def section_numbers(self) -> List[int]:
+        return list(self._numbers)
+
+    def _position(self, section_number: int) -> Optional[int]:
+        position = section_number - self._first
+        if 0 <= position < self.section_count and self._numbers[position] == section_number:
+            return position
+        position = bisect_left(self._numbers, section_number)
+        if position < self.section_count and self._numbers[position] == section_number:
+            return position
+        return None
+
+    def section(self, section_number: int) -> Optional[Dict]:
+        """Decode one section, or None if the bundle has no such section"""
+        position = self._position(int(section_number))
+        if position is None:
+            return None
+        _, offset, length = INDEX_ENTRY.unpack_from(self._index, position * INDEX_ENTRY.size)
+        return _decode(self._map[offset:offset + length])
+
+    def iter_sections(self) -> Iterator[Dict]:
+        """Decode every section in original extraction order"""
+        entries = sorted(INDEX_ENTRY.iter_unpack(self._index), key=lambda entry: entry[1])
+        for _, offset, length in entries:
+            yield _decode(self._map[offset:offset + length])
+
+    def to_dict(self) -> Dict:
+        """The full book in book-N.json structure"""
+        book = dict(self.manifest)
+        book['sections'] = {str(s['section']): s for s in self.iter_sections()}
+        return book
+
+
+def convert(json_path: Path, output_path: Optional[Path] = None) -> Path:
+    """Convert an extracted book-N.json into a bundle next to it"""
+    json_path = Path(json_path)
+    output_path = Path(output_path) if output_path else json_path.with_suffix('.lwb')
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        book = json.load(f)
+
+    writer = BundleWriter(output_path)
+    writer.write_manifest({k: v for k, v in book.items() if k != 'sections'})
+    for section in book.get('sections', {}).values():
+        writer.write_section(section)
+    writer.close()
+    return output_path
+
+
+def benchmark(json_path: Path, bundle_path: Path, lookups: int = 2000) -> Dict:
+    """Compare cold open and per-section lookup of json.load vs. a bundle"""
+    import random
+
+    def timed(fn, repeat: int) -> float:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples)
+
+    def load_json():
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    book = load_json()
+    numbers = [int(k) for k in book['sections']]
+    rng = random.Random(0)
+    targets = [rng.choice(numbers) for _ in range(lookups)]
+
+    json_open = timed(load_json, 20)
+
+    def open_bundle():
+        with BookBundle(bundle_path) as bundle:
+            bundle.manifest
+
+    bundle_open = timed(open_bundle, 20)
+
+    def first_section_json():
+        load_json()['sections']['1']
+
+    def first_section_bundle():
+        with BookBundle(bundle_path) as bundle:
+            bundle.section(1)
+
+    json_first = timed(first_section_json, 20)
+    bundle_first = timed(first_section_bundle, 20)
+
+    sections = book['sections']
+    start = time.perf_counter()
+    for number in targets:
+        sections[str(number)]
+    json_lookup = (time.perf_counter() - start) / lookups
+
+    with BookBundle(bundle_path) as bundle:
+        start = time.perf_counter()
+        for number in targets:
+            bundle.section(number)
+        bundle_lookup = (time.perf_counter() - start) / lookups
+
+    json_size = Path(json_path).stat().st_size
+    bundle_size = Path(bundle_path).stat().st_size
+
+    print(f"\n⏱️  Bundle benchmark: {Path(json_path).name} vs {Path(bundle_path).name}")
+    print(f"  Size:                 {json_size / 1024:.0f}KB json, {bundle_size / 1024:.0f}KB bundle")
+    print(f"  Cold open:            {json_open * 1000:.2f}ms json.load, {bundle_open * 1000:.3f}ms bundle")
+    print(f"  Open + section 1:     {json_first * 1000:.2f}ms json, {bundle_first * 1000:.3f}ms bundle")
+    print(f"  Section lookup:       {json_lookup * 1e6:.2f}µs dict (after full load), "
+          f"{bundle_lookup * 1e6:.2f}µs bundle decode")
+
+    return {
+        'json_bytes': json_size,
+        'bundle_bytes': bundle_size,
+        'json_open_ms': json_open * 1000,
+        'bundle_open_ms': bundle_open * 1000,
+        'json_first_section_ms': json_first * 1000,
+        'bundle_first_section_ms': bundle_first * 1000,
+        'json_lookup_us': json_lookup * 1e6,
+        'bundle_lookup_us': bundle_lookup * 1e6
+    }
+
+
+def main():
+    """Convert, inspect or benchmark book bundles"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Lone Wolf binary book bundles')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help='Convert book-N.json files to bundles')
+    convert_parser.add_argument('json_files', nargs='+', help='Extracted book JSON files')
+    convert_parser.add_argument('-o', '--output', help='Output path (single input only)')
+
+    show_parser = subparsers.add_parser('show', help='Print one section from a bundle')
+    show_parser.add_argument('bundle', help='Bundle file')
+    show_parser.add_argument('section', type=int, help='Section number')
+
+    bench_parser = subparsers.add_parser('benchmark', help='Compare against json.load')
+    bench_parser.add_argument('json_file', help='Extracted book JSON file')
+    bench_parser.add_argument('--bundle', help='Bundle file (converted to a temp file if omitted)')
+
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        if args.output and len(args.json_files) > 1:
+            parser.error('-o/--output needs a single input file')
+        for json_file in args.json_files:
+            output_path = convert(Path(json_file), args.output)
+            print(f"✅ {json_file} → {output_path} ({output_path.stat().st_size / 1024:.0f}KB)")
+
+    elif args.command == 'show':
+        with BookBundle(Path(args.bundle)) as bundle:
+            section = bundle.section(args.section)
+        if section is None:
+            print(f"❌ Section {args.section} not found")
+        else:
+            print(json.dumps(section, indent=2, ensure_ascii=False))
+
+    elif args.command == 'benchmark':
+        if args.bundle:
+            benchmark(Path(args.json_file), Path(args.bundle))
+        else:
+            import tempfile
+            with tempfile.TemporaryDirectory() as tmp:
+                bundle_path = convert(Path(args.json_file), Path(tmp) / 'book.lwb')
+                benchmark(Path(args.json_file), bundle_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory models for extracted Lone Wolf books
+Section, Choice, Combat and Modifier are __slots__ classes holding the
+same fields as the book JSON without a per-object dict or repeated key
+strings; discipline ids, section types, enemy names and illustration
+names are interned, lists become tuples and sections are keyed by int.
+to_dict() writes today's JSON schema back out (same keys, same order),
+so a book loaded through the models serializes byte-identically.
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_intern = sys.intern
+
+
+def _check_keys(kind: str, data: Dict, allowed: Tuple[str, ...]):
+    unknown = set(data) - set(allowed)
+    if unknown:
+        raise ValueError(f"{kind} has fields the model does not hold: {sorted(unknown)}")
+
+
+class Choice:
+    """A link to another section; conditional is None when the JSON has no condition keys"""
+
+    __slots__ = ('text', 'target', 'conditional', 'requires')
+
+    FIELDS = ('text', 'target', 'conditional', 'requires')
+
+    def __init__(self, text: str, target: int, conditional: Optional[bool] = None,
+                 requires: Optional[str] = None):
+        self.text = text
+        self.target = target
+        self.conditional = conditional
+        self.requires = requires
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Choice':
+        _check_keys('Choice', data, cls.FIELDS)
+        if ('conditional' in data) != ('requires' in data):
+            raise ValueError("Choice must have both or neither of 'conditional' and 'requires'")
+        requires = data.get('requires')
+        return cls(data['text'], data['target'], data.get('conditional'),
+                   _intern(requires) if requires else requires)
+
+    def to_dict(self) -> Dict:
+        choice = {'text': self.text, 'target': self.target}
+        if self.conditional is not None:
+            choice['conditional'] = self.conditional
+            choice['requires'] = self.requires
+        return choice
+
+
+class Modifier:
+    """A COMBAT SKILL modifier or ENDURANCE change; unset conditions are None"""
+
+    __slots__ = ('value', 'rounds', 'every_round', 'unless', 'condition')
+
+    FIELDS = ('value', 'rounds', 'every_round', 'unless', 'condition')
+
+    def __init__(self, value: int, rounds: Optional[Tuple[int, Optional[int]]] = None,
+                 every_round: Optional[bool] = None, unless: Optional[str] = None,
+                 condition: Optional[str] = None):
+        self.value = value
+        self.rounds = rounds
+        self.every_round = every_round
+        self.unless = unless
+        self.condition = condition
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Modifier':
+        _check_keys('Modifier', data, cls.FIELDS)
+        rounds = data.get('rounds')
+        unless = data.get('unless')
+        return cls(data['value'], tuple(rounds) if rounds is not None else None,
+                   data.get('every_round'), _intern(unless) if unless else unless,
+                   data.get('condition'))
+
+    def to_dict(self) -> Dict:
+        modifier = {'value': self.value}
+        if self.rounds is not None:
+            modifier['rounds'] = list(self.rounds)
+        if self.every_round is not None:
+            modifier['every_round'] = self.every_round
+        if self.unless is not None:
+            modifier['unless'] = self.unless
+        if self.condition is not None:
+            modifier['condition'] = self.condition
+        return modifier
+
+
+class Combat:
+    """An enemy to fight; modifiers is None when the JSON has none"""
+
+    __slots__ = ('enemy_name', 'combat_skill', 'endurance', 'can_evade', 'modifiers')
+
+    FIELDS = ('enemy_name', 'combat_skill', 'endurance', 'can_evade', 'modifiers')
+
+    def __init__(self, enemy_name: str, combat_skill: int, endurance: int, can_evade: bool,
+                 modifiers: Optional[Tuple[Modifier, ...]] = None):
+        self.enemy_name = enemy_name
+        self.combat_skill = combat_skill
+        self.endurance = endurance
+        self.can_evade = can_evade
+        self.modifiers = modifiers
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Combat':
+        _check_keys('Combat', data, cls.FIELDS)
+        modifiers = data.get('modifiers')
+        return cls(_intern(data['enemy_name']), data['combat_skill'], data['endurance'],
+                   data['can_evade'],
+                   tuple(Modifier.from_dict(m) for m in modifiers) if modifiers is not None else None)
+
+    def to_dict(self) -> Dict:
+        combat = {
+            'enemy_name': self.enemy_name,
+            'combat_skill': self.combat_skill,
+            'endurance': self.endurance,
+            'can_evade': self.can_evade
+        }
+        if self.modifiers is not None:
+            combat['modifiers'] = [modifier.to_dict() for modifier in self.modifiers]
+        return combat
+
+
+class Section:
+    """One numbered section; endurance_changes and items are () when the JSON has none"""
+
+    __slots__ = ('section', 'text', 'type', 'choices', 'illustrations', 'combat', 'endurance_changes', 'items')
+
+    FIELDS = ('section', 'text', 'type', 'choices', 'illustrations', 'combat', 'endurance_changes', 'items')
+
+    def __init__(self, section: int, text: str, type: str, choices: Tuple[Choice, ...] = (),
+                 illustrations: Tuple[str, ...] = (), combat: Optional[Combat] = None,
+                 endurance_changes: Tuple[Modifier, ...] = (), items: Tuple[str, ...] = ()):
+        self.section = section
+        self.text = text
+        self.type = type
+        self.choices = choices
+        self.illustrations = illustrations
+        self.combat = combat
+        self.endurance_changes = endurance_changes
+        self.items = items
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Section':
+        _check_keys('Section', data, cls.FIELDS)
+        combat = data.get('combat')
+        return cls(data['section'], data['text'], _intern(data['type']),
+                   tuple(Choice.from_dict(c) for c in data['choices']),
+                   tuple(_intern(i) for i in data['illustrations']),
+                   Combat.from_dict(combat) if combat is not None else None,
+                   tuple(Modifier.from_dict(m) for m in data.get('endurance_changes', ())),
+                   tuple(data.get('items', ())))
+
+    def to_dict(self) -> Dict:
+        section = {
+            'section': self.section,
+            'text': self.text,
+            'type': self.type,
+            'choices': [choice.to_dict() for choice in self.choices],
+            'illustrations': list(self.illustrations)
+        }
+        if self.combat is not None:
+            section['combat'] = self.combat.to_dict()
+        if self.endurance_changes:
+            section['endurance_changes'] = [change.to_dict() for change in self.endurance_changes]
+        if self.items:
+            section['items'] = list(self.items)
+        return section
+
+
+class Book:
+    """Book metadata (kept as parsed JSON; it is small) plus sections by number"""
+
+    __slots__ = ('metadata', 'sections')
+
+    def __init__(self, metadata: Dict, sections: Dict[int, Section]):
+        self.metadata = metadata
+        self.sections = sections
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Book':
+        metadata = {key: value for key, value in data.items() if key != 'sections'}
+        sections = {}
+        for key, section in data.get('sections', {}).items():
+            if str(section['section']) != key:
+                raise ValueError(f"Section {section['section']} is stored under key {key!r}")
+            sections[section['section']] = Section.from_dict(section)
+        return cls(metadata, sections)
+
+    @classmethod
+    def load(cls, path: Path) -> 'Book':
+        """Load a book in any output format (see book_stream.load_book)"""
+        from book_stream import load_book
+        return cls.from_dict(load_book(Path(path)))
+
+    def to_dict(self) -> Dict:
+        book = dict(self.metadata)
+        book['sections'] = {str(number): section.to_dict() for number, section in self.sections.items()}
+        return book
+
+
+def memory_report(paths: List[Path]) -> List[Dict]:
+    """Bytes per section held as JSON dicts vs. as models, and a round-trip check
+
+    Both figures are tracemalloc totals for the book's sections including
+    their strings, which the models share with the parsed JSON.
+    """
+    import gc
+    import tracemalloc
+
+    results = []
+    for path in paths:
+        raw = Path(path).read_text(encoding='utf-8')
+
+        gc.collect()
+        tracemalloc.start()
+        sections = json.loads(raw)['sections']
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del sections
+
+        gc.collect()
+        tracemalloc.start()
+        sections = Book.from_dict({'sections': json.loads(raw)['sections']}).sections
+        gc.collect()
+        model_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        count = len(sections)
+        del sections
+
+        book = Book.from_dict(json.loads(raw))
+        results.append({
+            'book': str(path),
+            'sections': count,
+            'dict_bytes_per_section': dict_bytes / count if count else 0.0,
+            'model_bytes_per_section': model_bytes / count if count else 0.0,
+            'identical_round_trip': json.dumps(book.to_dict(), indent=2, ensure_ascii=False) == raw
+        })
+    return results
+
+
+def main():
+    """Memory report: sections as JSON dicts vs. slotted models"""
+    import argparse
+    from book_stream import book_files
+
+    parser = argparse.ArgumentParser(description='Compact Lone Wolf book models')
+    parser.add_argument('books', nargs='*', help='Book JSON files (default: extracted-content/book-N.json)')
+
+    args = parser.parse_args()
+    paths = [Path(p) for p in args.books] or book_files(Path('extracted-content'))
+    results = [r for r in memory_report(paths) if r['sections']]
+    if not results:
+        print("❌ No book-N.json files with sections found (pass books or re-extract)")
+        return
+
+    print(f"\n💾 Memory per section (dicts vs. models):")
+    for r in results:
+        saved = 1 - r['model_bytes_per_section'] / r['dict_bytes_per_section']
+        print(f"  {Path(r['book']).name:<12} {r['sections']:>4} sections  "
+              f"{r['dict_bytes_per_section']:7.0f} B  ->  {r['model_bytes_per_section']:7.0f} B  "
+              f"({saved:.0%} less)  round trip {'✅ identical' if r['identical_round_trip'] else '❌ differs'}")
+    total_sections = sum(r['sections'] for r in results)
+    dict_total = sum(r['dict_bytes_per_section'] * r['sections'] for r in results)
+    model_total = sum(r['model_bytes_per_section'] * r['sections'] for r in results)
+    print(f"  {'all':<12} {total_sections:>4} sections  {dict_total / total_sections:7.0f} B  ->  "
+          f"{model_total / total_sections:7.0f} B  ({1 - model_total / dict_total:.0%} less)")
+
+
+if __name__ == '__main__':
+    main()
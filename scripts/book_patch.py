@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Section-level patches between two extractions of a Lone Wolf book
+A patch carries only the sections that were added, changed or removed and
+the metadata fields that changed, plus checksums of the book before and
+after. Clients apply it to their copy instead of downloading the whole
+book again (the content update flow in planning-docs/CONTENT_STORAGE.md);
+the checksums make sure a patch only lands on the book it was made from
+and that the result is exactly the newer extraction.
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+PATCH_VERSION = 1
+
+
+def book_checksum(book: Dict) -> str:
+    """sha256 of a book's canonical JSON (independent of key order and formatting)"""
+    encoded = json.dumps(book, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def _merged_order(old: List[str], removed: List[str], added: List[str]) -> List[str]:
+    """Key order apply_patch produces: old keys in place, new keys appended"""
+    gone = set(removed)
+    return [key for key in old if key not in gone] + added
+
+
+def diff_books(old: Dict, new: Dict) -> Dict:
+    """Patch that turns book old into book new"""
+    patch = {
+        'patch_version': PATCH_VERSION,
+        'book_number': new.get('book_number'),
+        'from': {'version': old.get('version'), 'sha256': book_checksum(old)},
+        'to': {'version': new.get('version'), 'sha256': book_checksum(new)}
+    }
+
+    metadata = {key: value for key, value in new.items()
+                if key != 'sections' and (key not in old or old[key] != value)}
+    removed_metadata = [key for key in old if key not in new]
+    if metadata:
+        patch['metadata'] = metadata
+    if removed_metadata:
+        patch['removed_metadata'] = removed_metadata
+
+    old_sections = old.get('sections', {})
+    new_sections = new.get('sections', {})
+    added = {n: s for n, s in new_sections.items() if n not in old_sections}
+    changed = {n: s for n, s in new_sections.items() if n in old_sections and old_sections[n] != s}
+    removed = [n for n in old_sections if n not in new_sections]
+    if added:
+        patch['added'] = added
+    if changed:
+        patch['changed'] = changed
+    if removed:
+        patch['removed'] = removed
+
+    # Orders are only spelled out when appending new keys would not reproduce them
+    if _merged_order(list(old_sections), removed, list(added)) != list(new_sections):
+        patch['section_order'] = list(new_sections)
+    new_keys = [key for key in new if key not in old]
+    if _merged_order(list(old), removed_metadata, new_keys) != list(new):
+        patch['key_order'] = list(new)
+    return patch
+
+
+def apply_patch(book: Dict, patch: Dict, verify: bool = True) -> Dict:
+    """Book with patch applied; book itself is not modified
+
+    Unchanged sections are shared with book rather than copied. With
+    verify, raises ValueError if book is not the one the patch was made
+    from or the result does not match the patched book's checksum.
+    """
+    if patch.get('patch_version') != PATCH_VERSION:
+        raise ValueError(f"Unsupported patch version: {patch.get('patch_version')}")
+    if verify and book_checksum(book) != patch['from']['sha256']:
+        raise ValueError(f"Book does not match the patch base ({patch['from']['sha256'][:12]})")
+
+    removed_metadata = set(patch.get('removed_metadata', ()))
+    metadata = patch.get('metadata', {})
+    removed = set(patch.get('removed', ()))
+    changed = patch.get('changed', {})
+
+    sections = {n: changed.get(n, s) for n, s in book.get('sections', {}).items() if n not in removed}
+    sections.update(patch.get('added', {}))
+    if 'section_order' in patch:
+        sections = {n: sections[n] for n in patch['section_order']}
+
+    result = {}
+    for key, value in book.items():
+        if key not in removed_metadata:
+            result[key] = sections if key == 'sections' else metadata.get(key, value)
+    for key, value in metadata.items():
+        result.setdefault(key, value)
+    if 'key_order' in patch:
+        result = {key: result[key] for key in patch['key_order']}
+
+    if verify and book_checksum(result) != patch['to']['sha256']:
+        raise ValueError(f"Patched book does not match the target checksum ({patch['to']['sha256'][:12]})")
+    return result
+
+
+def patch_stats(patch: Dict) -> Dict:
+    return {
+        'added': len(patch.get('added', {})),
+        'changed': len(patch.get('changed', {})),
+        'removed': len(patch.get('removed', [])),
+        'metadata': sorted(patch.get('metadata', {})) + sorted(patch.get('removed_metadata', []))
+    }
+
+
+def save_patch(patch: Dict, path: Path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(patch, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_patch(path: Path) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    """Diff two extractions of a book, or apply patches to a book"""
+    import argparse
+    from book_stream import load_book
+
+    parser = argparse.ArgumentParser(description='Section-level patches between book extractions')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    diff_parser = commands.add_parser('diff', help='Write the patch from OLD to NEW')
+    diff_parser.add_argument('old', help='Earlier extraction (any book format)')
+    diff_parser.add_argument('new', help='Later extraction (any book format)')
+    diff_parser.add_argument('-o', '--output', help='Patch file (default: NEW with .patch.json suffix)')
+
+    apply_parser = commands.add_parser('apply', help='Apply one or more patches, in order, to BOOK')
+    apply_parser.add_argument('book', help='Book to patch (any book format)')
+    apply_parser.add_argument('patches', nargs='+', help='Patch files')
+    apply_parser.add_argument('-o', '--output', help='Patched book JSON (default: overwrite BOOK, which must be .json)')
+
+    args = parser.parse_args()
+
+    if args.command == 'diff':
+        start = time.perf_counter()
+        patch = diff_books(load_book(Path(args.old)), load_book(Path(args.new)))
+        elapsed = time.perf_counter() - start
+        output = Path(args.output) if args.output else Path(args.new).with_suffix('.patch.json')
+        save_patch(patch, output)
+
+        stats = patch_stats(patch)
+        new_size = Path(args.new).stat().st_size if Path(args.new).is_file() else None
+        size = output.stat().st_size
+        print(f"🩹 Book {patch['book_number']}: {stats['added']} added, {stats['changed']} changed, "
+              f"{stats['removed']} removed sections"
+              f"{', metadata: ' + ', '.join(stats['metadata']) if stats['metadata'] else ''}")
+        print(f"  {patch['from']['sha256'][:12]} -> {patch['to']['sha256'][:12]} in {elapsed * 1000:.1f}ms")
+        if new_size:
+            print(f"  Patch: {size / 1024:.1f} KB ({size / new_size:.1%} of the full book)")
+        print(f"✅ Saved to: {output}")
+        return
+
+    output = Path(args.output) if args.output else Path(args.book)
+    if output.suffix != '.json':
+        parser.error('apply writes book JSON; give -o for non-JSON books')
+    book = load_book(Path(args.book))
+    start = time.perf_counter()
+    try:
+        for patch_file in args.patches:
+            book = apply_patch(book, load_patch(Path(patch_file)))
+    except ValueError as e:
+        print(f"❌ {patch_file}: {e}")
+        raise SystemExit(1)
+    elapsed = time.perf_counter() - start
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(book, f, indent=2, ensure_ascii=False)
+    print(f"✅ Applied {len(args.patches)} patch{'es' if len(args.patches) > 1 else ''} "
+          f"in {elapsed * 1000:.1f}ms (checksums verified): {output}")
+
+
+if __name__ == '__main__':
+    main()
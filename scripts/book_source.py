@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Book sources for the Lone Wolf extractor
+A book is either an unpacked Project Aon directory or a .zip / .tar(.gz)
+archive of one. Archives are read in a single pass (for zip files, in
+central directory order) and their members held in memory as
+ArchiveMember objects, which read like the Path objects of a directory
+source, so the extractor parses both the same way with no per-file opens.
+"""
+
+import fnmatch
+import io
+import os
+import tarfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+# File every book directory has; archives are searched for the directory holding it
+MARKER_FILE = 'sect1.htm'
+
+
+class ArchiveMember:
+    """One file of an archive, held in memory; reads like a Path"""
+
+    __slots__ = ('archive', 'name', 'data')
+
+    def __init__(self, archive: str, name: str, data: bytes):
+        self.archive = archive
+        self.name = name
+        self.data = data
+
+    def read_bytes(self) -> bytes:
+        return self.data
+
+    def read_text(self, encoding: str = 'utf-8') -> str:
+        # Same newline handling as reading the unpacked file in text mode
+        return io.TextIOWrapper(io.BytesIO(self.data), encoding=encoding).read()
+
+    def __str__(self):
+        return f"{self.archive}:{self.name}"
+
+
+class DirectorySource:
+    """Loose files of an unpacked book directory"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def file(self, name: str) -> Optional[Path]:
+        """The named file, or None if the book has no such file"""
+        path = self.path / name
+        return path if path.is_file() else None
+
+    def glob(self, pattern: str) -> List[Path]:
+        return sorted(self.path.glob(pattern))
+
+
+class ArchiveSource:
+    """Files of a book archive, loaded into memory when opened
+
+    Only the directory holding MARKER_FILE is kept (Project Aon archives
+    may nest the book under a path such as en/xhtml/lw/01fftd/); book_dir
+    is its name ('' at the top of the archive). From a zip only the pages
+    are read up front; images are read when first asked for.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.book_dir: Optional[str] = None
+        # Zip members not read yet: name -> member name in the archive
+        self._deferred: Dict[str, str] = {}
+        if zipfile.is_zipfile(self.path):
+            files = self._read_zip()
+        elif tarfile.is_tarfile(self.path):
+            files = self._read_tar()
+        else:
+            raise ValueError(f"{self.path} is not a zip or tar archive")
+        if self.book_dir is None:
+            raise ValueError(f"{self.path} has no {MARKER_FILE}")
+        self.members: Dict[str, ArchiveMember] = {
+            name: ArchiveMember(self.path.name, name, data) for name, data in sorted(files.items())}
+
+    @staticmethod
+    def _book_prefix(names: List[str]) -> Optional[str]:
+        """Directory prefix (with trailing slash, or '') that holds MARKER_FILE"""
+        candidates = [n[:-len(MARKER_FILE)] for n in names
+                      if n == MARKER_FILE or n.endswith('/' + MARKER_FILE)]
+        return min(candidates, key=len) if candidates else None
+
+    @staticmethod
+    def _in_book(name: str, prefix: str) -> bool:
+        return name.startswith(prefix) and '/' not in name[len(prefix):]
+
+    def _read_zip(self) -> Dict[str, bytes]:
+        with zipfile.ZipFile(self.path) as archive:
+            infos = [info for info in archive.infolist() if not info.is_dir()]
+            prefix = self._book_prefix([info.filename for info in infos])
+            if prefix is None:
+                return {}
+            self.book_dir = Path(prefix).name
+            # Read in the order members are stored, so the file is read front to back
+            infos = sorted((info for info in infos if self._in_book(info.filename, prefix)),
+                           key=lambda info: info.header_offset)
+            files = {}
+            for info in infos:
+                name = info.filename[len(prefix):]
+                if name.endswith('.htm'):
+                    files[name] = archive.read(info)
+                else:
+                    self._deferred[name] = info.filename
+            return files
+
+    def _read_tar(self) -> Dict[str, bytes]:
+        # A tar has no index: one sequential pass reads every member
+        files = {}
+        with tarfile.open(self.path) as archive:
+            for member in archive:
+                if member.isfile():
+                    files[member.name] = archive.extractfile(member).read()
+        prefix = self._book_prefix(list(files))
+        if prefix is None:
+            return {}
+        self.book_dir = Path(prefix).name
+        return {name[len(prefix):]: data for name, data in files.items() if self._in_book(name, prefix)}
+
+    def file(self, name: str) -> Optional[ArchiveMember]:
+        if name in self._deferred:
+            with zipfile.ZipFile(self.path) as archive:
+                data = archive.read(self._deferred.pop(name))
+            self.members[name] = ArchiveMember(self.path.name, name, data)
+        return self.members.get(name)
+
+    def glob(self, pattern: str) -> List[ArchiveMember]:
+        names = [name for name in sorted(set(self.members) | set(self._deferred))
+                 if fnmatch.fnmatchcase(name, pattern)]
+        return [self.file(name) for name in names]
+
+
+BookSource = Union[DirectorySource, ArchiveSource]
+
+
+def open_book(path: Union[str, Path, BookSource]) -> BookSource:
+    """Source for a book directory or archive (sources are passed through)"""
+    if isinstance(path, (DirectorySource, ArchiveSource)):
+        return path
+    path = Path(path)
+    if path.is_file():
+        return ArchiveSource(path)
+    return DirectorySource(path)
+
+
+def file_size(book_file: Union[Path, ArchiveMember]) -> int:
+    return len(book_file.data) if isinstance(book_file, ArchiveMember) else book_file.stat().st_size
+
+
+def evict(paths: List[Path]):
+    """Drop files from the page cache (Linux), so the next read is cold"""
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def benchmark_sources(book_dir: Path, archives: List[Path], repeat: int = 3) -> List[Dict]:
+    """Time reading and extracting all sections: loose files vs. each archive
+
+    Each source is timed cold (its files evicted from the page cache first)
+    and warm (best of repeat runs); read covers opening the source and
+    reading every section file, extract is the full section extraction.
+    """
+    from scraper import LoneWolfExtractor
+
+    cold_capable = hasattr(os, 'posix_fadvise')
+    loose_files = [p for p in Path(book_dir).iterdir() if p.is_file()]
+    baseline = None
+    results = []
+
+    for source in [Path(book_dir)] + [Path(a) for a in archives]:
+        files = loose_files if source.is_dir() else [source]
+
+        def read():
+            book = open_book(source)
+            return sum(len(f.read_bytes()) for f in book.glob('sect*.htm'))
+
+        def extract():
+            extractor = LoneWolfExtractor(str(source))
+            return extractor.parse_sections(extractor.section_files())
+
+        timings = {}
+        for label, run in (('read', read), ('extract', extract)):
+            if cold_capable:
+                evict(files)
+                start = time.perf_counter()
+                run()
+                timings[f'{label}_cold'] = time.perf_counter() - start
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                output = run()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[f'{label}_warm'] = best
+
+        if baseline is None:
+            baseline = output
+        results.append(dict(timings, source=str(source), identical=output == baseline))
+
+    print(f"\n⏱️  Book source benchmark ({Path(book_dir).name}, warm = best of {repeat}"
+          f"{'' if cold_capable else ', no posix_fadvise: cold runs skipped'}):")
+    for r in results:
+        cells = '  '.join(f"{key} {r[key] * 1000:7.1f}ms" for key in
+                          ('read_cold', 'read_warm', 'extract_cold', 'extract_warm') if key in r)
+        print(f"  {Path(r['source']).name:<14} {cells}  {'✅' if r['identical'] else '❌ output differs'}")
+    return results
+
+
+def main():
+    """Benchmark extracting a book from loose files vs. zip and tar archives of it"""
+    import argparse
+    import shutil
+    import tempfile
+
+    parser = argparse.ArgumentParser(description='Loose-file vs. archive book source benchmark')
+    parser.add_argument('book_dir', help='Unpacked book directory (e.g., source-materials/01fftd)')
+    parser.add_argument('archives', nargs='*',
+                        help='Archives of the same book (default: zip and tar.gz built in a temp dir)')
+    parser.add_argument('--repeat', type=int, default=3, help='Warm runs per source (default: 3)')
+
+    args = parser.parse_args()
+    book_dir = Path(args.book_dir)
+    tmp_dir = None
+    archives = [Path(a) for a in args.archives]
+    if not archives:
+        tmp_dir = Path(tempfile.mkdtemp())
+        archives = [Path(shutil.make_archive(str(tmp_dir / book_dir.name), fmt, book_dir.parent, book_dir.name))
+                    for fmt in ('zip', 'gztar')]
+    try:
+        benchmark_sources(book_dir, archives, args.repeat)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Lazy BookStore over extracted Lone Wolf content
+Opens every book in extracted-content/ up front but only decodes book
+metadata; sections are materialized on first request and kept in a
+bounded LRU cache. This is the read path a game server calls on every
+page turn.
+
+Books are read from book-N.lwb bundles when present and up to date
+(see book_bundle.py), otherwise from book-N.json, which is memory-mapped
+and whose section spans are indexed without decoding them.
+"""
+
+import json
+import mmap
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from book_stream import book_files
+
+DEFAULT_MEMORY_BUDGET = 8 * 1024 * 1024
+
+SOURCES = ('auto', 'json', 'bundle')
+
+# Unrolled loops (a*(?:b a*)*): every character has one way to match, so
+# failed matches backtrack linearly
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+
+# Runs of non-bracket text and whole JSON strings, up to the next brace or
+# bracket (captured); JSON is well formed, so one depth counter covers both
+_NEXT_BRACKET = re.compile(rb'[^"{}\[\]]*(?:' + _STRING + rb'[^"{}\[\]]*)*([{}\[\]])')
+_STRING_VALUE = re.compile(_STRING)
+_SCALAR = re.compile(rb'[^,}\]\s]+')
+_WHITESPACE = re.compile(rb'\s*')
+
+
+def _nested_object_pattern(depth: int) -> bytes:
+    """Regex for a JSON object nesting at most depth levels of objects"""
+    pattern = rb'\{[^"{}]*(?:' + _STRING + rb'[^"{}]*)*\}'
+    for _ in range(depth - 1):
+        pattern = rb'\{[^"{}]*(?:(?:' + _STRING + rb'|' + pattern + rb')[^"{}]*)*\}'
+    return pattern
+
+
+# Matches a whole section object in one call (sections nest objects 3 deep)
+_OBJECT = re.compile(_nested_object_pattern(4))
+
+
+def _skip(data: bytes, pos: int, expected: bytes = b'') -> int:
+    """Skip whitespace, then an expected character if given"""
+    pos = _WHITESPACE.match(data, pos).end()
+    if expected:
+        if data[pos:pos + 1] != expected:
+            raise ValueError(f"Expected {expected.decode()!r} at offset {pos}")
+        pos += 1
+    return pos
+
+
+def _value_end(data: bytes, pos: int) -> int:
+    """End offset of the JSON value starting at pos, without decoding it"""
+    first = data[pos:pos + 1]
+    if first == b'{':
+        match = _OBJECT.match(data, pos)
+        if match:
+            return match.end()
+    elif first == b'"':
+        match = _STRING_VALUE.match(data, pos)
+        if not match:
+            raise ValueError(f"Unterminated string at offset {pos}")
+        return match.end()
+    elif first != b'[':
+        match = _SCALAR.match(data, pos)
+        if not match:
+            raise ValueError(f"Expected a value at offset {pos}")
+        return match.end()
+
+    # Arrays, and objects deeper than _OBJECT handles: walk bracket by bracket
+    depth = 0
+    while True:
+        match = _NEXT_BRACKET.match(data, pos)
+        if not match:
+            raise ValueError(f"Unterminated value at offset {pos}")
+        pos = match.end()
+        if match.group(1) in b'{[':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
+
+
+def index_json_book(data: bytes) -> Tuple[Dict, Dict[int, Tuple[int, int]]]:
+    """Decode a book's metadata and locate each section's raw JSON span
+
+    data is the UTF-8 file content as bytes or an mmap. Returns (metadata,
+    {section number: (start, end)}) with byte offsets; sections are not
+    decoded until json.loads(data[start:end]) is called for them.
+    """
+    metadata, spans, _ = _index_json_object(data, 0)
+    return metadata, spans
+
+
+def iter_json_books(data: bytes) -> Iterator[Tuple[Dict, Dict[int, Tuple[int, int]]]]:
+    """index_json_book for each of one or more concatenated book documents"""
+    pos = _skip(data, 0)
+    while pos < len(data):
+        metadata, spans, pos = _index_json_object(data, pos)
+        yield metadata, spans
+        pos = _skip(data, pos)
+
+
+def _index_json_object(data: bytes, pos: int) -> Tuple[Dict, Dict[int, Tuple[int, int]], int]:
+    metadata: Dict = {}
+    spans: Dict[int, Tuple[int, int]] = {}
+
+    pos = _skip(data, pos, b'{')
+    while True:
+        pos = _skip(data, pos)
+        if data[pos:pos + 1] == b'}':
+            pos += 1
+            break
+        end = _value_end(data, pos)
+        key = json.loads(data[pos:end])
+        pos = _skip(data, end, b':')
+        pos = _skip(data, pos)
+
+        if key == 'sections':
+            pos = _skip(data, pos, b'{')
+            while True:
+                pos = _skip(data, pos)
+                if data[pos:pos + 1] == b'}':
+                    pos += 1
+                    break
+                end = _value_end(data, pos)
+                number = json.loads(data[pos:end])
+                pos = _skip(data, end, b':')
+                pos = _skip(data, pos)
+                end = _value_end(data, pos)
+                spans[int(number)] = (pos, end)
+                pos = _skip(data, end)
+                if data[pos:pos + 1] == b',':
+                    pos += 1
+        else:
+            end = _value_end(data, pos)
+            metadata[key] = json.loads(data[pos:end])
+            pos = end
+
+        pos = _skip(data, pos)
+        if data[pos:pos + 1] == b',':
+            pos += 1
+
+    return metadata, spans, pos
+
+
+def _deep_sizeof(obj) -> int:
+    """Approximate memory held by a decoded JSON value"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, list):
+        size += sum(_deep_sizeof(v) for v in obj)
+    return size
+
+
+class _JSONSource:
+    """Sections of a book-N.json file, decoded one at a time
+
+    The file is memory-mapped rather than read, so its text stays in the
+    page cache; only the metadata and section byte spans are on the heap.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.metadata, self.spans = index_json_book(self.data)
+
+    @property
+    def mapped_bytes(self) -> int:
+        return len(self.data)
+
+    def section_numbers(self) -> List[int]:
+        return list(self.spans)
+
+    def load(self, number: int) -> Optional[Dict]:
+        span = self.spans.get(number)
+        if span is None:
+            return None
+        return json.loads(self.data[span[0]:span[1]])
+
+    def close(self):
+        self.data.close()
+
+
+class _BundleSource:
+    """Sections of a book-N.lwb bundle, decoded one at a time"""
+
+    def __init__(self, path: Path):
+        from book_bundle import BookBundle
+        self.bundle = BookBundle(path)
+        self.metadata = self.bundle.manifest
+        self.mapped_bytes = path.stat().st_size
+
+    def section_numbers(self) -> List[int]:
+        return self.bundle.section_numbers()
+
+    def load(self, number: int) -> Optional[Dict]:
+        return self.bundle.section(number)
+
+    def close(self):
+        self.bundle.close()
+
+
+class BookStore:
+    """All extracted books behind one lazily-populated LRU section cache"""
+
+    def __init__(self, content_dir: str = 'extracted-content',
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 prefetch: bool = False, source: str = 'auto'):
+        if source not in SOURCES:
+            raise ValueError(f"source must be one of {SOURCES}")
+        self.content_dir = Path(content_dir)
+        self.memory_budget = memory_budget
+        self.prefetch = prefetch
+
+        self._sources: Dict[int, object] = {}
+        stems = {p.stem for p in book_files(self.content_dir, '.json')}
+        stems |= {p.stem for p in book_files(self.content_dir, '.lwb')}
+        for stem in sorted(stems, key=lambda stem: int(stem.split('-')[1])):
+            book_source = self._open_source(stem, source)
+            if book_source is None:
+                continue
+            book_number = book_source.metadata.get('book_number')
+            if book_number is None:
+                book_number = int(stem.split('-')[1])
+            self._sources[book_number] = book_source
+
+        # (book, section) -> (section data, approximate bytes)
+        self._cache: 'OrderedDict[Tuple[int, int], Tuple[Dict, int]]' = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self._prefetcher = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetched = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._prefetcher:
+            self._prefetcher.shutdown(wait=True)
+            self._prefetcher = None
+        for book_source in self._sources.values():
+            book_source.close()
+        self._sources = {}
+
+    def _open_source(self, stem: str, source: str):
+        json_path = self.content_dir / f"{stem}.json"
+        bundle_path = self.content_dir / f"{stem}.lwb"
+
+        use_bundle = bundle_path.exists() and source != 'json'
+        if use_bundle and source == 'auto' and json_path.exists():
+            # Ignore bundles older than the JSON they were converted from
+            use_bundle = bundle_path.stat().st_mtime >= json_path.stat().st_mtime
+
+        if use_bundle:
+            return _BundleSource(bundle_path)
+        if source != 'bundle' and json_path.exists():
+            return _JSONSource(json_path)
+        return None
+
+    def books(self) -> List[int]:
+        return sorted(self._sources)
+
+    def book_info(self, book_number: int) -> Dict:
+        """Book metadata (title, disciplines, equipment rules, ...) without sections"""
+        return self._sources[book_number].metadata
+
+    def section_numbers(self, book_number: int) -> List[int]:
+        return self._sources[book_number].section_numbers()
+
+    def section(self, book_number: int, section_number: int) -> Optional[Dict]:
+        """Return one section, decoding it on first request
+
+        With prefetch enabled, the targets of the section's choices are
+        decoded in the background so the next page turn is a cache hit.
+        """
+        key = (book_number, int(section_number))
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                section = entry[0]
+            else:
+                self.misses += 1
+
+        if entry is None:
+            section = self._materialize(key)
+
+        if section is not None and self._prefetcher:
+            targets = [c['target'] for c in section.get('choices', []) if c.get('target')]
+            if targets:
+                self._prefetcher.submit(self._prefetch, book_number, targets)
+
+        return section
+
+    def _materialize(self, key: Tuple[int, int]) -> Optional[Dict]:
+        source = self._sources.get(key[0])
+        if source is None:
+            return None
+        section = source.load(key[1])
+        if section is not None:
+            self._insert(key, section)
+        return section
+
+    def _prefetch(self, book_number: int, targets: List[int]):
+        for target in targets:
+            key = (book_number, target)
+            with self._lock:
+                if key in self._cache:
+                    continue
+            if self._materialize(key) is not None:
+                with self._lock:
+                    self.prefetched += 1
+
+    def _insert(self, key: Tuple[int, int], section: Dict):
+        size = _deep_sizeof(section)
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = (section, size)
+            self._cache_bytes += size
+            # Evict least recently used sections, always keeping the newest
+            while self._cache_bytes > self.memory_budget and len(self._cache) > 1:
+                _, (_, evicted_size) = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        """Cache counters and current memory use
+
+        cached_bytes counts decoded sections against the budget;
+        mapped_bytes is the size of the memory-mapped book files, which the
+        OS pages in and out and which is not part of the budget.
+        """
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'books': len(self._sources),
+                'mapped_bytes': sum(source.mapped_bytes for source in self._sources.values()),
+                'cached_sections': len(self._cache),
+                'cached_bytes': self._cache_bytes,
+                'memory_budget': self.memory_budget,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'evictions': self.evictions,
+                'prefetched': self.prefetched
+            }
+
+
+def simulate(store: BookStore, page_turns: int, seed: int = 0) -> Dict:
+    """Random playthroughs across all books; reports per-turn latency"""
+    import random
+
+    rng = random.Random(seed)
+    timings = []
+    books = store.books()
+    book = rng.choice(books)
+    current = 1
+
+    for _ in range(page_turns):
+        start = time.perf_counter()
+        section = store.section(book, current)
+        timings.append(time.perf_counter() - start)
+
+        targets = [c['target'] for c in (section or {}).get('choices', []) if c.get('target')]
+        if targets:
+            current = rng.choice(targets)
+        else:
+            # Ending reached: start a new playthrough in a random book
+            book, current = rng.choice(books), 1
+
+    timings.sort()
+    return {
+        'page_turns': page_turns,
+        'mean_us': 1e6 * sum(timings) / len(timings),
+        'p50_us': 1e6 * timings[len(timings) // 2],
+        'p99_us': 1e6 * timings[int(len(timings) * 0.99)]
+    }
+
+
+def main():
+    """Open the store and replay random page turns"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Lazy LRU reader over extracted books')
+    parser.add_argument('--content-dir', default='extracted-content',
+                        help='Directory of book-N.json files (default: extracted-content)')
+    parser.add_argument('--budget-kb', type=int, default=DEFAULT_MEMORY_BUDGET // 1024,
+                        help='Section cache memory budget in KB')
+    parser.add_argument('--prefetch', action='store_true',
+                        help='Prefetch choice targets in the background')
+    parser.add_argument('--source', choices=SOURCES, default='auto',
+                        help='Read book-N.lwb bundles, book-N.json, or bundles when up to date (default)')
+    parser.add_argument('--turns', type=int, default=10000,
+                        help='Random page turns to simulate (default: 10000)')
+    parser.add_argument('--section', nargs=2, type=int, metavar=('BOOK', 'SECTION'),
+                        help='Print one section and exit')
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = BookStore(args.content_dir, memory_budget=args.budget_kb * 1024,
+                      prefetch=args.prefetch, source=args.source)
+    open_ms = (time.perf_counter() - start) * 1000
+
+    with store:
+        if args.section:
+            section = store.section(*args.section)
+            print(json.dumps(section, indent=2, ensure_ascii=False) if section
+                  else f"❌ Section {args.section[1]} not found in book {args.section[0]}")
+            return
+
+        print(f"📚 Opened {len(store.books())} books in {open_ms:.1f}ms")
+        result = simulate(store, args.turns)
+        stats = store.stats()
+
+    print(f"\n⏱️  {result['page_turns']} page turns: mean {result['mean_us']:.1f}µs, "
+          f"p50 {result['p50_us']:.1f}µs, p99 {result['p99_us']:.1f}µs")
+    print(f"📊 Cache: {stats['hits']} hits, {stats['misses']} misses "
+          f"({stats['hit_rate']:.1%}), {stats['evictions']} evictions, "
+          f"{stats['prefetched']} prefetched")
+    print(f"  {stats['cached_sections']} sections, "
+          f"{stats['cached_bytes'] / 1024:.0f}KB / {stats['memory_budget'] / 1024:.0f}KB budget "
+          f"(plus {stats['mapped_bytes'] / 1024:.0f}KB of memory-mapped book files)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Streaming book formats for extracted Lone Wolf content
+Writes sections one at a time as newline-delimited JSON or as one file per
+section, so neither the extractor nor a reader holds the whole book.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+FORMATS = ('json', 'ndjson', 'shards', 'bundle')
+
+
+class NDJSONWriter:
+    """Writes a manifest line followed by one line per section
+
+    Line 1 is the book manifest (everything in book-N.json except
+    "sections"); every following line is one section object.
+    """
+
+    def __init__(self, output_path: Path):
+        self.output_path = Path(output_path)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.output_path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write_manifest(self, manifest: Dict):
+        self._write_line(manifest)
+
+    def write_section(self, section: Dict):
+        self._write_line(section)
+        self.count += 1
+
+    def _write_line(self, obj: Dict):
+        self.file.write(json.dumps(obj, ensure_ascii=False, separators=(',', ':')))
+        self.file.write('\n')
+        # Let readers tailing the file see each record as soon as it is written
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ShardWriter:
+    """Writes manifest.json plus sections/<number>.json under a book directory
+
+    The manifest is written up front so readers can start immediately, then
+    rewritten at the end with the section list and "complete": true.
+    """
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.sections_dir = self.output_dir / 'sections'
+        self.sections_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest: Dict = {}
+        self.section_numbers = []
+        self.count = 0
+
+    def write_manifest(self, manifest: Dict):
+        self.manifest = dict(manifest, complete=False)
+        self._write_manifest()
+
+    def write_section(self, section: Dict):
+        section_path = self.sections_dir / f"{section['section']}.json"
+        with open(section_path, 'w', encoding='utf-8') as f:
+            json.dump(section, f, indent=2, ensure_ascii=False)
+        self.section_numbers.append(section['section'])
+        self.count += 1
+
+    def _write_manifest(self):
+        tmp_path = self.output_dir / 'manifest.json.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        tmp_path.replace(self.output_dir / 'manifest.json')
+
+    def close(self):
+        self.manifest['sections'] = self.section_numbers
+        self.manifest['complete'] = True
+        self._write_manifest()
+
+
+def open_writer(output_format: str, output_path: Path):
+    """Create the section writer for a streaming output format"""
+    if output_format == 'ndjson':
+        return NDJSONWriter(output_path)
+    if output_format == 'shards':
+        return ShardWriter(output_path)
+    if output_format == 'bundle':
+        from book_bundle import BundleWriter
+        return BundleWriter(output_path)
+    raise ValueError(f"Not a streaming format: {output_format}")
+
+
+def default_output_path(output_format: str, book_number: int,
+                        output_dir: Path = Path('extracted-content')) -> Path:
+    """Default output location for a book in the given format"""
+    if output_format == 'ndjson':
+        return output_dir / f"book-{book_number}.ndjson"
+    if output_format == 'shards':
+        return output_dir / f"book-{book_number}"
+    if output_format == 'bundle':
+        return output_dir / f"book-{book_number}.lwb"
+    return output_dir / f"book-{book_number}.json"
+
+
+def book_files(content_dir: Path, suffix: str = '.json') -> List[Path]:
+    """book-N<suffix> files in content_dir, by book number
+
+    Skips side files such as book-N.graph.json that a plain
+    glob('book-*.json') would also match.
+    """
+    pattern = re.compile(rf"book-(\d+){re.escape(suffix)}$")
+    matches = []
+    for path in Path(content_dir).glob(f"book-*{suffix}"):
+        match = pattern.match(path.name)
+        if match:
+            matches.append((int(match.group(1)), path))
+    return [path for _, path in sorted(matches)]
+
+
+def iter_ndjson(path: Path) -> Tuple[Dict, Iterator[Dict]]:
+    """Return (manifest, section iterator) for an NDJSON book, reading lazily"""
+    f = open(path, 'r', encoding='utf-8')
+    first = f.readline()
+    if not first:
+        f.close()
+        raise ValueError(f"{path} is empty")
+    manifest = json.loads(first)
+
+    def sections() -> Iterator[Dict]:
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return manifest, sections()
+
+
+def iter_shards(book_dir: Path) -> Tuple[Dict, Iterator[Dict]]:
+    """Return (manifest, section iterator) for a sharded book directory"""
+    book_dir = Path(book_dir)
+    with open(book_dir / 'manifest.json', 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    numbers = manifest.get('sections') or sorted(
+        int(p.stem) for p in (book_dir / 'sections').glob('*.json'))
+
+    def sections() -> Iterator[Dict]:
+        for number in numbers:
+            with open(book_dir / 'sections' / f"{number}.json", 'r', encoding='utf-8') as f:
+                yield json.load(f)
+
+    manifest = {k: v for k, v in manifest.items() if k not in ('sections', 'complete')}
+    return manifest, sections()
+
+
+def load_book(path: Path) -> Dict:
+    """Load a book in any output format into the book-N.json structure"""
+    path = Path(path)
+    if path.is_dir():
+        manifest, sections = iter_shards(path)
+    elif path.suffix == '.ndjson':
+        manifest, sections = iter_ndjson(path)
+    elif path.suffix == '.lwb':
+        from book_bundle import BookBundle
+        with BookBundle(path) as bundle:
+            return bundle.to_dict()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    book = dict(manifest)
+    book['sections'] = {str(s['section']): s for s in sections}
+    return book
+
+
+def read_section(path: Path, section_number: int) -> Optional[Dict]:
+    """Read one section from a sharded book without touching the others"""
+    section_path = Path(path) / 'sections' / f"{section_number}.json"
+    if not section_path.exists():
+        return None
+    with open(section_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
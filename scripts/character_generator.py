@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Bulk starting-character generator for Lone Wolf books
+Rolls characters the way the books do: every roll is a pick from the
+book's own Random Number Table (COMBAT SKILL 10 + pick, ENDURANCE 20 +
+pick, Gold Crowns and Weaponskill from a pick), disciplines are a random
+loadout of five, and starting items come from the book's equipment
+rules. Characters are made in NumPy batches as columns whose fields match
+session_engine.Session. Each block of CHUNK characters has its own
+generator seeded from (seed, book, block), so character i of a seed comes
+out the same however many are made or how they are batched.
+"""
+
+import time
+from itertools import combinations
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from random_table import RandomNumberTable
+from route_solver import LOADOUT_SIZE, discipline_ids
+from session_engine import DEFAULT_CARRY_LIMITS, ITEM_TYPE_KINDS, MAX_ITEMS, Session, SessionEngine
+
+CHUNK = 1 << 16
+
+# The Weaponskill weapon list (weapons.png in discplnz.htm, transcribed in
+# planning-docs/CHARACTER_CREATION.md), indexed by random number
+WEAPONSKILL_WEAPONS = ('Dagger', 'Spear', 'Mace', 'Short Sword', 'Warhammer',
+                       'Sword', 'Axe', 'Sword', 'Quarterstaff', 'Broadsword')
+
+# Random Number Table picks per character: COMBAT SKILL, ENDURANCE, gold, item, Weaponskill
+PICKS = 5
+
+COLUMNS = {
+    'combat_skill': np.uint8,
+    'endurance': np.uint8,
+    'disciplines': np.uint16,
+    'weaponskill': np.int8,
+    'gold': np.uint8,
+    'meals': np.uint8,
+    'items': np.uint64
+}
+
+
+class CharacterGenerator:
+    """Vectorized character creation for one book
+
+    Item names are numbered in self.items; a character's items column is
+    a mask over them. Disciplines are a mask in the order of the
+    disciplines list (as in session_engine).
+    """
+
+    def __init__(self, book: Dict, disciplines: List[str]):
+        table = book.get('random_number_table')
+        if not table:
+            raise ValueError(f"Book {book.get('book_number')} has no Random Number Table (re-extract it)")
+        self.book_number = book.get('book_number')
+        self.table = RandomNumberTable.from_dict(table).array()
+        self.disciplines = disciplines
+        weaponskill = disciplines.index('weaponskill') if 'weaponskill' in disciplines else None
+        self.weaponskill_bit = 1 << weaponskill if weaponskill is not None else 0
+
+        equipment = book.get('equipment_rules') or {}
+        self.carry_limits = dict(DEFAULT_CARRY_LIMITS, **equipment.get('carry_limits', {}))
+        starting = equipment.get('starting_items', {})
+        self.items: List[str] = []
+        self.item_kinds: List[str] = []
+        self.item_bit: Dict[str, int] = {}
+
+        gold = starting.get('random_gold', {})
+        self.gold_base = gold.get('min', 0)
+
+        # Guaranteed items, folded into constants
+        base = self._effects(starting.get('guaranteed', []))
+        self.base_items, self.base_meals, self.base_gold, self.base_endurance, self.base_combat_skill = (
+            int(base['items'].sum()), int(base['meals'].sum()), int(base['gold'].sum()),
+            int(base['endurance'].sum()), int(base['combat_skill'].sum()))
+        self.weapon_room = self.carry_limits['weapons'] - int(base['weapon'].sum())
+
+        # Every loadout of LOADOUT_SIZE disciplines, as masks
+        self.loadouts = np.array([sum(1 << i for i in loadout) for loadout in
+                                  combinations(range(len(disciplines)), LOADOUT_SIZE)], dtype=np.uint16)
+
+        # The extra starting items: one per random number (book 1), or every
+        # selection of count items from a list that the carry limits allow
+        # (books 2-5), each equally likely
+        random_item = starting.get('random_item')
+        choose = starting.get('choose')
+        if random_item:
+            self.selections = self._effects([random_item.get(str(number), {}) for number in range(10)])
+            self.by_random_number = True
+        elif choose:
+            self.selections = self._selections(choose['items'], choose['count'])
+            self.by_random_number = False
+        else:
+            self.selections = None
+
+    def _item(self, name: str, kind: str) -> int:
+        bit = self.item_bit.get(name)
+        if bit is None:
+            if len(self.items) == MAX_ITEMS:
+                raise ValueError(f"Book {self.book_number} has more than {MAX_ITEMS} starting items")
+            bit = self.item_bit[name] = 1 << len(self.items)
+            self.items.append(name)
+            self.item_kinds.append(kind)
+        return bit
+
+    def _effects(self, items: List[Dict]) -> Dict[str, np.ndarray]:
+        """Per-item arrays: item bit, weapon flag, meals, gold and stat bonuses"""
+        effects = {key: np.zeros(len(items), dtype=np.int64)
+                   for key in ('weapon', 'meals', 'gold', 'endurance', 'combat_skill')}
+        effects['items'] = np.zeros(len(items), dtype=np.uint64)
+        for i, item in enumerate(items):
+            item_type = item.get('type')
+            if item_type == 'meal':
+                effects['meals'][i] = item.get('quantity', 1)
+            elif item_type == 'gold':
+                effects['gold'][i] = item.get('quantity', 0)
+            elif item.get('name'):
+                effects['items'][i] = self._item(item['name'], ITEM_TYPE_KINDS.get(item_type, 'backpack'))
+                effects['weapon'][i] = item_type == 'weapon'
+            effects['endurance'][i] = item.get('endurance_bonus', 0)
+            effects['combat_skill'][i] = item.get('combat_skill_bonus', 0)
+        return effects
+
+    def _selections(self, items: List[Dict], count: int) -> Dict[str, np.ndarray]:
+        """Summed effects of each largest selection of up to count items within the weapon limit"""
+        options = self._effects(items)
+        indices = range(len(items))
+        weapons = options['weapon']
+        for size in range(min(count, len(items)), 0, -1):
+            allowed = [list(c) for c in combinations(indices, size) if weapons[list(c)].sum() <= self.weapon_room]
+            if allowed:
+                break
+        else:
+            allowed = [[]]
+        selections = {key: np.array([values[c].sum() for c in allowed], dtype=values.dtype)
+                      for key, values in options.items() if key != 'items'}
+        # Item bits are distinct, so a selection's mask is the sum of its bits
+        selections['items'] = np.array([int(options['items'][c].sum()) for c in allowed], dtype=np.uint64)
+        return selections
+
+    def _chunk(self, seed: int, block: int) -> Dict[str, np.ndarray]:
+        """All CHUNK characters of a block"""
+        rng = np.random.default_rng([seed, self.book_number or 0, block])
+        picks = self.table[rng.integers(0, self.table.size, size=(CHUNK, PICKS), dtype=np.int32)]
+        disciplines = self.loadouts[rng.integers(0, len(self.loadouts), size=CHUNK, dtype=np.int32)]
+        combat_skill = 10 + self.base_combat_skill + picks[:, 0].astype(np.int64)
+        endurance = 20 + self.base_endurance + picks[:, 1].astype(np.int64)
+        gold = self.gold_base + self.base_gold + picks[:, 2].astype(np.int64)
+        meals = np.full(CHUNK, self.base_meals, dtype=np.int64)
+        items = np.full(CHUNK, self.base_items, dtype=np.uint64)
+
+        if self.selections is not None:
+            if self.by_random_number:
+                chosen = picks[:, 3]
+            else:
+                chosen = rng.integers(0, len(self.selections['items']), size=CHUNK, dtype=np.int32)
+            items |= self.selections['items'][chosen]
+            meals += self.selections['meals'][chosen]
+            gold += self.selections['gold'][chosen]
+            endurance += self.selections['endurance'][chosen]
+            combat_skill += self.selections['combat_skill'][chosen]
+
+        weaponskill = np.where(disciplines & self.weaponskill_bit, picks[:, 4].astype(np.int8), np.int8(-1))
+        return {
+            'combat_skill': combat_skill.astype(np.uint8),
+            'endurance': endurance.astype(np.uint8),
+            'disciplines': disciplines,
+            'weaponskill': weaponskill,
+            'gold': np.minimum(gold, self.carry_limits['gold_crowns']).astype(np.uint8),
+            'meals': np.minimum(meals, self.carry_limits['backpack_items']).astype(np.uint8),
+            'items': items
+        }
+
+    def generate(self, count: int, seed: int = 1, start: int = 0) -> Dict[str, np.ndarray]:
+        """Characters start .. start + count - 1 of seed, as COLUMNS arrays"""
+        columns = {name: np.empty(count, dtype=dtype) for name, dtype in COLUMNS.items()}
+        position = start
+        while position < start + count:
+            block, offset = divmod(position, CHUNK)
+            take = min(CHUNK - offset, start + count - position)
+            # Always the whole block, so a character does not depend on how many are drawn
+            chunk = self._chunk(seed, block)
+            for name in COLUMNS:
+                columns[name][position - start:position - start + take] = chunk[name][offset:offset + take]
+            position += take
+        return columns
+
+    def describe(self, characters: Dict[str, np.ndarray], i: int) -> Dict:
+        """One character as a readable dict"""
+        mask = int(characters['items'][i])
+        weaponskill = int(characters['weaponskill'][i])
+        return {
+            'combat_skill': int(characters['combat_skill'][i]),
+            'endurance': int(characters['endurance'][i]),
+            'disciplines': [d for bit, d in enumerate(self.disciplines) if characters['disciplines'][i] >> bit & 1],
+            'weaponskill': WEAPONSKILL_WEAPONS[weaponskill] if weaponskill >= 0 else None,
+            'gold': int(characters['gold'][i]),
+            'meals': int(characters['meals'][i]),
+            'items': [name for bit, name in enumerate(self.items) if mask >> bit & 1]
+        }
+
+    def sessions(self, engine: SessionEngine, characters: Dict[str, np.ndarray],
+                 limit: Optional[int] = None, start: int = 1) -> List[Session]:
+        """Session engine sessions for (the first limit) characters
+
+        engine must use the same disciplines list; items are registered
+        with the engine, so their bits follow its numbering.
+        """
+        if engine.disciplines != self.disciplines:
+            raise ValueError("Session engine and generator disciplines differ")
+        engine_bits = [engine._item(name, kind) for name, kind in zip(self.items, self.item_kinds)]
+        count = len(characters['combat_skill']) if limit is None else limit
+        sessions = []
+        for i in range(count):
+            mask = int(characters['items'][i])
+            items = 0
+            while mask:
+                low = mask & -mask
+                items |= engine_bits[low.bit_length() - 1]
+                mask ^= low
+            endurance = int(characters['endurance'][i])
+            sessions.append(Session(start, int(characters['combat_skill'][i]), endurance, endurance,
+                                    int(characters['disciplines'][i]), int(characters['gold'][i]),
+                                    int(characters['meals'][i]), items))
+        return sessions
+
+
+def population_stats(generator: CharacterGenerator, characters: Dict[str, np.ndarray]) -> Dict:
+    """Means and frequencies of a generated population"""
+    count = len(characters['combat_skill'])
+    item_counts = [int(np.count_nonzero(characters['items'] >> np.uint64(bit) & np.uint64(1)))
+                   for bit in range(len(generator.items))]
+    return {
+        'characters': count,
+        'combat_skill_mean': float(characters['combat_skill'].mean()),
+        'endurance_mean': float(characters['endurance'].mean()),
+        'gold_mean': float(characters['gold'].mean()),
+        'weaponskill_share': float(np.count_nonzero(characters['weaponskill'] >= 0)) / count,
+        'items': {name: item_counts[bit] / count for bit, name in enumerate(generator.items)}
+    }
+
+
+def main():
+    """Generate seeded starting-character populations and report throughput"""
+    import argparse
+    import hashlib
+    from pathlib import Path
+    from book_stream import book_files, load_book
+
+    parser = argparse.ArgumentParser(description='Bulk Lone Wolf starting-character generator')
+    parser.add_argument('books', nargs='*', help='Book files (default: extracted-content/book-N.json)')
+    parser.add_argument('--rules', help='Rule file for discipline ids (default: rules/kai.json)')
+    parser.add_argument('--count', type=int, default=1_000_000, help='Characters per book (default: 1000000)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    parser.add_argument('--show', type=int, default=3, help='Characters to print per book (default: 3)')
+    parser.add_argument('-o', '--output', help='Save each population as OUTPUT-book-N.npz')
+
+    args = parser.parse_args()
+    paths = [Path(p) for p in args.books] or book_files(Path('extracted-content'))
+    disciplines = discipline_ids(args.rules)
+
+    for path in paths:
+        book = load_book(path)
+        try:
+            generator = CharacterGenerator(book, disciplines)
+        except ValueError as e:
+            print(f"❌ {path}: {e}")
+            continue
+
+        start = time.perf_counter()
+        characters = generator.generate(args.count, args.seed)
+        elapsed = time.perf_counter() - start
+        digest = hashlib.sha256(b''.join(characters[name].tobytes() for name in COLUMNS)).hexdigest()
+        stats = population_stats(generator, characters)
+
+        print(f"\n📖 Book {book.get('book_number')}: {book.get('title')}")
+        print(f"  ⏱️  {args.count:,} characters in {elapsed:.2f}s: {args.count / elapsed:,.0f}/sec "
+              f"(seed {args.seed}, sha256 {digest[:12]})")
+        print(f"  📊 Mean COMBAT SKILL {stats['combat_skill_mean']:.2f}, ENDURANCE {stats['endurance_mean']:.2f}, "
+              f"Gold Crowns {stats['gold_mean']:.2f}; Weaponskill {stats['weaponskill_share']:.0%}")
+        print(f"  🎒 " + ', '.join(f"{name} {share:.0%}" for name, share in stats['items'].items()))
+        for i in range(min(args.show, args.count)):
+            print(f"  #{i}: {generator.describe(characters, i)}")
+
+        if args.output:
+            output = Path(f"{args.output}-book-{book.get('book_number')}.npz")
+            np.savez(output, items=np.array(generator.items), disciplines=np.array(disciplines), **characters)
+            print(f"  ✅ Saved to: {output}")
+
+
+if __name__ == '__main__':
+    main()
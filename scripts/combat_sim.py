@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo combat odds for extracted Lone Wolf encounters
+Fights every combat block against a grid of player COMBAT SKILL / ENDURANCE
+values, stepping thousands of fights per NumPy operation, and reports win
+probability, expected ENDURANCE loss and the distribution of round counts.
+Rounds are resolved against each book's extracted Combat Results Table
+(see combat_table.py), with the encounter's COMBAT SKILL modifiers applied
+round by round and any per-round ENDURANCE loss from the section. Results are cached per encounter in .combat-cache/.
+"""
+
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from combat_table import MAX_RATIO, MIN_RATIO, CombatResultsTable
+
+# Bump whenever simulation logic changes so cached results are discarded
+SIM_VERSION = '2'
+
+DEFAULT_CACHE_DIR = '.combat-cache'
+
+# Fights still running after this many rounds count as not won
+MAX_ROUNDS = 100
+
+# Starting characters roll 10 + (0-9) COMBAT SKILL and 20 + (0-9) ENDURANCE
+DEFAULT_CS_GRID = list(range(10, 20))
+DEFAULT_EP_GRID = list(range(20, 30))
+
+
+def applies(modifier: Dict, disciplines: Iterable[str] = ()) -> bool:
+    """Whether an extracted modifier holds for a character with these Kai Disciplines
+
+    Modifiers whose condition is left as text (an item, a Meal, a random
+    number) are treated as not holding.
+    """
+    return 'condition' not in modifier and modifier.get('unless') not in disciplines
+
+
+def cs_schedule(combat: Dict, disciplines: Iterable[str] = ()) -> Tuple[int, ...]:
+    """COMBAT SKILL modifier in each round of an extracted combat block
+
+    The last value holds for every later round: a whole-fight -2 is (-2,),
+    "+2 in the first round, -2 after" is (2, -2).
+    """
+    disciplines = set(disciplines)
+    modifiers = [m for m in combat.get('modifiers', []) if applies(m, disciplines)]
+    spans = []
+    length = 1
+    for modifier in modifiers:
+        first, last = modifier.get('rounds') or (1, None)
+        spans.append((first, last, modifier['value']))
+        length = max(length, first, last + 1 if last else 1)
+    schedule = [sum(value for first, last, value in spans if first <= number and (last is None or number <= last))
+                for number in range(1, length + 1)]
+    while len(schedule) > 1 and schedule[-1] == schedule[-2]:
+        schedule.pop()
+    return tuple(schedule)
+
+
+def endurance_per_round(section: Dict, disciplines: Iterable[str] = ()) -> int:
+    """ENDURANCE Lone Wolf loses every round of a section's fight besides the table's result"""
+    disciplines = set(disciplines)
+    return -sum(change['value'] for change in section.get('endurance_changes', [])
+                if change.get('every_round') and applies(change, disciplines))
+
+
+def simulate_fights(ratio: np.ndarray, player_ep: np.ndarray, enemy_ep: int,
+                    rng: np.random.Generator, table: CombatResultsTable,
+                    max_rounds: int = MAX_ROUNDS, schedule: Sequence[int] = (0,),
+                    drain: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Fight one combat per array element to the end
+
+    Each round draws a random number for every fight still running and
+    looks up its table cell in one step; finished fights are dropped from
+    the working arrays. schedule is added to the ratio round by round (see
+    cs_schedule) and Lone Wolf loses drain more ENDURANCE every round.
+    Returns (final player EP, final enemy EP, rounds).
+    """
+    enemy_loss, player_loss = table.arrays()
+    count = len(player_ep)
+    final_player = np.asarray(player_ep, dtype=np.int32).copy()
+    final_enemy = np.full(count, enemy_ep, dtype=np.int32)
+    rounds = np.full(count, max_rounds, dtype=np.int32)
+
+    index = np.arange(count)
+    ratio = np.asarray(ratio, dtype=np.int32)
+    schedule = tuple(schedule) or (0,)
+    base = (np.clip(ratio + schedule[0], MIN_RATIO, MAX_RATIO) - MIN_RATIO) * 10
+    player = final_player.copy()
+    enemy = final_enemy.copy()
+
+    for round_number in range(1, max_rounds + 1):
+        if 1 < round_number <= len(schedule):
+            base = (np.clip(ratio + schedule[round_number - 1], MIN_RATIO, MAX_RATIO) - MIN_RATIO) * 10
+        cell = base + rng.integers(0, 10, size=len(index), dtype=np.int32)
+        enemy -= enemy_loss[cell]
+        player -= player_loss[cell] + drain
+
+        done = (enemy <= 0) | (player <= 0)
+        if done.any():
+            finished = index[done]
+            final_player[finished] = player[done]
+            final_enemy[finished] = enemy[done]
+            rounds[finished] = round_number
+            running = ~done
+            index, base, ratio = index[running], base[running], ratio[running]
+            player, enemy = player[running], enemy[running]
+            if not len(index):
+                break
+
+    # Fights cut off at max_rounds keep their last state
+    final_player[index] = player
+    final_enemy[index] = enemy
+    return final_player, final_enemy, rounds
+
+
+def simulate_encounter(enemy_cs: int, enemy_ep: int, schedule: Sequence[int] = (0,),
+                       table: Optional[CombatResultsTable] = None,
+                       cs_grid: List[int] = DEFAULT_CS_GRID,
+                       ep_grid: List[int] = DEFAULT_EP_GRID,
+                       trials: int = 10000, seed: int = 0,
+                       batch_size: int = 1 << 20, drain: int = 0) -> Dict:
+    """Odds for one enemy across the player CS x EP grid
+
+    schedule and drain are the per-round COMBAT SKILL modifiers and extra
+    ENDURANCE loss (see simulate_fights).
+    Values are nested [cs][ep] lists. Lone Wolf loses when his ENDURANCE
+    reaches zero, even if the enemy dies in the same round.
+    """
+    table = table or CombatResultsTable.kai()
+    rng = np.random.default_rng(seed)
+    cells = [(cs, ep) for cs in cs_grid for ep in ep_grid]
+    cells_per_batch = max(1, batch_size // trials)
+
+    wins = np.zeros(len(cells))
+    loss = np.zeros(len(cells))
+    mean_rounds = np.zeros(len(cells))
+    histograms = np.zeros((len(cells), MAX_ROUNDS + 1), dtype=np.int64)
+
+    for start in range(0, len(cells), cells_per_batch):
+        batch = cells[start:start + cells_per_batch]
+        cell_cs = np.repeat([cs for cs, _ in batch], trials)
+        cell_ep = np.repeat([ep for _, ep in batch], trials)
+        player, enemy, rounds = simulate_fights(cell_cs - enemy_cs, cell_ep, enemy_ep, rng, table,
+                                                schedule=schedule, drain=drain)
+
+        shape = (len(batch), trials)
+        won = ((enemy <= 0) & (player > 0)).reshape(shape)
+        lost_ep = (cell_ep - np.maximum(player, 0)).reshape(shape)
+        rounds = rounds.reshape(shape)
+
+        end = start + len(batch)
+        wins[start:end] = won.mean(axis=1)
+        loss[start:end] = lost_ep.mean(axis=1)
+        mean_rounds[start:end] = rounds.mean(axis=1)
+        offsets = np.arange(len(batch))[:, None] * (MAX_ROUNDS + 1)
+        histograms[start:end] = np.bincount((rounds + offsets).ravel(),
+                                            minlength=len(batch) * (MAX_ROUNDS + 1)
+                                            ).reshape(len(batch), MAX_ROUNDS + 1)
+
+    # Trim the histogram to the longest fight seen (index = round count)
+    longest = int(np.flatnonzero(histograms.any(axis=0)).max())
+    grid = (len(cs_grid), len(ep_grid))
+    return {
+        'win_probability': np.round(wins, 4).reshape(grid).tolist(),
+        'expected_endurance_loss': np.round(loss, 3).reshape(grid).tolist(),
+        'mean_rounds': np.round(mean_rounds, 3).reshape(grid).tolist(),
+        'round_histogram': histograms[:, 1:longest + 1].reshape(*grid, longest).tolist()
+    }
+
+
+def naive_fight(player_cs: int, player_ep: int, enemy_cs: int, enemy_ep: int,
+                rng: random.Random, table: CombatResultsTable,
+                max_rounds: int = MAX_ROUNDS) -> Tuple[int, int, int]:
+    """One combat, round by round in plain Python (benchmark reference)"""
+    ratio = player_cs - enemy_cs
+    for round_number in range(1, max_rounds + 1):
+        result = table.resolve(ratio, rng.randrange(10))
+        enemy_ep = 0 if result.enemy_killed else enemy_ep - result.enemy_loss
+        player_ep = 0 if result.lone_wolf_killed else player_ep - result.lone_wolf_loss
+        if enemy_ep <= 0 or player_ep <= 0:
+            return player_ep, enemy_ep, round_number
+    return player_ep, enemy_ep, max_rounds
+
+
+class CombatCache:
+    """Persistent simulation results keyed by encounter and settings"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_file = Path(cache_dir) / 'encounters.json'
+        self.entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get('sim_version') == SIM_VERSION:
+                self.entries = data.get('entries', {})
+
+    @staticmethod
+    def key(**settings) -> str:
+        encoded = json.dumps(dict(settings, sim_version=SIM_VERSION), sort_keys=True)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Dict):
+        self.entries[key] = value
+
+    def save(self):
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'sim_version': SIM_VERSION, 'entries': self.entries},
+                      f, separators=(',', ':'))
+        tmp_file.replace(self.cache_file)
+
+
+def iter_encounters(content_dir: Path) -> Iterator[Tuple[CombatResultsTable, Dict]]:
+    """Every combat block in the extracted books, with book and section
+
+    Yields (table, encounter); the table is the book's extracted Combat
+    Results Table, or the Kai table for books extracted without one. The
+    encounter carries its section's endurance_changes.
+    """
+    from book_stream import book_files, load_book
+
+    for path in book_files(content_dir):
+        book = load_book(path)
+        table_data = book.get('combat_results_table')
+        table = CombatResultsTable.from_dict(table_data) if table_data else CombatResultsTable.kai()
+        for section in book['sections'].values():
+            combat = section.get('combat')
+            if combat:
+                yield table, dict(combat, book=book['book_number'], section=section['section'],
+                                  endurance_changes=section.get('endurance_changes', []))
+
+
+def simulate_all(content_dir: Path, cs_grid: List[int] = DEFAULT_CS_GRID,
+                 ep_grid: List[int] = DEFAULT_EP_GRID, trials: int = 10000,
+                 seed: int = 0, use_modifiers: bool = True,
+                 cache: Optional[CombatCache] = None, disciplines: Iterable[str] = ()) -> List[Dict]:
+    """Odds for every encounter in content_dir
+
+    Modifiers are applied for a character with the given Kai Disciplines
+    (by default none, so e.g. every Mindshield penalty applies).
+    Identical enemies (same CS, EP and modifiers) share one cached result,
+    and each result's random stream is seeded from its cache key so it does
+    not depend on which encounters ran before it.
+    """
+    results = []
+    for table, encounter in iter_encounters(content_dir):
+        schedule = cs_schedule(encounter, disciplines) if use_modifiers else (0,)
+        drain = endurance_per_round(encounter, disciplines) if use_modifiers else 0
+        key = CombatCache.key(enemy_cs=encounter['combat_skill'], enemy_ep=encounter['endurance'],
+                              schedule=schedule, drain=drain, cs_grid=cs_grid, ep_grid=ep_grid,
+                              trials=trials, seed=seed, max_rounds=MAX_ROUNDS, table=table.digest)
+        odds = cache.get(key) if cache else None
+        if odds is None:
+            odds = simulate_encounter(encounter['combat_skill'], encounter['endurance'], schedule,
+                                      table, cs_grid, ep_grid, trials, seed=int(key[:16], 16), drain=drain)
+            if cache:
+                cache.put(key, odds)
+
+        results.append({
+            'book': encounter['book'],
+            'section': encounter['section'],
+            'enemy_name': encounter['enemy_name'],
+            'combat_skill': encounter['combat_skill'],
+            'endurance': encounter['endurance'],
+            'cs_modifiers': list(schedule),
+            'endurance_per_round': drain,
+            **odds
+        })
+    return results
+
+
+def benchmark(trials: int = 200000, enemy_cs: int = 16, enemy_ep: int = 24,
+              player_cs: int = 15, player_ep: int = 25) -> Dict:
+    """Fights/sec and rounds/sec of the vectorized simulator vs. a Python loop"""
+    table = CombatResultsTable.kai()
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    _, _, rounds = simulate_fights(np.full(trials, player_cs - enemy_cs),
+                                   np.full(trials, player_ep), enemy_ep, rng, table)
+    vector_seconds = time.perf_counter() - start
+    vector_rounds = int(rounds.sum())
+
+    naive_trials = max(1, trials // 20)
+    py_rng = random.Random(0)
+    naive_rounds = 0
+    start = time.perf_counter()
+    for _ in range(naive_trials):
+        naive_rounds += naive_fight(player_cs, player_ep, enemy_cs, enemy_ep, py_rng, table)[2]
+    naive_seconds = time.perf_counter() - start
+
+    results = {
+        'vector_fights_per_sec': trials / vector_seconds,
+        'vector_rounds_per_sec': vector_rounds / vector_seconds,
+        'naive_fights_per_sec': naive_trials / naive_seconds,
+        'naive_rounds_per_sec': naive_rounds / naive_seconds
+    }
+    results['speedup'] = results['vector_fights_per_sec'] / results['naive_fights_per_sec']
+
+    print(f"\n⏱️  Combat simulation benchmark (CS {player_cs}/EP {player_ep} vs "
+          f"CS {enemy_cs}/EP {enemy_ep})")
+    print(f"  NumPy:  {trials:>8} fights  {results['vector_fights_per_sec']:>12,.0f} fights/s  "
+          f"{results['vector_rounds_per_sec']:>12,.0f} rounds/s")
+    print(f"  Python: {naive_trials:>8} fights  {results['naive_fights_per_sec']:>12,.0f} fights/s  "
+          f"{results['naive_rounds_per_sec']:>12,.0f} rounds/s")
+    print(f"  Speedup: {results['speedup']:.1f}x")
+    return results
+
+
+def main():
+    """Simulate combat odds for every extracted encounter"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Monte Carlo combat odds for extracted encounters')
+    parser.add_argument('--content-dir', default='extracted-content',
+                        help='Directory with book-N.json files (default: extracted-content)')
+    parser.add_argument('-o', '--output', help='Write all results to this JSON file')
+    parser.add_argument('--trials', type=int, default=10000,
+                        help='Fights per grid cell (default: 10000)')
+    parser.add_argument('--cs', type=int, nargs=2, default=[10, 19], metavar=('MIN', 'MAX'),
+                        help='Player COMBAT SKILL range (default: 10 19)')
+    parser.add_argument('--ep', type=int, nargs=2, default=[20, 29], metavar=('MIN', 'MAX'),
+                        help='Player ENDURANCE range (default: 20 29)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--no-modifiers', action='store_true',
+                        help='Ignore extracted COMBAT SKILL modifiers and per-round ENDURANCE losses')
+    parser.add_argument('--discipline', action='append', default=[], metavar='ID',
+                        help='Kai Discipline the player has, cancelling modifiers "unless" it (repeatable)')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'Result cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the cache')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Compare the NumPy simulator with a per-round Python loop and exit')
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    cs_grid = list(range(args.cs[0], args.cs[1] + 1))
+    ep_grid = list(range(args.ep[0], args.ep[1] + 1))
+    cache = None if args.no_cache else CombatCache(args.cache_dir)
+
+    start = time.perf_counter()
+    results = simulate_all(Path(args.content_dir), cs_grid, ep_grid, args.trials,
+                           args.seed, not args.no_modifiers, cache, args.discipline)
+    elapsed = time.perf_counter() - start
+    if cache:
+        cache.save()
+
+    # Report the hardest fights for an average starting character
+    mid_cs, mid_ep = len(cs_grid) // 2, len(ep_grid) // 2
+    print(f"\n⚔️  {len(results)} encounters, {len(cs_grid)}x{len(ep_grid)} grid, "
+          f"{args.trials} trials per cell in {elapsed:.2f}s")
+    if cache:
+        print(f"  💾 Cache: {cache.hits} hits, {cache.misses} misses")
+    print(f"\n💀 Hardest encounters for CS {cs_grid[mid_cs]} / EP {ep_grid[mid_ep]}:")
+    hardest = sorted(results, key=lambda r: r['win_probability'][mid_cs][mid_ep])[:10]
+    for r in hardest:
+        print(f"  Book {r['book']} §{r['section']:<4} {r['enemy_name']:<28} "
+              f"CS {r['combat_skill']:>2}{'/'.join(f'{m:+d}' for m in r['cs_modifiers'])} EP {r['endurance']:>2}  "
+              f"win {r['win_probability'][mid_cs][mid_ep]:.1%}  "
+              f"-{r['expected_endurance_loss'][mid_cs][mid_ep]:.1f} EP  "
+              f"{r['mean_rounds'][mid_cs][mid_ep]:.1f} rounds")
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({'player_cs': cs_grid, 'player_ep': ep_grid, 'trials': args.trials,
+                       'encounters': results}, f, ensure_ascii=False, separators=(',', ':'))
+        print(f"\n✅ Saved to: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
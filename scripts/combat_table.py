@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Combat Results Table for Lone Wolf books
+crtable.htm shows the table only as two images (crtneg.png for negative
+combat ratios, crtpos.png for zero and positive), so the extractor
+identifies them by checksum against a transcription and expands it into a
+dense lookup: one column per combat ratio from -11 to +11 (ratios beyond
+are clamped) by random number 0-9. Resolving a round is then a single
+index calculation instead of a search through ratio brackets.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, NamedTuple, Optional
+
+MIN_RATIO = -11
+MAX_RATIO = 11
+
+# Loss value standing in for "K" (automatically killed) in numeric arrays
+KILL = 999
+
+# Transcription of the Kai table (crtneg.png / crtpos.png, identical in
+# books 1-5). Columns are combat ratio brackets, given by their upper
+# bound; each row is a random number and lists (enemy loss, Lone Wolf
+# loss) per bracket, with None for "K".
+K = None
+KAI_BRACKET_MAX = [-11, -9, -7, -5, -3, -1, 0, 2, 4, 6, 8, 10, MAX_RATIO]
+KAI_ROWS = {
+    1: [(0, K), (0, K), (0, 8), (0, 6), (1, 6), (2, 5), (3, 5), (4, 5), (5, 4), (6, 4), (7, 4), (8, 3), (9, 3)],
+    2: [(0, K), (0, 8), (0, 7), (1, 6), (2, 5), (3, 5), (4, 4), (5, 4), (6, 3), (7, 3), (8, 3), (9, 3), (10, 2)],
+    3: [(0, 8), (0, 7), (1, 6), (2, 5), (3, 5), (4, 4), (5, 4), (6, 3), (7, 3), (8, 3), (9, 2), (10, 2), (11, 2)],
+    4: [(0, 8), (1, 7), (2, 6), (3, 5), (4, 4), (5, 4), (6, 3), (7, 3), (8, 2), (9, 2), (10, 2), (11, 2), (12, 2)],
+    5: [(1, 7), (2, 6), (3, 5), (4, 4), (5, 4), (6, 3), (7, 2), (8, 2), (9, 2), (10, 2), (11, 2), (12, 2), (14, 1)],
+    6: [(2, 6), (3, 6), (4, 5), (5, 4), (6, 3), (7, 2), (8, 2), (9, 2), (10, 2), (11, 1), (12, 1), (14, 1), (16, 1)],
+    7: [(3, 5), (4, 5), (5, 4), (6, 3), (7, 2), (8, 2), (9, 1), (10, 1), (11, 1), (12, 0), (14, 0), (16, 0), (18, 0)],
+    8: [(4, 4), (5, 4), (6, 3), (7, 2), (8, 1), (9, 1), (10, 0), (11, 0), (12, 0), (14, 0), (16, 0), (18, 0), (K, 0)],
+    9: [(5, 3), (6, 3), (7, 2), (8, 0), (9, 0), (10, 0), (11, 0), (12, 0), (14, 0), (16, 0), (18, 0), (K, 0), (K, 0)],
+    0: [(6, 0), (7, 0), (8, 0), (9, 0), (10, 0), (11, 0), (12, 0), (14, 0), (16, 0), (18, 0), (K, 0), (K, 0), (K, 0)]
+}
+del K
+
+# sha256 of (crtneg.png, crtpos.png) -> transcription
+KNOWN_TABLES = {
+    ('1837e2c00bef7c7b77045523f0b388d2fde842b1e63ae4d957128c2e91bc8c14',
+     'df82990c7d3e8021edf0100063aa133de5f7ab19694b464a7e3f965798cecfae'): (KAI_BRACKET_MAX, KAI_ROWS)
+}
+
+
+class CombatResult(NamedTuple):
+    """One round's outcome; a killed side's loss is reported as 0"""
+    enemy_loss: int
+    lone_wolf_loss: int
+    enemy_killed: bool
+    lone_wolf_killed: bool
+
+
+class CombatResultsTable:
+    """Dense (clamped combat ratio, random number) -> CombatResult lookup
+
+    enemy_loss / lone_wolf_loss are [ratio - MIN_RATIO][random number]
+    lists with None meaning killed, which is also the JSON layout.
+    """
+
+    def __init__(self, enemy_loss: List[List[Optional[int]]],
+                 lone_wolf_loss: List[List[Optional[int]]], source: Optional[List[str]] = None):
+        self.enemy_loss = enemy_loss
+        self.lone_wolf_loss = lone_wolf_loss
+        self.source = source or []
+        self._results = tuple(
+            CombatResult(e or 0, lw or 0, e is None, lw is None)
+            for e_column, lw_column in zip(enemy_loss, lone_wolf_loss)
+            for e, lw in zip(e_column, lw_column))
+        self._arrays = None
+
+    @classmethod
+    def from_brackets(cls, bracket_max: List[int], rows: Dict[int, List],
+                      source: Optional[List[str]] = None) -> 'CombatResultsTable':
+        """Expand a bracketed transcription into one column per ratio"""
+        enemy_loss, lone_wolf_loss = [], []
+        bracket = 0
+        for ratio in range(MIN_RATIO, MAX_RATIO + 1):
+            while ratio > bracket_max[bracket]:
+                bracket += 1
+            enemy_loss.append([rows[rn][bracket][0] for rn in range(10)])
+            lone_wolf_loss.append([rows[rn][bracket][1] for rn in range(10)])
+        return cls(enemy_loss, lone_wolf_loss, source)
+
+    @classmethod
+    def kai(cls) -> 'CombatResultsTable':
+        """The Kai series table (books 1-5)"""
+        return cls.from_brackets(KAI_BRACKET_MAX, KAI_ROWS)
+
+    @staticmethod
+    def index(ratio: int, random_number: int) -> int:
+        """Flat position of a (combat ratio, random number) cell"""
+        return (min(max(ratio, MIN_RATIO), MAX_RATIO) - MIN_RATIO) * 10 + random_number
+
+    def resolve(self, ratio: int, random_number: int) -> CombatResult:
+        """Outcome of one round at a combat ratio and random number (0-9)"""
+        return self._results[self.index(ratio, random_number)]
+
+    def arrays(self):
+        """Flat NumPy (enemy loss, Lone Wolf loss) arrays, KILL for "K"
+
+        Index with (clip(ratio, MIN_RATIO, MAX_RATIO) - MIN_RATIO) * 10 + random number.
+        """
+        if self._arrays is None:
+            import numpy as np
+            enemy = [KILL if r.enemy_killed else r.enemy_loss for r in self._results]
+            lone_wolf = [KILL if r.lone_wolf_killed else r.lone_wolf_loss for r in self._results]
+            self._arrays = (np.array(enemy, dtype=np.int32), np.array(lone_wolf, dtype=np.int32))
+        return self._arrays
+
+    @property
+    def digest(self) -> str:
+        """Content hash of the table values"""
+        encoded = json.dumps([self.enemy_loss, self.lone_wolf_loss], separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def to_dict(self) -> Dict:
+        return {
+            'source': self.source,
+            'min_ratio': MIN_RATIO,
+            'max_ratio': MAX_RATIO,
+            'enemy_loss': self.enemy_loss,
+            'lone_wolf_loss': self.lone_wolf_loss
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CombatResultsTable':
+        if (data.get('min_ratio'), data.get('max_ratio')) != (MIN_RATIO, MAX_RATIO):
+            raise ValueError(f"Unsupported combat ratio range: {data.get('min_ratio')}..{data.get('max_ratio')}")
+        return cls(data['enemy_loss'], data['lone_wolf_loss'], data.get('source'))
+
+
+def extract_combat_results_table(book_path) -> Optional[CombatResultsTable]:
+    """Read crtable.htm and match its table images to a known transcription
+
+    book_path is a book directory, an archive or a book_source source.
+    Returns None (with a warning) if the page or its images are missing or
+    the images are not ones the table has been transcribed from.
+    """
+    from bs4 import BeautifulSoup
+    from book_source import open_book
+
+    book = open_book(book_path)
+    table_file = book.file('crtable.htm')
+    if table_file is None:
+        print(f"Warning: crtable.htm not found in {book.path}")
+        return None
+
+    soup = BeautifulSoup(table_file.read_text(encoding='utf-8'), 'html.parser')
+    maintext = soup.find('div', class_='maintext') or soup
+    images = [img.get('src', '') for img in maintext.find_all('img')]
+
+    digests = []
+    for image in images:
+        image_file = book.file(image)
+        if image_file is None:
+            print(f"Warning: {image} not found in {book.path}")
+            return None
+        digests.append(hashlib.sha256(image_file.read_bytes()).hexdigest())
+
+    transcription = KNOWN_TABLES.get(tuple(digests))
+    if transcription is None:
+        print(f"Warning: no transcription for Combat Results Table images {images}")
+        return None
+    return CombatResultsTable.from_brackets(*transcription, source=images)
+
+
+def main():
+    """Print the dense table for a book, or resolve one round"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Lone Wolf Combat Results Table')
+    parser.add_argument('book_path', nargs='?', help='Path to book directory (default: built-in Kai table)')
+    parser.add_argument('--ratio', type=int, help='Combat ratio to resolve')
+    parser.add_argument('--random', type=int, choices=range(10), help='Random number to resolve')
+
+    args = parser.parse_args()
+    table = extract_combat_results_table(args.book_path) if args.book_path else CombatResultsTable.kai()
+    if table is None:
+        return
+
+    if args.ratio is not None and args.random is not None:
+        print(table.resolve(args.ratio, args.random))
+        return
+
+    def cell(e, lw):
+        return f"{'K' if e is None else e}/{'K' if lw is None else lw}"
+
+    print("ratio " + ''.join(f"{rn:>6}" for rn in range(10)))
+    for i, ratio in enumerate(range(MIN_RATIO, MAX_RATIO + 1)):
+        cells = ''.join(f"{cell(e, lw):>6}" for e, lw in zip(table.enemy_loss[i], table.lone_wolf_loss[i]))
+        print(f"{ratio:>+5} {cells}")
+
+
+if __name__ == '__main__':
+    main()
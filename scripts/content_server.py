@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Content server for extracted Lone Wolf books
+A small asyncio HTTP/1.1 server (standard library only) for the content
+endpoint of the hybrid storage plan in planning-docs/CONTENT_STORAGE.md:
+
+    GET /books                       book list with each book's ETag
+    GET /books/{n}                   whole book
+    GET /books/{n}/sections/{id}     one section
+
+Every response body is encoded, gzipped and given a strong ETag once at
+startup, so serving a request is a dictionary lookup and a socket write;
+If-None-Match is answered with 304 from the same table. A bundled load
+generator reports requests/sec and latency percentiles.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+
+# Bodies smaller than this are not worth compressing
+MIN_GZIP_BYTES = 256
+
+SERVER_NAME = 'lone-wolf-content'
+
+
+class Resource:
+    """Precomputed responses for one URL: identity and gzip 200s and their 304s"""
+
+    __slots__ = ('etag', 'gzip_etag', 'ok', 'ok_gzip', 'not_modified', 'not_modified_gzip',
+                 'body', 'gzip_body')
+
+    def __init__(self, data):
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.body = body
+        self.etag = f'"{digest}"'
+        self.ok = _head(200, 'OK', self.etag, len(body))
+        self.not_modified = _head(304, 'Not Modified', self.etag)
+
+        # gzip bytes differ from the identity bytes, so they get their own strong ETag
+        self.gzip_body = None
+        self.gzip_etag = self.ok_gzip = self.not_modified_gzip = None
+        if len(body) >= MIN_GZIP_BYTES:
+            self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+            self.gzip_etag = f'"{digest}-gz"'
+            self.ok_gzip = _head(200, 'OK', self.gzip_etag, len(self.gzip_body), gzipped=True)
+            self.not_modified_gzip = _head(304, 'Not Modified', self.gzip_etag, gzipped=True)
+
+    def matches(self, if_none_match: str) -> bool:
+        """If-None-Match check (weak comparison, as RFC 9110 asks for)"""
+        if if_none_match.strip() == '*':
+            return True
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return self.etag in tags or (self.gzip_etag is not None and self.gzip_etag in tags)
+
+
+def _head(status: int, reason: str, etag: Optional[str] = None, length: int = 0,
+          gzipped: bool = False, content_type: str = 'application/json; charset=utf-8') -> bytes:
+    """Status line and headers, without the blank line (Connection may follow)"""
+    lines = [f"HTTP/1.1 {status} {reason}", f"Server: {SERVER_NAME}"]
+    if status != 304:
+        lines += [f"Content-Type: {content_type}", f"Content-Length: {length}"]
+    if etag:
+        lines += [f"ETag: {etag}", "Cache-Control: no-cache", "Vary: Accept-Encoding"]
+    if gzipped and status != 304:
+        lines.append("Content-Encoding: gzip")
+    return ('\r\n'.join(lines) + '\r\n').encode('latin-1')
+
+
+def _error(status: int, reason: str) -> Tuple[bytes, bytes]:
+    body = json.dumps({'error': reason}).encode('utf-8')
+    return _head(status, reason, length=len(body)), body
+
+
+NOT_FOUND = _error(404, 'Not Found')
+METHOD_NOT_ALLOWED = _error(405, 'Method Not Allowed')
+BAD_REQUEST = _error(400, 'Bad Request')
+
+
+class ContentServer:
+    """Extracted books held as precomputed responses, keyed by path"""
+
+    def __init__(self, books: List[Dict]):
+        self.routes: Dict[str, Resource] = {}
+        listing = []
+        for book in books:
+            number = book.get('book_number')
+            resource = self.routes[f"/books/{number}"] = Resource(book)
+            for section_id, section in book.get('sections', {}).items():
+                self.routes[f"/books/{number}/sections/{section_id}"] = Resource(section)
+            listing.append({'book_number': number, 'title': book.get('title'),
+                            'version': book.get('version'), 'sections': len(book.get('sections', {})),
+                            'etag': resource.etag})
+        self.routes['/books'] = Resource(listing)
+        self.requests = 0
+
+    @classmethod
+    def load(cls, content_dir: Path) -> 'ContentServer':
+        from book_stream import book_files, load_book
+        return cls([load_book(path) for path in book_files(Path(content_dir))])
+
+    def respond(self, method: str, path: str, headers: Dict[str, str]) -> Tuple[bytes, bytes]:
+        """(status line + headers, body) for a request"""
+        if method not in ('GET', 'HEAD'):
+            return METHOD_NOT_ALLOWED
+        resource = self.routes.get(path.split('?', 1)[0].rstrip('/') or '/')
+        if resource is None:
+            return NOT_FOUND
+
+        gzipped = resource.gzip_body is not None and 'gzip' in headers.get('accept-encoding', '')
+        if_none_match = headers.get('if-none-match')
+        if if_none_match and resource.matches(if_none_match):
+            return (resource.not_modified_gzip if gzipped else resource.not_modified), b''
+        if gzipped:
+            head, body = resource.ok_gzip, resource.gzip_body
+        else:
+            head, body = resource.ok, resource.body
+        return head, (b'' if method == 'HEAD' else body)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until it closes"""
+        try:
+            while True:
+                try:
+                    request = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = request.decode('latin-1').split('\r\n')
+                parts = lines[0].split(' ')
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    if value:
+                        headers[name.strip().lower()] = value.strip()
+
+                if len(parts) != 3 or not parts[2].startswith('HTTP/1.'):
+                    head, body = BAD_REQUEST
+                    keep_alive = False
+                else:
+                    method, path, version = parts
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+                    # Request bodies are not used; skip them to stay in step
+                    length = int(headers.get('content-length', 0) or 0)
+                    if length:
+                        await reader.readexactly(length)
+                    head, body = self.respond(method, path, headers)
+
+                self.requests += 1
+                writer.write(head + (b'\r\n' if keep_alive else b'Connection: close\r\n\r\n') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, ready=None):
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+    def stats(self) -> Dict:
+        identity = sum(len(r.body) for r in self.routes.values())
+        compressed = sum(len(r.gzip_body or r.body) for r in self.routes.values())
+        return {'routes': len(self.routes), 'identity_bytes': identity, 'gzip_bytes': compressed}
+
+
+async def _fetch(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str,
+                 headers: str) -> Tuple[int, Dict[str, str], bytes]:
+    """One request on a keep-alive connection: (status, headers, body)"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode('latin-1'))
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    response_headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(':')
+        if value:
+            response_headers[name.strip().lower()] = value.strip()
+    length = int(response_headers.get('content-length', 0))
+    body = await reader.readexactly(length) if length else b''
+    return int(head[0].split(' ')[1]), response_headers, body
+
+
+async def run_load(host: str, port: int, requests: int = 20000, concurrency: int = 50,
+                   conditional: float = 0.3, gzip_share: float = 1.0, seed: int = 1) -> Dict:
+    """Keep-alive clients requesting random sections (and, sometimes, books)
+
+    conditional is the share of requests sent with If-None-Match for an
+    ETag seen earlier (answered 304); gzip_share the share accepting gzip.
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    _, _, listing = await _fetch(reader, writer, '/books', '')
+    writer.close()
+    paths = []
+    for book in json.loads(listing):
+        paths.append(f"/books/{book['book_number']}")
+        paths += [f"/books/{book['book_number']}/sections/{n}" for n in range(1, book['sections'] + 1)]
+    # Mostly sections, the occasional whole book
+    weights = [1 if path.count('/') == 2 else 50 for path in paths]
+    plan = rng.choices(paths, weights, k=requests)
+    conditional_flags = [rng.random() < conditional for _ in range(requests)]
+    gzip_flags = [rng.random() < gzip_share for _ in range(requests)]
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    received = [0]
+    next_request = [0]
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        etags: Dict[Tuple[str, bool], str] = {}
+        try:
+            while next_request[0] < requests:
+                i = next_request[0]
+                next_request[0] += 1
+                path, gzipped = plan[i], gzip_flags[i]
+                headers = 'Accept-Encoding: gzip\r\n' if gzipped else ''
+                etag = etags.get((path, gzipped))
+                if etag and conditional_flags[i]:
+                    headers += f'If-None-Match: {etag}\r\n'
+                start = time.perf_counter()
+                status, response_headers, body = await _fetch(reader, writer, path, headers)
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+                received[0] += len(body)
+                if 'etag' in response_headers:
+                    etags[(path, gzipped)] = response_headers['etag']
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'seconds': elapsed,
+        'requests_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(0.50),
+        'p90_ms': percentile(0.90),
+        'p99_ms': percentile(0.99),
+        'max_ms': latencies[-1] * 1000,
+        'statuses': statuses,
+        'bytes_received': received[0]
+    }
+
+
+def print_load(result: Dict):
+    statuses = ', '.join(f"{status}: {count}" for status, count in sorted(result['statuses'].items()))
+    print(f"\n⏱️  {result['requests']} requests over {result['concurrency']} connections "
+          f"in {result['seconds']:.2f}s: {result['requests_per_sec']:,.0f} req/sec")
+    print(f"  Latency p50 {result['p50_ms']:.2f}ms  p90 {result['p90_ms']:.2f}ms  "
+          f"p99 {result['p99_ms']:.2f}ms  max {result['max_ms']:.2f}ms")
+    print(f"  Responses ({statuses}), {result['bytes_received'] / 1024:.0f} KB received")
+
+
+def _serve_in_process(content_dir: str, host: str, port: int, ready):
+    """Child process entry point for the bench command"""
+    server = ContentServer.load(Path(content_dir))
+    asyncio.run(server.serve(host, port, ready))
+
+
+def main():
+    """Serve the extracted books, or load-test a server"""
+    import argparse
+    import multiprocessing
+
+    parser = argparse.ArgumentParser(description='Lone Wolf content server')
+    parser.add_argument('command', nargs='?', choices=('serve', 'load', 'bench'), default='serve',
+                        help='serve (default); load: load-test a running server; '
+                             'bench: start a server process and load-test it')
+    parser.add_argument('--content-dir', default='extracted-content',
+                        help='Directory of book-N.json files (default: extracted-content)')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Address (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--requests', type=int, default=20000, help='Load: total requests (default: 20000)')
+    parser.add_argument('--concurrency', type=int, default=50, help='Load: connections (default: 50)')
+    parser.add_argument('--conditional', type=float, default=0.3,
+                        help='Load: share of repeat requests sent with If-None-Match (default: 0.3)')
+    parser.add_argument('--no-gzip', action='store_true', help='Load: do not send Accept-Encoding: gzip')
+
+    args = parser.parse_args()
+    load_args = (args.host, args.port, args.requests, args.concurrency, args.conditional,
+                 0.0 if args.no_gzip else 1.0)
+
+    if args.command == 'serve':
+        start = time.perf_counter()
+        server = ContentServer.load(Path(args.content_dir))
+        stats = server.stats()
+        print(f"📚 {stats['routes']} routes precomputed in {time.perf_counter() - start:.2f}s "
+              f"({stats['identity_bytes'] / 1024:.0f} KB, {stats['gzip_bytes'] / 1024:.0f} KB gzipped)")
+        print(f"🌐 Serving http://{args.host}:{args.port}/books")
+        try:
+            asyncio.run(server.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            print(f"\n✅ Served {server.requests} requests")
+        return
+
+    if args.command == 'load':
+        print_load(asyncio.run(run_load(*load_args)))
+        return
+
+    # The server gets its own process so client and server do not share an event loop
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve_in_process,
+                                      args=(args.content_dir, args.host, args.port, ready), daemon=True)
+    process.start()
+    try:
+        if not ready.wait(60):
+            raise SystemExit("❌ Server did not start")
+        print_load(asyncio.run(run_load(*load_args)))
+    finally:
+        process.terminate()
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Extraction profiling for the Lone Wolf scraper
+Opt-in timers for each extraction phase and each parse_section step, with
+counters for cached and skipped sections and a slowest-sections report,
+written as one JSON document. A capture mode adds either a cProfile
+function table or tracemalloc peak memory and top allocation sites.
+"""
+
+import cProfile
+import heapq
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CAPTURE_MODES = ('timers', 'cprofile', 'tracemalloc')
+
+# parse_section steps in the order they run
+PARSE_STEPS = ('read', 'parse', 'walk', 'narrative', 'choices', 'combat', 'endurance', 'type', 'illustrations')
+
+
+class SectionTimer:
+    """Lap timer for the steps of one parse_section call"""
+
+    __slots__ = ('laps', '_last')
+
+    def __init__(self):
+        self.laps: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, step: str):
+        """Charge the time since the previous lap to step"""
+        now = time.perf_counter()
+        self.laps[step] = self.laps.get(step, 0.0) + now - self._last
+        self._last = now
+
+
+class ExtractionProfile:
+    """Timings and counters collected over one extraction"""
+
+    def __init__(self, mode: str = 'timers', top: int = 10):
+        if mode not in CAPTURE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.top = top
+        self.phases: Dict[str, Dict] = {}
+        self.steps: Dict[str, float] = dict.fromkeys(PARSE_STEPS, 0.0)
+        self.counters: Dict[str, int] = {'files': 0, 'parsed': 0, 'cached': 0, 'skipped': 0}
+        self.skipped_files: List[str] = []
+        # Min-heap of (seconds, file, section, laps) holding the slowest sections
+        self._slowest: List = []
+        self._profiler: Optional[cProfile.Profile] = None
+        self._started = None
+        self.total_seconds = 0.0
+
+    def start(self):
+        """Begin the whole-run clock and the capture, if any"""
+        if self.mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.mode == 'tracemalloc':
+            tracemalloc.start()
+        self._started = time.perf_counter()
+
+    def stop(self):
+        self.total_seconds = time.perf_counter() - self._started
+        if self._profiler:
+            self._profiler.disable()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a named extraction phase (and its peak memory under tracemalloc)"""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {'seconds': time.perf_counter() - start}
+            if tracing:
+                entry['peak_kb'] = round((tracemalloc.get_traced_memory()[1] - before) / 1024, 1)
+            self.phases[name] = entry
+
+    def add_cached(self, count: int = 1):
+        self.counters['files'] += count
+        self.counters['cached'] += count
+
+    def add_section(self, section_file: str, section: Optional[Dict], laps: Dict[str, float]):
+        """Record one parsed section file and its step timings"""
+        self.counters['files'] += 1
+        self.counters['parsed'] += 1
+        for step, seconds in laps.items():
+            self.steps[step] = self.steps.get(step, 0.0) + seconds
+        if section is None:
+            self.counters['skipped'] += 1
+            self.skipped_files.append(section_file)
+
+        entry = (sum(laps.values()), section_file, section['section'] if section else None, laps)
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, entry)
+        elif entry[0] > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self) -> List[Dict]:
+        return [{'file': section_file, 'section': number, 'seconds': seconds,
+                 'steps': laps}
+                for seconds, section_file, number, laps in sorted(self._slowest, reverse=True)]
+
+    def capture(self) -> Optional[Dict]:
+        """cProfile function table or tracemalloc summary, per mode"""
+        if self._profiler:
+            stats = pstats.Stats(self._profiler, stream=io.StringIO())
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            return {'functions': [
+                {'function': f"{Path(filename).name}:{line}({name})",
+                 'calls': calls, 'total_seconds': total, 'cumulative_seconds': cumulative}
+                for (filename, line, name), (_, calls, total, cumulative, _) in rows[:self.top]]}
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return {
+                'current_kb': round(current / 1024, 1),
+                'peak_kb': round(peak / 1024, 1),
+                'top_allocations': [
+                    {'location': f"{Path(stat.traceback[0].filename).name}:{stat.traceback[0].lineno}",
+                     'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+                    for stat in snapshot.statistics('lineno')[:self.top]]
+            }
+        return None
+
+    def to_dict(self, **context) -> Dict:
+        """The profile document; context (book, jobs, parser, ...) goes in first"""
+        step_total = sum(self.steps.values())
+        profile = dict(context)
+        profile.update({
+            'mode': self.mode,
+            'total_seconds': self.total_seconds,
+            'phases': self.phases,
+            'parse_steps': {step: {'seconds': seconds,
+                                   'share': seconds / step_total if step_total else 0.0}
+                            for step, seconds in self.steps.items()},
+            'sections': dict(self.counters, skipped_files=self.skipped_files),
+            'slowest_sections': self.slowest()
+        })
+        capture = self.capture()
+        if capture is not None:
+            profile[self.mode] = capture
+        return profile
+
+    def save(self, path: Path, **context) -> Dict:
+        profile = self.to_dict(**context)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, indent=2, ensure_ascii=False)
+        if self._profiler:
+            # Full stats alongside for pstats / snakeviz
+            self._profiler.dump_stats(str(path.with_suffix('.prof')))
+        return profile
+
+
+def print_profile(profile: Dict):
+    """Short human-readable summary of a profile document"""
+    print(f"\n⏱️  Profile ({profile['mode']}, {profile['total_seconds']:.2f}s total):")
+    for name, phase in profile['phases'].items():
+        memory = f"  peak +{phase['peak_kb']:.0f} KB" if 'peak_kb' in phase else ''
+        print(f"  {name:<22} {phase['seconds'] * 1000:9.1f}ms{memory}")
+
+    counts = profile['sections']
+    print(f"  Sections: {counts['files']} files, {counts['parsed']} parsed, "
+          f"{counts['cached']} cached, {counts['skipped']} skipped")
+    if counts['parsed']:
+        steps = ', '.join(f"{step} {s['share']:.0%}" for step, s in profile['parse_steps'].items()
+                          if s['seconds'])
+        print(f"  parse_section steps: {steps}")
+    for entry in profile['slowest_sections'][:3]:
+        print(f"  🐢 {entry['file']}: {entry['seconds'] * 1000:.2f}ms")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Random Number Table for Lone Wolf books
+random.htm shows the table only as an image (random.png): ten rows of ten
+digits that the reader picks from with a pencil instead of rolling dice.
+Each book prints its own table and they are not all uniform (books 4 and
+5 favour some digits), so, as with the Combat Results Table, the
+extractor identifies the image by checksum against a transcription.
+"""
+
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional
+
+SIZE = 10
+
+# Transcriptions of random.png, row by row, keyed by the image's sha256
+KNOWN_TABLES = {
+    # 01fftd
+    'a948875f71da720ee4db67c94a4f2e7bf3a723de5fb4ce0d5b821202485e26ad': [
+        '1573690179', '3928174978', '6107305467', '0289296024', '5964828563',
+        '0313975015', '5825136439', '7048645142', '4683201725', '8370962481'],
+    # 02fotw
+    '8c6c9dbc7ea44fb1c618a6b1830851a7bd84c0f670a0551b41a0160bcefdeaa8': [
+        '7501515736', '3643939281', '4514261073', '0172502892', '6248159648',
+        '9017903139', '7497858251', '0546770486', '9602446832', '2856383709'],
+    # 03tcok (book 1's rows, starting from its sixth)
+    'd9840e4e1ff9874c0bbbfaf4caaddc06b6547c91d35f301a2e1c5a15fe529cb8': [
+        '0313975015', '5825136439', '7048645142', '4683201725', '8370962481',
+        '1573690179', '3928174978', '6107305467', '0289296024', '5964828563'],
+    # 04tcod
+    '4c9fab12e70615b7eca9ad5b483355875dedd16e561d5ebe48f2c1093db5fd03': [
+        '1393275025', '5625138435', '7678143145', '4087308725', '7400962081',
+        '1679690339', '8928134971', '6307505466', '7214296426', '0964828583'],
+    # 05sots
+    '176546bcfe10f6b424b3d829a307df531844bef96d334c6e68d8a6850d36639d': [
+        '2504866841', '0595709465', '2825632796', '1684041387', '7562041631',
+        '6684125048', '0946505957', '3279628256', '4138716840', '4163175620']
+}
+
+
+class RandomNumberTable:
+    """The 100 numbers (0-9) of a book's table; rows are lists of SIZE numbers"""
+
+    def __init__(self, rows: List[List[int]], source: Optional[str] = None):
+        if len(rows) != SIZE or any(len(row) != SIZE for row in rows):
+            raise ValueError(f"A Random Number Table has {SIZE} rows of {SIZE} numbers")
+        self.rows = rows
+        self.source = source
+        self._array = None
+
+    @classmethod
+    def from_transcription(cls, rows: List[str], source: Optional[str] = None) -> 'RandomNumberTable':
+        return cls([[int(digit) for digit in row] for row in rows], source)
+
+    @property
+    def numbers(self) -> List[int]:
+        """All numbers in reading order (position = row * SIZE + column)"""
+        return [number for row in self.rows for number in row]
+
+    def pick(self, position: int) -> int:
+        """The number at a position (0-99) of the table"""
+        return self.rows[position // SIZE][position % SIZE]
+
+    def array(self):
+        """The numbers as a flat NumPy uint8 array, for picking many positions at once"""
+        if self._array is None:
+            import numpy as np
+            self._array = np.array(self.numbers, dtype=np.uint8)
+        return self._array
+
+    def frequencies(self) -> List[int]:
+        """How often each number 0-9 appears"""
+        counts = Counter(self.numbers)
+        return [counts[number] for number in range(10)]
+
+    @property
+    def digest(self) -> str:
+        """Content hash of the table values"""
+        return hashlib.sha256(bytes(self.numbers)).hexdigest()
+
+    def to_dict(self) -> Dict:
+        return {'source': self.source, 'rows': self.rows}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RandomNumberTable':
+        return cls(data['rows'], data.get('source'))
+
+
+def extract_random_number_table(book_path) -> Optional[RandomNumberTable]:
+    """Read random.htm and match its table image to a known transcription
+
+    book_path is a book directory, an archive or a book_source source.
+    Returns None (with a warning) if the page or its image is missing or
+    the image is not one the table has been transcribed from.
+    """
+    from bs4 import BeautifulSoup
+    from book_source import open_book
+
+    book = open_book(book_path)
+    table_file = book.file('random.htm')
+    if table_file is None:
+        print(f"Warning: random.htm not found in {book.path}")
+        return None
+
+    soup = BeautifulSoup(table_file.read_text(encoding='utf-8'), 'html.parser')
+    maintext = soup.find('div', class_='maintext') or soup
+    image = maintext.find('img')
+    image_file = book.file(image.get('src', '')) if image else None
+    if image_file is None:
+        print(f"Warning: Random Number Table image not found in {book.path}")
+        return None
+
+    transcription = KNOWN_TABLES.get(hashlib.sha256(image_file.read_bytes()).hexdigest())
+    if transcription is None:
+        print(f"Warning: no transcription for Random Number Table image {image.get('src')}")
+        return None
+    return RandomNumberTable.from_transcription(transcription, source=image.get('src'))
+
+
+def main():
+    """Print a book's Random Number Table and how often each number appears"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Lone Wolf Random Number Table')
+    parser.add_argument('book_path', help='Path to book directory or archive')
+
+    args = parser.parse_args()
+    table = extract_random_number_table(args.book_path)
+    if table is None:
+        return
+
+    for row in table.rows:
+        print(' '.join(str(number) for number in row))
+    print(f"\nFrequencies: " + '  '.join(f"{number}:{count}" for number, count in enumerate(table.frequencies())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Optimal-route solver for extracted Lone Wolf books
+Searches game states (section, discipline loadout) for every five-discipline
+loadout at once: each section holds a bitset with one bit per loadout, and
+a discipline-gated choice passes on only the bits of loadouts that have the
+discipline. One layered BFS therefore gives every loadout's shortest path
+to victory, and one 0-1 BFS by combat count gives its fewest forced combats.
+
+Only `requires` (Kai Discipline) conditions gate choices; item, gold and
+"if you do not possess" conditions are treated as always open.
+"""
+
+import json
+import time
+from collections import deque
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from rule_engine import RuleEngine
+from section_graph import SectionGraph
+
+# Kai Lords start with five of the ten disciplines
+LOADOUT_SIZE = 5
+
+
+class RouteSolver:
+    """Routes through one book for every loadout of LOADOUT_SIZE disciplines
+
+    disciplines fixes the bit order of discipline masks (bit i = disciplines[i]);
+    loadout j is self.loadouts[j] and is bit j of every section bitset.
+    """
+
+    def __init__(self, book: Dict, disciplines: List[str], loadout_size: int = LOADOUT_SIZE):
+        self.disciplines = disciplines
+        bit = {discipline: i for i, discipline in enumerate(disciplines)}
+
+        self.loadouts = [sum(1 << bit[d] for d in combo)
+                         for combo in combinations(disciplines, loadout_size)]
+        self.all_loadouts = (1 << len(self.loadouts)) - 1
+        # Loadouts (as a bitset) that include each discipline
+        having = [0] * len(disciplines)
+        for j, mask in enumerate(self.loadouts):
+            for i in range(len(disciplines)):
+                if mask >> i & 1:
+                    having[i] |= 1 << j
+
+        sections = book.get('sections', {})
+        # section -> [(target, bitset of loadouts allowed to take it)]
+        self.edges: Dict[int, List[Tuple[int, int]]] = {}
+        self.predecessors: Dict[int, List[Tuple[int, int]]] = {}
+        for section in sections.values():
+            allowed_by_target: Dict[int, int] = {}
+            for choice in section.get('choices', []):
+                target = choice.get('target')
+                if not target or str(target) not in sections:
+                    continue
+                required = choice.get('requires')
+                allowed = having[bit[required]] if required in bit else self.all_loadouts
+                allowed_by_target[target] = allowed_by_target.get(target, 0) | allowed
+            number = section['section']
+            self.edges[number] = sorted(allowed_by_target.items())
+            for target, allowed in self.edges[number]:
+                self.predecessors.setdefault(target, []).append((number, allowed))
+
+        self.combat = {section['section'] for section in sections.values() if section.get('combat')}
+        self.victory = SectionGraph.from_sections(sections).victory_section
+
+    def loadout_disciplines(self, j: int) -> List[str]:
+        return [d for i, d in enumerate(self.disciplines) if self.loadouts[j] >> i & 1]
+
+    def _layers(self, start: int) -> List[Dict[int, int]]:
+        """BFS layers: layers[k][section] = loadouts first reaching it in k choices"""
+        visited = {start: self.all_loadouts}
+        layers = [{start: self.all_loadouts}]
+        while True:
+            frontier: Dict[int, int] = {}
+            for section, bits in layers[-1].items():
+                for target, allowed in self.edges.get(section, ()):
+                    new = bits & allowed & ~visited.get(target, 0)
+                    if new:
+                        frontier[target] = frontier.get(target, 0) | new
+            if not frontier:
+                return layers
+            for section, bits in frontier.items():
+                visited[section] = visited.get(section, 0) | bits
+            layers.append(frontier)
+
+    def _path(self, layers: List[Dict[int, int]], depth: int, j: int) -> List[int]:
+        """Walk back from victory through earlier layers that hold loadout j"""
+        bit = 1 << j
+        path = [self.victory]
+        for k in range(depth - 1, -1, -1):
+            for source, allowed in self.predecessors.get(path[-1], ()):
+                if layers[k].get(source, 0) & allowed & bit:
+                    path.append(source)
+                    break
+        return path[::-1]
+
+    def _fewest_combats(self, start: int) -> Dict[int, int]:
+        """Loadout -> fewest combat sections on any route from start to victory"""
+        seen: Dict[int, int] = {}
+        fewest: Dict[int, int] = {}
+        level = {start: self.all_loadouts}
+        combats = 1 if start in self.combat else 0
+        while level:
+            next_level: Dict[int, int] = {}
+            stack = list(level.items())
+            while stack:
+                section, bits = stack.pop()
+                new = bits & ~seen.get(section, 0)
+                if not new:
+                    continue
+                seen[section] = seen.get(section, 0) | new
+                if section == self.victory:
+                    for j in _bits(new):
+                        fewest[j] = combats
+                for target, allowed in self.edges.get(section, ()):
+                    passed = new & allowed
+                    if not passed:
+                        continue
+                    # Entering a combat section costs one; everything else is free
+                    if target in self.combat:
+                        next_level[target] = next_level.get(target, 0) | passed
+                    else:
+                        stack.append((target, passed))
+            level = next_level
+            combats += 1
+        return fewest
+
+    def solve(self, start: int = 1) -> List[Dict]:
+        """Victory reachability, shortest path and forced combats per loadout"""
+        if start not in self.edges:
+            return [self._result(j, None) for j in range(len(self.loadouts))]
+
+        layers = self._layers(start)
+        depth: Dict[int, int] = {}
+        for k, layer in enumerate(layers):
+            for j in _bits(layer.get(self.victory, 0)):
+                depth[j] = k
+        fewest = self._fewest_combats(start)
+
+        results = []
+        for j in range(len(self.loadouts)):
+            path = self._path(layers, depth[j], j) if j in depth else None
+            results.append(self._result(j, path, fewest.get(j)))
+        return results
+
+    def _result(self, j: int, path: Optional[List[int]], forced_combats: Optional[int] = None) -> Dict:
+        return {
+            'disciplines': self.loadout_disciplines(j),
+            'mask': self.loadouts[j],
+            'victory': path is not None,
+            'path_length': len(path) - 1 if path else None,
+            'path': path,
+            'path_combats': sum(1 for n in path if n in self.combat) if path else None,
+            'forced_combats': forced_combats
+        }
+
+    def solve_naive(self, start: int = 1) -> List[Optional[int]]:
+        """Shortest path length per loadout, one BFS each (benchmark reference)"""
+        lengths = []
+        for j in range(len(self.loadouts)):
+            bit = 1 << j
+            distance = {start: 0}
+            queue = deque([start])
+            while queue:
+                section = queue.popleft()
+                for target, allowed in self.edges.get(section, ()):
+                    if allowed & bit and target not in distance:
+                        distance[target] = distance[section] + 1
+                        queue.append(target)
+            lengths.append(distance.get(self.victory))
+        return lengths
+
+
+def _bits(bitset: int):
+    """Positions of the set bits in an int"""
+    while bitset:
+        low = bitset & -bitset
+        yield low.bit_length() - 1
+        bitset ^= low
+
+
+def discipline_ids(rules_path: Optional[str] = None) -> List[str]:
+    """Discipline ids in rule-file order (the mask bit order)"""
+    return [discipline_id for _, discipline_id in RuleEngine.load(rules_path).disciplines]
+
+
+def main():
+    """Solve routes for every loadout in the extracted books"""
+    import argparse
+    from book_stream import book_files, load_book
+
+    parser = argparse.ArgumentParser(description='Shortest routes per discipline loadout')
+    parser.add_argument('books', nargs='*', help='Book files (default: extracted-content/book-N.json)')
+    parser.add_argument('--rules', help='Rule file for discipline ids (default: rules/kai.json)')
+    parser.add_argument('--loadout', help='Comma-separated discipline ids to show in full')
+    parser.add_argument('-o', '--output', help='Write all results to this JSON file')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Compare against one BFS per loadout')
+
+    args = parser.parse_args()
+    paths = [Path(p) for p in args.books] or book_files(Path('extracted-content'))
+    disciplines = discipline_ids(args.rules)
+    wanted = set(args.loadout.split(',')) if args.loadout else None
+    if wanted and not wanted <= set(disciplines):
+        parser.error(f"Unknown discipline ids: {sorted(wanted - set(disciplines))}")
+
+    all_results = []
+    total = 0.0
+    for path in paths:
+        book = load_book(path)
+        start = time.perf_counter()
+        solver = RouteSolver(book, disciplines)
+        results = solver.solve()
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        all_results.append({'book_number': book.get('book_number'), 'title': book.get('title'),
+                            'victory_section': solver.victory, 'loadouts': results})
+
+        winners = [r for r in results if r['victory']]
+        print(f"\n📖 Book {book.get('book_number')}: {book.get('title')} "
+              f"({len(results)} loadouts in {elapsed * 1000:.1f}ms)")
+        print(f"  🏆 Victory ({solver.victory}) reachable for {len(winners)}/{len(results)} loadouts")
+        if winners:
+            shortest = min(winners, key=lambda r: (r['path_length'], r['mask']))
+            safest = min(winners, key=lambda r: (r['forced_combats'], r['mask']))
+            print(f"  🗺️  Shortest route: {shortest['path_length']} choices "
+                  f"({', '.join(shortest['disciplines'])})")
+            print(f"  ⚔️  Fewest forced combats: {safest['forced_combats']} "
+                  f"({', '.join(safest['disciplines'])})")
+        if wanted:
+            for r in results:
+                if set(r['disciplines']) == wanted:
+                    print(f"  🎯 {', '.join(r['disciplines'])}: path {r['path']}, "
+                          f"forced combats {r['forced_combats']}")
+
+        if args.benchmark:
+            start = time.perf_counter()
+            naive = solver.solve_naive()
+            naive_elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            solver._layers(1)
+            layered = time.perf_counter() - start
+            assert naive == [r['path_length'] for r in results]
+            print(f"  ⏱️  Shortest paths: {layered * 1000:.2f}ms bitset BFS vs "
+                  f"{naive_elapsed * 1000:.2f}ms per-loadout BFS ({naive_elapsed / layered:.1f}x)")
+
+    print(f"\n✅ Solved {len(paths)} books in {total:.2f}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'disciplines': disciplines, 'books': all_results}, f, ensure_ascii=False)
+        print(f"✅ Saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Compiled rule engine for choice and combat text
+Detects conditional choices, required disciplines, item requirements and
+COMBAT SKILL / ENDURANCE modifiers in one call per text. Each modifier
+carries what limits it in its sentence: the rounds it lasts, whether it
+repeats every round, the Kai Discipline that cancels it, or (for anything
+else, such as an item or a Meal) the sentence itself as its condition.
+Rules are data: they load from a JSON file in rules/ (one per series).
+"""
+
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_RULES = Path(__file__).parent / 'rules' / 'kai.json'
+
+# Round numbers as the books write them ("the first two rounds")
+ROUND_NUMBERS = {'first': 1, 'second': 2, 'third': 3, 'two': 2, 'three': 3, 'four': 4, 'five': 5}
+
+_SENTENCE = re.compile(r'[^.!?\n]+[.!?]*')
+
+
+class RuleEngine:
+    """Precompiled rule table built from a series rules file
+
+    The text is lowercased once and cheap literal checks gate the regexes:
+    a modifier rule only runs when its trigger keyword occurs in the text.
+    (A single alternation of every rule is slower under Python's re, which
+    tries each branch at every position.)
+    """
+
+    def __init__(self, rules: Dict):
+        self.series = rules.get('series', '')
+        self.digest = hashlib.sha256(
+            json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()
+
+        patterns = rules.get('conditional_patterns', [])
+        self.conditional_keys = [p.lower() for p in patterns]
+        # Conditional opener, optionally followed by the item it asks for
+        item = rules.get('item_pattern')
+        item_part = f"(?:\\s+{item})?" if item else ''
+        # The same names wherever they occur, for item_names()
+        self.item_re = re.compile(f"(?<![\\w’'-]){item}") if item else None
+        # Items the books hand out without naming them ("keep this Potion")
+        self.implicit_items = rules.get('implicit_items', [])
+        self.conditional_re = re.compile(
+            f"(?i:{'|'.join(re.escape(p) for p in patterns)}){item_part}") if patterns else None
+
+        # Discipline names are matched case-sensitively, in priority order
+        self.disciplines = [(d['name'], d['id']) for d in rules.get('disciplines', [])]
+
+        self.modifiers = [
+            (rule['trigger'].lower(), re.compile(rule['pattern'], re.IGNORECASE),
+             rule['sign'], rule['stat'])
+            for rule in rules.get('modifiers', [])
+        ]
+        self.triggers = sorted({trigger for trigger, _, _, _ in self.modifiers})
+
+        conditions = rules.get('modifier_conditions', {})
+
+        def compile_optional(key: str):
+            pattern = conditions.get(key)
+            return re.compile(pattern, re.IGNORECASE) if pattern else None
+
+        self.unless_re = compile_optional('unless_discipline')
+        self.every_round_re = compile_optional('every_round')
+        self.conditional_modifier_re = compile_optional('conditional')
+        self.rounds_res = [re.compile(p, re.IGNORECASE) for p in conditions.get('rounds', [])]
+
+    @classmethod
+    def load(cls, rules_path: Optional[Path] = None) -> 'RuleEngine':
+        """Load and compile a rules file (defaults to rules/kai.json)"""
+        with open(rules_path or DEFAULT_RULES, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def analyze(self, text: str) -> Dict:
+        """Run every rule over text
+
+        Returns a dict with the conditional flag, required discipline ids (in
+        rules-file priority order), item requirements and stat modifiers in
+        the order they appear in the text. A modifier is a dict such as
+        {'stat': 'COMBAT SKILL', 'value': -2, 'rounds': [2, None],
+        'unless': 'mindshield'}; see modifier() for the optional keys.
+        """
+        lowered = text.lower()
+
+        conditional = any(key in lowered for key in self.conditional_keys)
+        items: List[str] = []
+        if conditional and self.conditional_re:
+            for match in self.conditional_re.finditer(text):
+                item = match.groupdict().get('item')
+                if item:
+                    items.extend(re.split(r'\s+(?:and|or)\s+(?:(?:a|an|the|some)\s+)?', item))
+
+        disciplines = [d_id for name, d_id in self.disciplines if name in text]
+
+        modifiers: List[Dict] = []
+        triggered = [t for t in self.triggers if t in lowered]
+        if triggered:
+            found = []
+            for trigger, pattern, sign, stat in self.modifiers:
+                if trigger in triggered:
+                    for match in pattern.finditer(text):
+                        found.append((match.start(), stat, int(f"{sign}{match.group(1)}")))
+            if found:
+                sentences = [(m.start(), m.end(), m.group(0).strip()) for m in _SENTENCE.finditer(text)]
+                for position, stat, value in sorted(found):
+                    sentence = next((s for start, end, s in sentences if start <= position < end), '')
+                    modifiers.append(self.modifier(stat, value, sentence))
+
+        return {
+            'conditional': conditional,
+            'disciplines': disciplines,
+            'items': items,
+            'modifiers': modifiers
+        }
+
+    def item_names(self, text: str) -> List[str]:
+        """Every name in text shaped like an item requirement, in order
+
+        Not only items: any capitalized phrase matches ("The Sommerswerd",
+        "Lone Wolf").
+        """
+        if not self.item_re:
+            return []
+        return [name for match in self.item_re.finditer(text)
+                for name in re.split(r'\s+(?:and|or)\s+(?:(?:a|an|the|some)\s+)?', match.group('item'))]
+
+    def modifier(self, stat: str, value: int, sentence: str) -> Dict:
+        """A stat change with the limits its sentence puts on it
+
+        Optional keys: rounds ([first, last] combat rounds, last None for
+        the rest of the fight), every_round (repeats each round of combat),
+        unless (a discipline id that cancels it) and condition (the sentence,
+        when it is conditional on anything other than a Kai Discipline).
+        """
+        modifier = {'stat': stat, 'value': value}
+        for pattern in self.rounds_res:
+            match = pattern.search(sentence)
+            if match:
+                bounds = match.groupdict()
+                if bounds.get('count'):
+                    count = bounds['count']
+                    modifier['rounds'] = [1, int(count) if count.isdigit() else ROUND_NUMBERS[count.lower()]]
+                elif bounds.get('only'):
+                    modifier['rounds'] = [1, 1]
+                else:
+                    modifier['rounds'] = [ROUND_NUMBERS[bounds['from'].lower()], None]
+                break
+        if self.every_round_re and self.every_round_re.search(sentence):
+            modifier['every_round'] = True
+
+        unless = self.unless_re.search(sentence) if self.unless_re else None
+        discipline = None
+        if unless:
+            rest = sentence[unless.end():]
+            discipline = next((d_id for name, d_id in self.disciplines if rest.lstrip().startswith(name)), None)
+        if discipline:
+            modifier['unless'] = discipline
+        elif self.conditional_modifier_re and self.conditional_modifier_re.search(sentence):
+            modifier['condition'] = sentence
+        return modifier
+
+
+def _legacy_analyze(text: str) -> Dict:
+    """The per-pattern checks the extractor used before the rule engine"""
+    conditional_patterns = [
+        'If you wish to use your Kai Discipline',
+        'If you have the Kai Discipline',
+        'If you possess',
+        'If you have'
+    ]
+    conditional = any(pattern.lower() in text.lower() for pattern in conditional_patterns)
+
+    disciplines_map = {
+        'Sixth Sense': 'sixth_sense',
+        'Camouflage': 'camouflage',
+        'Hunting': 'hunting',
+        'Tracking': 'tracking',
+        'Healing': 'healing',
+        'Weaponskill': 'weaponskill',
+        'Mindshield': 'mindshield',
+        'Mindblast': 'mindblast',
+        'Animal Kinship': 'animal_kinship',
+        'Mind Over Matter': 'mind_over_matter'
+    }
+    required = None
+    for disc_name, disc_id in disciplines_map.items():
+        if disc_name in text:
+            required = disc_id
+            break
+
+    modifiers = []
+    if re.search(r'deduct \d+ points? from your COMBAT SKILL', text, re.IGNORECASE):
+        match = re.search(r'deduct (\d+) points? from your COMBAT SKILL', text, re.IGNORECASE)
+        if match:
+            modifiers.append(f"-{match.group(1)} COMBAT SKILL")
+    if re.search(r'add \d+ points? to your COMBAT SKILL', text, re.IGNORECASE):
+        match = re.search(r'add (\d+) points? to your COMBAT SKILL', text, re.IGNORECASE)
+        if match:
+            modifiers.append(f"+{match.group(1)} COMBAT SKILL")
+
+    return {'conditional': conditional, 'requires': required, 'modifiers': modifiers}
+
+
+def benchmark(content_dir: Path, rules_path: Optional[Path] = None, repeat: int = 20) -> Dict:
+    """Time the rule engine against the legacy checks over every choice text"""
+    from book_stream import book_files
+
+    texts = []
+    for json_path in book_files(content_dir):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for section in data.get('sections', {}).values():
+            texts.extend(choice['text'] for choice in section.get('choices', []))
+
+    engine = RuleEngine.load(rules_path)
+    timings = {}
+    for label, analyze in (('legacy', _legacy_analyze), ('engine', engine.analyze)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for text in texts:
+                analyze(text)
+        timings[label] = (time.perf_counter() - start) / (repeat * len(texts))
+
+    print(f"\n⏱️  Rule engine benchmark ({len(texts)} choice texts x {repeat}):")
+    for label, per_text in timings.items():
+        print(f"  {label:<7} {per_text * 1e6:.2f}µs per text")
+    print(f"  Speedup: {timings['legacy'] / timings['engine']:.2f}x")
+
+    return {'texts': len(texts), 'legacy_us': timings['legacy'] * 1e6,
+            'engine_us': timings['engine'] * 1e6}
+
+
+def main():
+    """Analyze a text or benchmark the rule engine"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Lone Wolf choice/combat rule engine')
+    parser.add_argument('text', nargs='?', help='Text to analyze')
+    parser.add_argument('--rules', help=f'Rules file (default: {DEFAULT_RULES})', default=None)
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Benchmark against the legacy checks over extracted-content choice texts')
+    parser.add_argument('--content-dir', default='extracted-content',
+                        help='Directory of book-*.json files for --benchmark')
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(Path(args.content_dir), args.rules)
+    elif args.text:
+        engine = RuleEngine.load(args.rules)
+        print(json.dumps(engine.analyze(args.text), indent=2, ensure_ascii=False))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,48 +4,357 @@ Lone Wolf Book Content Extractor
 Extracts content from Project Aon HTML files into structured JSON format
 """
 
+import hashlib
 import json
+import os
 import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from bs4 import BeautifulSoup
+from typing import Dict, Iterator, List, Optional, Any, Set
+from bs4 import BeautifulSoup, SoupStrainer
+
+from asset_store import AssetStore, rewrite_illustrations
+from book_source import ARCHIVE_SUFFIXES, ArchiveSource, file_size, open_book
+from book_stream import FORMATS, default_output_path, open_writer
+from combat_table import extract_combat_results_table
+from extraction_profile import CAPTURE_MODES, ExtractionProfile, SectionTimer, print_profile
+from random_table import extract_random_number_table
+from rule_engine import RuleEngine
+from search_index import IndexBuilder, index_path_for
+from section_graph import GraphBuilder, SectionGraph, graph_path_for
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+
+# Bump whenever parsing logic changes so cached results are discarded
+EXTRACTOR_VERSION = '1.3.0'
+
+DEFAULT_CACHE_DIR = '.extract-cache'
+
+PARSERS = ('html.parser', 'lxml')
+
+# Restricts section parsing to the numbered div that holds the section body
+NUMBERED_ONLY = SoupStrainer('div', class_='numbered')
+
+# Marks a cache miss (None is a valid cached parse result)
+_MISS = object()
+
+# Project Aon directory code -> Kai series book number
+BOOK_CODES = {
+    '01fftd': 1,
+    '02fotw': 2,
+    '03tcok': 3,
+    '04tcod': 4,
+    '05sots': 5
+}
+
+# Batch (--all) manifest, written to the output directory
+BATCH_MANIFEST = 'extraction-manifest.json'
+
+# equipmnt.htm: Action Chart heading an item goes under -> item type
+EQUIPMENT_TYPES = {
+    'Weapons': 'weapon',
+    'Special Items': 'special_item',
+    'Backpack Item': 'backpack_item',
+    'Backpack Items': 'backpack_item',
+    'Meals': 'meal',
+    'Belt Pouch': 'gold'
+}
+NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'twelve': 12, 'fifty': 50
+}
+# "[3 = ]Two Meals (Meals). This adds 2 ENDURANCE points..."
+EQUIPMENT_ITEM = re.compile(r"^(?:(?P<number>\d) = )?(?P<name>[^(]+?) \((?P<heading>[^)]+)\)\.?\s*(?P<effect>.*)$")
+ITEM_NAME = r"[A-Z][\w’'-]*(?: (?:of |the )*[A-Z][\w’'-]*)*"
+CARRY_LIMITS = {'Weapons': 'weapons', 'Backpack Items': 'backpack_items', 'Gold Crowns': 'gold_crowns'}
+
+
+class ExtractionCache:
+    """Persistent per-book cache of parse results keyed by source file content hash
+
+    Each entry is its own JSON file in <cache_dir>/<book>/, read when it is
+    needed and written as soon as it is computed, so only the keys used in
+    this run are held in memory.
+    """
+
+    def __init__(self, cache_dir: str, book_path: Path):
+        self.cache_dir = Path(cache_dir) / book_path.resolve().name
+        self.version_file = self.cache_dir / 'VERSION'
+        self.used: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            version = self.version_file.read_text(encoding='utf-8').strip()
+        except OSError:
+            version = None
+        if version != EXTRACTOR_VERSION:
+            self.clear()
+
+    @staticmethod
+    def key(kind: str, source_file: Path) -> str:
+        """Cache key for one kind of parse result of a source file"""
+        digest = hashlib.sha256(source_file.read_bytes()).hexdigest()
+        return f"{kind}:{digest}"
+
+    def entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key.replace(':', '_')}.json"
+
+    def contains(self, key: str) -> bool:
+        """Whether key has an entry, counted as a hit or miss (the entry is not read)"""
+        if self.entry_path(key).exists():
+            self.hits += 1
+            self.used.add(key)
+            return True
+        self.misses += 1
+        return False
+
+    def load(self, key: str) -> Any:
+        """Read the entry for key; raises OSError or ValueError if it is missing or damaged"""
+        with open(self.entry_path(key), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def get(self, key: str) -> Any:
+        """Return the cached result for key, or _MISS"""
+        if self.contains(key):
+            try:
+                return self.load(key)
+            except (OSError, ValueError):
+                self.hits -= 1
+                self.misses += 1
+        return _MISS
+
+    def put(self, key: str, value: Any):
+        path = self.entry_path(key)
+        tmp_file = path.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False, separators=(',', ':'))
+        tmp_file.replace(path)
+        self.used.add(key)
+
+    def save(self):
+        """Delete entries not used in this run (their source files changed or are gone)"""
+        used = {self.entry_path(key).name for key in self.used}
+        for path in self.cache_dir.glob('*.json'):
+            if path.name not in used:
+                path.unlink()
+
+    def clear(self):
+        """Delete every entry, leaving an empty cache for this extractor version"""
+        self.used = set()
+        if self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.version_file.write_text(EXTRACTOR_VERSION, encoding='utf-8')
+
+
+class SectionParts:
+    """Elements of a section's maintext, sorted in a single document-order walk"""
+
+    def __init__(self):
+        self.narrative: List = []   # <p> without choice/combat class
+        self.choices: List = []     # <p class="choice">
+        self.combat = None          # first <p class="combat">
+        self.images: List = []
+        self.links: List = []
+        self.lists: List = []       # <ul> item lists (found or for sale)
+
+
+def walk_maintext(maintext) -> SectionParts:
+    """Sort narrative, choice, combat, image, link and list tags in one traversal"""
+    parts = SectionParts()
+
+    for element in maintext.descendants:
+        name = element.name
+        if name == 'p':
+            classes = element.get('class', [])
+            is_choice = 'choice' in classes
+            is_combat = 'combat' in classes
+            if is_choice:
+                parts.choices.append(element)
+            if is_combat and parts.combat is None:
+                parts.combat = element
+            if not (is_choice or is_combat):
+                parts.narrative.append(element)
+        elif name == 'img':
+            parts.images.append(element)
+        elif name == 'a':
+            parts.links.append(element)
+        elif name == 'ul':
+            parts.lists.append(element)
+
+    return parts
+
+
+def _as_parts(maintext) -> SectionParts:
+    return maintext if isinstance(maintext, SectionParts) else walk_maintext(maintext)
+
+
+# Extractor used by pool workers, set once per process by _init_worker
+_worker_extractor = None
+
+
+def _init_worker(extractor: 'LoneWolfExtractor'):
+    """Install a copy of the parent's extractor in a pool worker process
+
+    parse_section does not depend on the book path, so a pool can be shared
+    by every book extracted with the same parser, strainer and rules.
+    """
+    global _worker_extractor
+    _worker_extractor = extractor
+
+
+def _parse_in_worker(section_file: Path) -> Optional[Dict]:
+    """Parse one section file with the worker's extractor"""
+    return _worker_extractor.parse_section(section_file)
+
+
+def _profile_in_worker(section_file: Path):
+    """Parse one section file with the worker's extractor, returning its step timings too"""
+    return _worker_extractor.parse_section_timed(section_file)
 
 
 class LoneWolfExtractor:
     """Extracts Lone Wolf gamebook content from Project Aon HTML files"""
 
-    def __init__(self, book_path: str):
+    def __init__(self, book_path: str, jobs: int = 1, cache_dir: Optional[str] = None,
+                 parser: str = 'html.parser', strain: bool = False,
+                 rules_path: Optional[str] = None, profile: Optional[ExtractionProfile] = None):
         self.book_path = Path(book_path)
+        # Book directory, or a .zip / .tar archive read into memory once
+        self.source = open_book(self.book_path)
+        # Conditional-choice and combat-modifier rules (rules/kai.json by default)
+        self.rules = RuleEngine.load(rules_path)
+        if parser == 'lxml' and not HAS_LXML:
+            print("Warning: lxml not installed, falling back to html.parser")
+            parser = 'html.parser'
+        self.parser = parser
+        # Parse only div.numbered from section files
+        self.strain = strain
+        # Worker processes for section parsing (1 = serial, 0 = one per CPU)
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.cache = ExtractionCache(cache_dir, self.book_path) if cache_dir else None
         self.sections: Dict[str, Dict] = {}
         self.disciplines: List[Dict] = []
         self.equipment_rules: Dict = {}
+        self.combat_results_table: Optional[Dict] = None
+        self.random_number_table: Optional[Dict] = None
         self.book_info: Dict = {}
+        # Opt-in timers and counters (--profile)
+        self.profile = profile
+        # Illustration ref -> asset store content id (--assets); refs are kept as-is if None
+        self.asset_refs: Optional[Dict[str, str]] = None
 
-    def extract_all(self) -> Dict:
-        """Main extraction method"""
-        print(f"Extracting content from: {self.book_path}")
+    def _phase(self, name: str):
+        """Time a block as an extraction phase when profiling"""
+        return self.profile.phase(name) if self.profile else nullcontext()
 
-        # Extract book metadata
-        self.extract_book_info()
+    def extract_all(self, sections: Optional[Iterator[Optional[Dict]]] = None) -> Dict:
+        """Main extraction method
 
-        # Extract game rules (disciplines, equipment, etc.)
-        self.extract_disciplines()
-        self.extract_equipment_rules()
+        sections, if given, are parse results already scheduled with
+        iter_sections (e.g. on a pool shared by several books).
+        """
+        self.extract_rules()
 
         # Extract all numbered sections
-        self.extract_all_sections()
+        self.extract_all_sections(sections)
 
+        self.save_cache()
         return self.to_dict()
 
+    def extract_stream(self, writer, graph: Optional[GraphBuilder] = None,
+                       index: Optional[IndexBuilder] = None,
+                       sections: Optional[Iterator[Optional[Dict]]] = None,
+                       signatures: Optional['SignatureBuilder'] = None) -> int:
+        """Extract the book, handing each section to writer as soon as it is parsed
+
+        Sections are not kept in self.sections, so memory stays flat no
+        matter how many sections the book has; only their links go into
+        graph, their terms into index and their MinHash signatures into
+        signatures, if given. The extraction cache reads each hit and
+        writes each parse result as its section comes through. sections is as for extract_all. Returns the
+        section count.
+        """
+        self.extract_rules()
+        writer.write_manifest(self.manifest())
+
+        if sections is None:
+            section_files = self.section_files()
+            print(f"Found {len(section_files)} section files")
+            sections = self.iter_sections(section_files)
+
+        with self._phase('sections'):
+            for section_data in sections:
+                if section_data:
+                    writer.write_section(section_data)
+                    if graph:
+                        graph.add_section(section_data)
+                    if index:
+                        index.add_section(section_data)
+                    if signatures:
+                        signatures.add_section(section_data)
+            writer.close()
+
+        print(f"Extracted {writer.count} sections")
+        self.save_cache()
+        return writer.count
+
+    def extract_rules(self):
+        """Extract book metadata and game rules (everything but sections)"""
+        print(f"Extracting content from: {self.book_path}")
+
+        # Extract book metadata
+        with self._phase('book_info'):
+            self.extract_book_info()
+
+        # Extract game rules (disciplines, equipment, etc.)
+        with self._phase('disciplines'):
+            self.extract_disciplines()
+        with self._phase('equipment_rules'):
+            self.extract_equipment_rules()
+        with self._phase('combat_results_table'):
+            self.extract_combat_results_table()
+        with self._phase('random_number_table'):
+            self.extract_random_number_table()
+
+    def save_cache(self):
+        if self.cache:
+            self.cache.save()
+            print(f"Cache: {self.cache.hits} hits, {self.cache.misses} misses")
+
+    def __getstate__(self):
+        # Pool workers never touch the cache, the profile or the book source
+        # (section files are sent with each task); don't ship them
+        state = self.__dict__.copy()
+        state['cache'] = None
+        state['profile'] = None
+        state['source'] = None
+        return state
+
     def extract_book_info(self):
         """Extract book title and basic info from first section"""
-        first_section = self.book_path / "sect1.htm"
-        if not first_section.exists():
-            print(f"Warning: {first_section} not found")
+        first_section = self.source.file("sect1.htm")
+        if first_section is None:
+            print(f"Warning: {self.book_path / 'sect1.htm'} not found")
             return
 
-        with open(first_section, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
+        if self.cache:
+            key = self.cache.key('book_info', first_section)
+            cached = self.cache.get(key)
+            if cached is not _MISS:
+                self.book_info.update(cached)
+                return
+
+        soup = BeautifulSoup(first_section.read_text(encoding='utf-8'), 'html.parser')
 
         # Get book title from header
         header = soup.find('header', id='main-header')
@@ -58,18 +367,30 @@ class LoneWolfExtractor:
             if author_tag:
                 self.book_info['authors'] = author_tag.get_text(strip=True)
 
+        if self.cache:
+            self.cache.put(key, dict(self.book_info))
+
     def extract_disciplines(self):
         """Extract Kai Disciplines from discplnz.htm"""
-        disciplines_file = self.book_path / "discplnz.htm"
-        if not disciplines_file.exists():
-            print(f"Warning: {disciplines_file} not found")
+        disciplines_file = self.source.file("discplnz.htm")
+        if disciplines_file is None:
+            print(f"Warning: {self.book_path / 'discplnz.htm'} not found")
             return
 
-        with open(disciplines_file, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
+        if self.cache:
+            key = self.cache.key('disciplines', disciplines_file)
+            cached = self.cache.get(key)
+            if cached is not _MISS:
+                self.disciplines.extend(cached)
+                print(f"Extracted {len(self.disciplines)} disciplines")
+                return
+
+        soup = BeautifulSoup(disciplines_file.read_text(encoding='utf-8'), 'html.parser')
 
         maintext = soup.find('div', class_='maintext')
         if not maintext:
+            if self.cache:
+                self.cache.put(key, [])
             return
 
         # Find all h4 tags which mark discipline names
@@ -103,51 +424,259 @@ class LoneWolfExtractor:
                 'description': description
             })
 
+        if self.cache:
+            self.cache.put(key, self.disciplines)
+
         print(f"Extracted {len(self.disciplines)} disciplines")
 
     def extract_equipment_rules(self):
-        """Extract equipment rules from equipmnt.htm"""
-        equipment_file = self.book_path / "equipmnt.htm"
-        if not equipment_file.exists():
-            print(f"Warning: {equipment_file} not found")
+        """Extract starting equipment and carry limits from equipmnt.htm
+
+        starting_items has the items every character starts with
+        (guaranteed), the Gold Crowns roll (random_gold: the Random Number
+        Table pick plus min) and either the table picked from for one more
+        item (random_item, keyed by random number) or the list to choose
+        count items from (choose).
+        """
+        equipment_file = self.source.file("equipmnt.htm")
+        if equipment_file is None:
+            print(f"Warning: {self.book_path / 'equipmnt.htm'} not found")
             return
 
-        # Basic equipment rules structure
-        self.equipment_rules = {
-            'starting_items': {
-                'guaranteed': [
-                    {'type': 'weapon', 'name': 'Axe'},
-                    {'type': 'meal', 'quantity': 1},
-                    {'type': 'special_item', 'name': 'Map of Sommerlund'}
-                ]
-            },
-            'carry_limits': {
-                'weapons': 2,
-                'backpack_items': 8,
-                'gold_crowns': 50
-            }
-        }
+        soup = BeautifulSoup(equipment_file.read_text(encoding='utf-8'), 'html.parser')
+        maintext = soup.find('div', class_='maintext')
+        if not maintext:
+            return
 
-        print("Equipment rules extracted")
+        def text_of(tag) -> str:
+            return re.sub(r'\s+', ' ', tag.get_text(' ', strip=True)).replace(' )', ')').replace(' .', '.')
+
+        starting_items: Dict[str, Any] = {'guaranteed': []}
+        guaranteed = starting_items['guaranteed']
+
+        # Opening paragraphs and lists, up to "How to Carry Equipment"
+        intro = []
+        for tag in maintext.find_all(['p', 'ul', 'h4'], recursive=False):
+            if tag.name == 'h4':
+                break
+            intro.append(tag)
+
+        for i, tag in enumerate(intro):
+            if tag.name == 'ul':
+                items = [self.parse_equipment_item(text_of(li)) for li in tag.find_all('li', recursive=False)]
+                lead = text_of(intro[i - 1]) if i else ''
+                count = re.search(r'(?:any|up to) (\w+) of the following', lead)
+                if count:
+                    starting_items['choose'] = {
+                        'count': NUMBER_WORDS.get(count.group(1).lower(), 1),
+                        'items': [item for _, item in items]
+                    }
+                elif all(number is not None for number, _ in items):
+                    starting_items['random_item'] = {str(number): item for number, item in sorted(items)}
+                continue
 
-    def extract_all_sections(self):
+            text = text_of(tag)
+            for match in re.finditer(rf"(?:(\d+) )?({ITEM_NAME}) \(note under ([A-Z][\w ]+?) on", text):
+                guaranteed.append(self.equipment_item(match.group(2), match.group(3), match.group(1)))
+            given = re.search(r'(?:are|is) given (.+?)\.', text)
+            if given:
+                for part in re.split(r', and |, | and ', given.group(1)):
+                    # "a Map of Kalte", not "the choice of the following items"
+                    if not re.match(r'an? ', part) or 'gold' in part.lower():
+                        continue
+                    part = part.split(' ', 1)[1]
+                    name = re.match(ITEM_NAME, part[:1].upper() + part[1:])
+                    if name:
+                        guaranteed.append(self.equipment_item(name.group(0), 'Special Items'))
+            gold = re.search(r'Gold Crowns|pouch of gold', text, re.IGNORECASE)
+            if gold and 'Random Number Table' in text:
+                base = re.search(r'add (\d+) to the number', text)
+                minimum = int(base.group(1)) if base else 0
+                starting_items['random_gold'] = {'min': minimum, 'max': minimum + 9}
+
+        carry_limits = {}
+        for term in maintext.find_all('dt'):
+            definition = term.find_next_sibling('dd')
+            if definition is None:
+                continue
+            heading, text = text_of(term), text_of(definition)
+            if heading in CARRY_LIMITS and CARRY_LIMITS[heading] not in carry_limits:
+                limit = re.search(r'maximum (?:number of \w+ that you may carry is|of) (\w+)', text)
+                if limit and limit.group(1).lower() in NUMBER_WORDS:
+                    carry_limits[CARRY_LIMITS[heading]] = NUMBER_WORDS[limit.group(1).lower()]
+            elif heading == 'Special Items':
+                # Items a book starts you with in its notes on Special Items (book 2)
+                for match in re.finditer(rf"(?:Action Chart a (map)|You begin this section with the ({ITEM_NAME}))", text):
+                    name = match.group(1) or match.group(2)
+                    guaranteed.append(self.equipment_item(name[:1].upper() + name[1:], 'Special Items'))
+
+        self.equipment_rules = {'starting_items': starting_items, 'carry_limits': carry_limits}
+        print(f"Equipment rules extracted ({len(guaranteed)} guaranteed items)")
+
+    @staticmethod
+    def equipment_item(name: str, heading: str, quantity: Optional[str] = None) -> Dict:
+        """Item dict for a name noted under an Action Chart heading"""
+        item_type = EQUIPMENT_TYPES.get(heading, 'backpack_item')
+        words = name.split(' ', 1)
+        if quantity is None and len(words) == 2 and (words[0].isdigit() or words[0].lower() in NUMBER_WORDS):
+            quantity, name = words
+        count = int(quantity) if quantity and quantity.isdigit() else NUMBER_WORDS.get((quantity or '').lower(), 1)
+        if count > 1 and ' of ' in name:
+            # "2 Potions of Laumspur" -> Potion of Laumspur
+            first, rest = name.split(' ', 1)
+            name = f"{first.rstrip('s')} {rest}"
+
+        item: Dict[str, Any] = {'type': item_type}
+        if item_type in ('meal', 'gold'):
+            if name not in ('Meal', 'Meals', 'Gold Crowns'):
+                item['name'] = name
+            item['quantity'] = count
+        else:
+            item['name'] = name
+            if count > 1:
+                item['quantity'] = count
+        return item
+
+    def parse_equipment_item(self, text: str):
+        """(random number or None, item dict) for one starting-item list entry"""
+        match = EQUIPMENT_ITEM.match(text)
+        if not match:
+            return None, {'type': 'backpack_item', 'name': text}
+        item = self.equipment_item(match.group('name'), match.group('heading'))
+        effect = match.group('effect')
+        bonus = re.search(r'adds (\d+) ENDURANCE points', effect)
+        if bonus:
+            item['endurance_bonus'] = int(bonus.group(1))
+        bonus = re.search(r'adds (\d+) points to your COMBAT SKILL', effect)
+        if bonus:
+            item['combat_skill_bonus'] = int(bonus.group(1))
+        restore = re.search(r'restores? (\d+) ENDURANCE points', effect)
+        if restore:
+            item['effect'] = f"+{restore.group(1)} ENDURANCE"
+        number = match.group('number')
+        return (int(number) if number is not None else None), item
+
+    def extract_combat_results_table(self):
+        """Extract the Combat Results Table from crtable.htm"""
+        table = extract_combat_results_table(self.source)
+        if table:
+            self.combat_results_table = table.to_dict()
+            print(f"Combat Results Table extracted ({', '.join(table.source)})")
+
+    def extract_random_number_table(self):
+        """Extract the Random Number Table from random.htm"""
+        table = extract_random_number_table(self.source)
+        if table:
+            self.random_number_table = table.to_dict()
+            print(f"Random Number Table extracted ({table.source})")
+
+    def section_files(self) -> List[Path]:
+        """sect*.htm files (Paths, or in-memory members of an archive) in name order"""
+        return self.source.glob("sect*.htm")
+
+    def extract_all_sections(self, sections: Optional[Iterator[Optional[Dict]]] = None):
         """Extract all numbered sections from sect*.htm files"""
-        section_files = sorted(self.book_path.glob("sect*.htm"))
+        if sections is None:
+            section_files = self.section_files()
+            print(f"Found {len(section_files)} section files")
+            sections = self.iter_sections(section_files)
 
-        print(f"Found {len(section_files)} section files")
-
-        for section_file in section_files:
-            section_data = self.parse_section(section_file)
-            if section_data:
-                section_num = section_data['section']
-                self.sections[str(section_num)] = section_data
+        with self._phase('sections'):
+            for section_data in sections:
+                if section_data:
+                    section_num = section_data['section']
+                    self.sections[str(section_num)] = section_data
 
         print(f"Extracted {len(self.sections)} sections")
 
-    def parse_section(self, section_file: Path) -> Optional[Dict]:
-        """Parse a single section file"""
-        with open(section_file, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
+    def parse_sections(self, section_files: List[Path]) -> List[Optional[Dict]]:
+        """Parse section files, spreading them over a worker pool if jobs > 1"""
+        return list(self.iter_sections(section_files))
+
+    def iter_sections(self, section_files: List[Path],
+                      pool: Optional[ProcessPoolExecutor] = None) -> Iterator[Optional[Dict]]:
+        """Iterate parsed sections in section_files order as they become available
+
+        Results come back in the same order as section_files, so the merged
+        sections dict is identical to a serial run. With a cache, files whose
+        content is unchanged are served from it and only misses are parsed.
+
+        Cache lookups and pool submission happen on the call rather than on
+        first iteration, so several books can be queued on one shared pool
+        (set up with _init_worker) before any of them is consumed. Without a
+        pool, one is started for this call if jobs > 1.
+        """
+        keys: List[Optional[str]] = [None] * len(section_files)
+        hits: List[bool] = [False] * len(section_files)
+
+        if self.cache:
+            kind = f"section:{self.parser}{'+strain' if self.strain else ''}:{self.rules.digest[:12]}"
+            for i, section_file in enumerate(section_files):
+                keys[i] = self.cache.key(kind, section_file)
+                hits[i] = self.cache.contains(keys[i])
+
+        to_parse = [f for f, hit in zip(section_files, hits) if not hit]
+        profile = self.profile
+        if profile:
+            profile.add_cached(len(section_files) - len(to_parse))
+        owned_pool = None
+        workers = min(self.jobs, len(to_parse))
+        if pool is None and workers > 1:
+            pool = owned_pool = ProcessPoolExecutor(max_workers=workers,
+                                                    initializer=_init_worker,
+                                                    initargs=(self,))
+        if pool and to_parse:
+            chunksize = max(1, len(to_parse) // (max(workers, 1) * 4))
+            # Executor.map submits everything now and yields lazily, in submission order
+            parsed = pool.map(_profile_in_worker if profile else _parse_in_worker,
+                              to_parse, chunksize=chunksize)
+        else:
+            parsed = map(self.parse_section_timed if profile else self.parse_section, to_parse)
+
+        return self._collect_sections(section_files, keys, hits, parsed, owned_pool)
+
+    def _collect_sections(self, section_files: List[Path], keys: List[Optional[str]],
+                          hits: List[bool], parsed: Iterator, pool: Optional[ProcessPoolExecutor]):
+        """Merge cache hits (read as they are reached) with parse results, filling the cache with the latter"""
+        profile = self.profile
+        try:
+            for i, hit in enumerate(hits):
+                if hit:
+                    try:
+                        section_data = self.cache.load(keys[i])
+                    except (OSError, ValueError):
+                        # Entry vanished or damaged since the lookup: parse it here
+                        section_data = self.parse_section(section_files[i])
+                        self.cache.put(keys[i], section_data)
+                else:
+                    section_data = next(parsed)
+                    if profile:
+                        section_data, laps = section_data
+                        profile.add_section(section_files[i].name, section_data, laps)
+                    if self.cache:
+                        self.cache.put(keys[i], section_data)
+                if self.asset_refs and section_data:
+                    # A copy, so the cache keeps the source file names
+                    section_data = dict(section_data, illustrations=rewrite_illustrations(
+                        section_data['illustrations'], self.asset_refs))
+                yield section_data
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+
+    def parse_section_timed(self, section_file: Path):
+        """parse_section plus the time spent in each step, as (section, laps)"""
+        timer = SectionTimer()
+        return self.parse_section(section_file, timer), timer.laps
+
+    def parse_section(self, section_file: Path, timer: Optional[SectionTimer] = None) -> Optional[Dict]:
+        """Parse a single section file (timing each step on timer, if given)"""
+        html = section_file.read_text(encoding='utf-8')
+        if timer:
+            timer.lap('read')
+        soup = BeautifulSoup(html, self.parser, parse_only=NUMBERED_ONLY if self.strain else None)
+        if timer:
+            timer.lap('parse')
 
         # Find the numbered div (main section content)
         numbered_div = soup.find('div', class_='numbered')
@@ -168,30 +697,49 @@ class LoneWolfExtractor:
         except ValueError:
             return None
 
-        # Extract narrative text (exclude choices and combat)
-        narrative_parts = []
-        for p in maintext.find_all('p'):
-            # Skip choice paragraphs and combat paragraphs
-            if 'choice' in p.get('class', []) or 'combat' in p.get('class', []):
-                continue
+        # Sort the maintext elements once for all extractors below
+        parts = walk_maintext(maintext)
+        if timer:
+            timer.lap('walk')
 
+        # Extract narrative text (choice and combat paragraphs already excluded)
+        narrative_parts = []
+        for p in parts.narrative:
             text = p.get_text(strip=True)
             if text:
                 narrative_parts.append(text)
 
         narrative = '\n\n'.join(narrative_parts)
+        # Listed items stay out of the narrative ("restores 3 ENDURANCE points"
+        # describes an item, not the section)
+        items = [li.get_text(strip=True) for ul in parts.lists for li in ul.find_all('li')]
+        if timer:
+            timer.lap('narrative')
 
         # Extract choices
-        choices = self.extract_choices(maintext)
+        choices = self.extract_choices(parts)
+        if timer:
+            timer.lap('choices')
 
         # Extract combat encounter
-        combat = self.extract_combat(maintext, narrative)
+        combat = self.extract_combat(parts, narrative)
+        if timer:
+            timer.lap('combat')
+
+        # ENDURANCE gains and losses the narrative states
+        endurance_changes = self.extract_endurance_changes(narrative)
+        if timer:
+            timer.lap('endurance')
 
         # Determine section type
         section_type = self.determine_section_type(choices, combat, narrative)
+        if timer:
+            timer.lap('type')
 
         # Check for illustrations
-        illustrations = self.extract_illustrations(maintext)
+        illustrations = self.extract_illustrations(parts)
+        if timer:
+            timer.lap('illustrations')
 
         section_data = {
             'section': section_num,
@@ -204,14 +752,19 @@ class LoneWolfExtractor:
         if combat:
             section_data['combat'] = combat
 
+        if endurance_changes:
+            section_data['endurance_changes'] = endurance_changes
+
+        if items:
+            section_data['items'] = items
+
         return section_data
 
     def extract_choices(self, maintext) -> List[Dict]:
-        """Extract choice links from section"""
+        """Extract choice links from section (maintext tag or pre-walked SectionParts)"""
         choices = []
-        choice_paragraphs = maintext.find_all('p', class_='choice')
 
-        for p in choice_paragraphs:
+        for p in _as_parts(maintext).choices:
             link = p.find('a')
             if not link:
                 continue
@@ -227,8 +780,9 @@ class LoneWolfExtractor:
                 continue
 
             # Check if this is a conditional choice (requires discipline)
-            is_conditional = self.is_conditional_choice(choice_text)
-            required_discipline = self.extract_required_discipline(choice_text) if is_conditional else None
+            analysis = self.rules.analyze(choice_text)
+            is_conditional = analysis['conditional']
+            required_discipline = analysis['disciplines'][0] if analysis['disciplines'] else None
 
             choice = {
                 'text': choice_text,
@@ -245,39 +799,17 @@ class LoneWolfExtractor:
 
     def is_conditional_choice(self, text: str) -> bool:
         """Check if choice requires a specific discipline"""
-        conditional_patterns = [
-            'If you wish to use your Kai Discipline',
-            'If you have the Kai Discipline',
-            'If you possess',
-            'If you have'
-        ]
-        return any(pattern.lower() in text.lower() for pattern in conditional_patterns)
+        return self.rules.analyze(text)['conditional']
 
     def extract_required_discipline(self, text: str) -> Optional[str]:
         """Extract which discipline is required from choice text"""
-        disciplines_map = {
-            'Sixth Sense': 'sixth_sense',
-            'Camouflage': 'camouflage',
-            'Hunting': 'hunting',
-            'Tracking': 'tracking',
-            'Healing': 'healing',
-            'Weaponskill': 'weaponskill',
-            'Mindshield': 'mindshield',
-            'Mindblast': 'mindblast',
-            'Animal Kinship': 'animal_kinship',
-            'Mind Over Matter': 'mind_over_matter'
-        }
-
-        for disc_name, disc_id in disciplines_map.items():
-            if disc_name in text:
-                return disc_id
-
-        return None
+        disciplines = self.rules.analyze(text)['disciplines']
+        return disciplines[0] if disciplines else None
 
     def extract_combat(self, maintext, narrative: str) -> Optional[Dict]:
         """Extract combat encounter from section"""
         # Look for combat paragraph
-        combat_p = maintext.find('p', class_='combat')
+        combat_p = _as_parts(maintext).combat
         if not combat_p:
             return None
 
@@ -314,35 +846,32 @@ class LoneWolfExtractor:
 
         return combat_data
 
-    def extract_combat_modifiers(self, text: str) -> List[str]:
-        """Extract combat modifiers from text"""
-        modifiers = []
+    def extract_modifiers(self, text: str, stat: str) -> List[Dict]:
+        """Changes to one stat in text, each with its conditions (see RuleEngine.modifier)"""
+        return [{key: value for key, value in modifier.items() if key != 'stat'}
+                for modifier in self.rules.analyze(text)['modifiers'] if modifier['stat'] == stat]
 
-        # Look for common modifier patterns
-        if re.search(r'deduct \d+ points? from your COMBAT SKILL', text, re.IGNORECASE):
-            match = re.search(r'deduct (\d+) points? from your COMBAT SKILL', text, re.IGNORECASE)
-            if match:
-                modifiers.append(f"-{match.group(1)} COMBAT SKILL")
+    def extract_combat_modifiers(self, text: str) -> List[Dict]:
+        """Extract the COMBAT SKILL modifiers for a fight from text"""
+        return self.extract_modifiers(text, 'COMBAT SKILL')
 
-        if re.search(r'add \d+ points? to your COMBAT SKILL', text, re.IGNORECASE):
-            match = re.search(r'add (\d+) points? to your COMBAT SKILL', text, re.IGNORECASE)
-            if match:
-                modifiers.append(f"+{match.group(1)} COMBAT SKILL")
-
-        return modifiers
+    def extract_endurance_changes(self, text: str) -> List[Dict]:
+        """Extract ENDURANCE gains and losses (one-off or per combat round) from text"""
+        return self.extract_modifiers(text, 'ENDURANCE')
 
     def extract_illustrations(self, maintext) -> List[str]:
         """Extract illustration references from section"""
         illustrations = []
+        parts = _as_parts(maintext)
 
         # Look for image tags
-        for img in maintext.find_all('img'):
+        for img in parts.images:
             src = img.get('src', '')
             if src and not src.startswith('http'):
                 illustrations.append(src)
 
         # Look for links to illustration pages
-        for link in maintext.find_all('a'):
+        for link in parts.links:
             href = link.get('href', '')
             if 'ill' in href and '.htm' in href:
                 illustrations.append(href)
@@ -366,34 +895,311 @@ class LoneWolfExtractor:
         else:
             return 'choice'
 
-    def to_dict(self) -> Dict:
-        """Export to dictionary format"""
+    def manifest(self) -> Dict:
+        """Book metadata and rules, i.e. the export without sections"""
         return {
             'series': 'kai',
             'book_number': self.get_book_number(),
             'title': self.book_info.get('title', 'Unknown'),
             'authors': self.book_info.get('authors', ''),
-            'version': '1.0.0',
+            'version': EXTRACTOR_VERSION,
             'disciplines': self.disciplines,
             'equipment_rules': self.equipment_rules,
-            'sections': self.sections
+            'combat_results_table': self.combat_results_table,
+            'random_number_table': self.random_number_table
         }
 
+    def to_dict(self) -> Dict:
+        """Export to dictionary format"""
+        book = self.manifest()
+        book['sections'] = self.sections
+        return book
+
     def get_book_number(self) -> int:
-        """Determine book number from path"""
-        book_codes = {
-            '01fftd': 1,
-            '02fotw': 2,
-            '03tcok': 3,
-            '04tcod': 4,
-            '05sots': 5
+        """Book number from the book code in the path, or else in an archive's book directory"""
+        names = [str(self.book_path)]
+        if isinstance(self.source, ArchiveSource):
+            names.append(self.source.book_dir)
+        for name in names:
+            for code, number in BOOK_CODES.items():
+                if code in name:
+                    return number
+        raise ValueError(f"No book code ({', '.join(BOOK_CODES)}) in {self.book_path} "
+                         f"or the directory holding its sections")
+
+
+def write_book(extractor: LoneWolfExtractor, output_format: str, output_path: Path,
+               sections: Optional[Iterator[Optional[Dict]]] = None) -> Dict:
+    """Extract a book to output_path, with its graph, search index and signatures alongside
+
+    sections is as for LoneWolfExtractor.extract_all. Returns the section
+    count and the paths written. Signatures need NumPy; without it that
+    stage is skipped and 'signatures' is None.
+    """
+    graph_path = graph_path_for(output_path)
+    # Search index next to the book; sections whose text is unchanged keep their postings
+    index_path = index_path_for(output_path)
+    index = IndexBuilder.updating(index_path, extractor.get_book_number())
+    # MinHash signatures for near-duplicate reports, likewise only re-hashed where text changed
+    try:
+        from similarity_index import SignatureBuilder, signatures_path_for
+    except ImportError:
+        print("⚠️  NumPy not installed, skipping similarity signatures")
+        signatures_path = signatures = None
+    else:
+        signatures_path = signatures_path_for(output_path)
+        signatures = SignatureBuilder.updating(signatures_path, extractor.get_book_number())
+
+    if output_format != 'json':
+        # Stream sections straight to disk as they are parsed
+        graph = GraphBuilder()
+        section_count = extractor.extract_stream(open_writer(output_format, output_path),
+                                                 graph, index, sections, signatures)
+        with extractor._phase('graph'):
+            graph.build().save(graph_path)
+        with extractor._phase('search_index'):
+            index.build().save(index_path)
+        if signatures:
+            with extractor._phase('signatures'):
+                signatures.build().save(signatures_path)
+    else:
+        # Extract all content
+        book_data = extractor.extract_all(sections)
+        section_count = len(book_data['sections'])
+
+        # Ensure output directory exists
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to JSON
+        with extractor._phase('write'):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(book_data, f, indent=2, ensure_ascii=False)
+
+        # Choice graph index next to the book (book-N.graph.json)
+        with extractor._phase('graph'):
+            SectionGraph.from_sections(book_data['sections']).save(graph_path)
+        with extractor._phase('search_index'):
+            for section in book_data['sections'].values():
+                index.add_section(section)
+            index.build().save(index_path)
+        if signatures:
+            with extractor._phase('signatures'):
+                for section in book_data['sections'].values():
+                    signatures.add_section(section)
+                signatures.build().save(signatures_path)
+
+    return {
+        'output': output_path,
+        'graph': graph_path,
+        'index': index_path,
+        'signatures': signatures_path,
+        'sections': section_count,
+        'reindexed': index.reindexed,
+        'reused': index.reused,
+        'rehashed': signatures.hashed if signatures else 0
+    }
+
+
+def output_checksum(path: Path) -> str:
+    """sha256 of an output file, or of a shard directory's files in path order"""
+    digest = hashlib.sha256()
+    if path.is_dir():
+        for file in sorted(p for p in path.rglob('*') if p.is_file()):
+            digest.update(file.relative_to(path).as_posix().encode('utf-8') + b'\0')
+            digest.update(file.read_bytes())
+    else:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def store_assets(asset_dir: str, extractors: List[LoneWolfExtractor], jobs: int = 0):
+    """Put the books' images in the asset store and have extractors emit content ids"""
+    for extractor in extractors:
+        if isinstance(extractor.source, ArchiveSource):
+            print(f"Warning: {extractor.book_path}: the asset store reads unpacked book directories; "
+                  f"illustration refs are left as file names")
+    extractors = [e for e in extractors if not isinstance(e.source, ArchiveSource)]
+    if not extractors:
+        return
+    store = AssetStore(asset_dir)
+    refs = store.add_books({e.get_book_number(): e.book_path for e in extractors}, jobs)
+    store.save()
+    for extractor in extractors:
+        extractor.asset_refs = refs[extractor.get_book_number()]
+    stats = store.stats()
+    print(f"🖼️  Assets: {stats['references']} image references -> {stats['unique']} unique "
+          f"in {store.root} ({store.stored} new)")
+
+
+def find_books(source_dir: Path) -> List[Path]:
+    """Book directories (or, failing that, archives such as 01fftd.zip) in BOOK_CODES order"""
+    books = []
+    for code in BOOK_CODES:
+        candidates = [Path(source_dir) / code] + [Path(source_dir) / (code + suffix)
+                                                 for suffix in ARCHIVE_SUFFIXES]
+        found = [path for path in candidates if path.exists()]
+        if found:
+            books.append(found[0])
+    return books
+
+
+def extract_books(source_dir: str, output_format: str = 'json',
+                  output_dir: Path = Path('extracted-content'), jobs: int = 0,
+                  cache_dir: Optional[str] = None, parser: str = 'html.parser',
+                  strain: bool = False, rules_path: Optional[str] = None,
+                  asset_dir: Optional[str] = None) -> Dict:
+    """Extract every book under source_dir on one shared worker pool
+
+    All books' sections are queued before any is consumed, largest book
+    first, so the longest-running book starts at once and the smaller ones
+    fill the remaining workers; wall time approaches that of the largest
+    book rather than the sum. With asset_dir, every book's images go into
+    that asset store first and illustration refs become content ids.
+    Writes BATCH_MANIFEST to output_dir and returns it.
+    """
+    start = time.perf_counter()
+    book_dirs = find_books(source_dir)
+    if not book_dirs:
+        print(f"Warning: no book directories ({', '.join(BOOK_CODES)}) in {source_dir}")
+        return {}
+
+    extractors = [LoneWolfExtractor(str(book_dir), jobs=jobs, cache_dir=cache_dir, parser=parser,
+                                    strain=strain, rules_path=rules_path)
+                  for book_dir in book_dirs]
+    if asset_dir:
+        store_assets(asset_dir, extractors, jobs)
+    books = []
+    for extractor in extractors:
+        files = extractor.section_files()
+        books.append((sum(file_size(f) for f in files), extractor, files))
+    books.sort(key=lambda book: book[0], reverse=True)
+
+    jobs = extractors[0].jobs
+    pool = None
+    if jobs > 1:
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                   initargs=(extractors[0],))
+    print(f"📚 Extracting {len(books)} books on {jobs} worker{'s' if jobs > 1 else ''} "
+          f"({sum(len(files) for _, _, files in books)} section files)")
+
+    entries = []
+    try:
+        pending = [(size, extractor, files, extractor.iter_sections(files, pool))
+                   for size, extractor, files in books]
+        for size, extractor, files, sections in pending:
+            book_start = time.perf_counter()
+            output_path = default_output_path(output_format, extractor.get_book_number(), output_dir)
+            result = write_book(extractor, output_format, output_path, sections)
+            entries.append({
+                'book_number': extractor.get_book_number(),
+                'title': extractor.book_info.get('title', 'Unknown'),
+                'source': str(extractor.book_path),
+                'source_bytes': size,
+                'section_files': len(files),
+                'sections': result['sections'],
+                'output': str(result['output']),
+                'sha256': output_checksum(result['output']),
+                'graph': str(result['graph']),
+                'index': str(result['index']),
+                'signatures': str(result['signatures']) if result['signatures'] else None,
+                'seconds': time.perf_counter() - book_start,
+                'finished_after': time.perf_counter() - start
+            })
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    manifest = {
+        'extractor_version': EXTRACTOR_VERSION,
+        'format': output_format,
+        'jobs': jobs,
+        'source_dir': str(source_dir),
+        'wall_seconds': time.perf_counter() - start,
+        'books': sorted(entries, key=lambda entry: entry['book_number'])
+    }
+    manifest_path = Path(output_dir) / BATCH_MANIFEST
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def benchmark_jobs(book_path: str, jobs: int) -> Dict:
+    """Time serial vs. parallel section extraction and check they match"""
+    section_files = LoneWolfExtractor(book_path).section_files()
+    results = {}
+
+    for label, n_jobs in (('serial', 1), ('parallel', jobs)):
+        extractor = LoneWolfExtractor(book_path, jobs=n_jobs)
+        start = time.perf_counter()
+        sections = extractor.parse_sections(section_files)
+        elapsed = time.perf_counter() - start
+        results[label] = {
+            'jobs': extractor.jobs,
+            'seconds': elapsed,
+            'sections_per_sec': len(section_files) / elapsed if elapsed else 0.0,
+            'output': json.dumps(sections, ensure_ascii=False),
         }
 
-        for code, number in book_codes.items():
-            if code in str(self.book_path):
-                return number
+    identical = results['serial']['output'] == results['parallel']['output']
+    speedup = results['serial']['seconds'] / results['parallel']['seconds']
+
+    print(f"\n⏱️  Section extraction benchmark ({len(section_files)} sections):")
+    for label in ('serial', 'parallel'):
+        r = results[label]
+        print(f"  {label:<8} jobs={r['jobs']:<3} {r['seconds']:.2f}s "
+              f"({r['sections_per_sec']:.0f} sections/sec)")
+    print(f"  Speedup: {speedup:.2f}x")
+    print(f"  Output identical: {'✅ yes' if identical else '❌ NO'}")
+
+    return {
+        'sections': len(section_files),
+        'serial_seconds': results['serial']['seconds'],
+        'parallel_seconds': results['parallel']['seconds'],
+        'parallel_jobs': results['parallel']['jobs'],
+        'speedup': speedup,
+        'identical': identical
+    }
+
+
+def benchmark_parsers(book_path: str) -> List[Dict]:
+    """Per-section parse latency for each parser backend / strainer combination"""
+    section_files = LoneWolfExtractor(book_path).section_files()
+    parsers = [p for p in PARSERS if p != 'lxml' or HAS_LXML]
+    baseline = None
+    results = []
+
+    print(f"\n⏱️  Parser benchmark ({len(section_files)} sections):")
+    for parser in parsers:
+        for strain in (False, True):
+            extractor = LoneWolfExtractor(book_path, parser=parser, strain=strain)
+            timings = []
+            sections = []
+            for section_file in section_files:
+                start = time.perf_counter()
+                sections.append(extractor.parse_section(section_file))
+                timings.append(time.perf_counter() - start)
+
+            output = json.dumps(sections, ensure_ascii=False)
+            if baseline is None:
+                baseline = output
+            timings.sort()
+            result = {
+                'parser': parser,
+                'strain': strain,
+                'mean_ms': 1000 * sum(timings) / len(timings),
+                'p50_ms': 1000 * timings[len(timings) // 2],
+                'p95_ms': 1000 * timings[int(len(timings) * 0.95)],
+                'identical': output == baseline
+            }
+            results.append(result)
+
+            label = f"{parser}{' + strainer' if strain else ''}"
+            print(f"  {label:<24} mean {result['mean_ms']:.2f}ms  "
+                  f"p50 {result['p50_ms']:.2f}ms  p95 {result['p95_ms']:.2f}ms  "
+                  f"{'✅' if result['identical'] else '❌ output differs'}")
 
-        return 1  # default
+    return results
 
 
 def main():
@@ -401,37 +1207,122 @@ def main():
     import argparse
 
     parser = argparse.ArgumentParser(description='Extract Lone Wolf book content')
-    parser.add_argument('book_path', help='Path to book directory (e.g., source-materials/01fftd)')
-    parser.add_argument('-o', '--output', help='Output JSON file path', default=None)
+    parser.add_argument('book_path', nargs='?',
+                        help='Path to book directory or .zip/.tar archive (e.g., source-materials/01fftd)')
+    parser.add_argument('--all', metavar='SOURCE_DIR',
+                        help='Extract every book directory in SOURCE_DIR (01fftd ... 05sots) '
+                             'on one shared worker pool and write ' + BATCH_MANIFEST)
+    parser.add_argument('-o', '--output', default=None,
+                        help='Output JSON file path (with --all: output directory, default extracted-content)')
+    parser.add_argument('--format', choices=FORMATS, default='json',
+                        help='json: one book-N.json; ndjson: manifest line + one line per section; '
+                             'shards: book-N/manifest.json + sections/<n>.json; '
+                             'bundle: indexed binary book-N.lwb (all but json stream)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Worker processes for section parsing (default: 1, 0 = all CPUs; '
+                             'with --all the default is all CPUs)')
+    parser.add_argument('--parser', choices=PARSERS, default='html.parser',
+                        help='BeautifulSoup parser backend (lxml must be installed)')
+    parser.add_argument('--strain', action='store_true',
+                        help='Parse only div.numbered from section files (SoupStrainer)')
+    parser.add_argument('--rules', default=None,
+                        help='Rules file for conditional choices and combat modifiers (default: rules/kai.json)')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'Incremental extraction cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Parse every file, ignoring the extraction cache')
+    parser.add_argument('--clear-cache', action='store_true',
+                        help='Invalidate this book\'s cache before extracting')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Compare serial vs. --jobs section extraction time and exit')
+    parser.add_argument('--benchmark-parsers', action='store_true',
+                        help='Report per-section latency for each parser/strainer combination and exit')
+    parser.add_argument('--assets', metavar='STORE_DIR',
+                        help='Store referenced images in a content-addressed asset store '
+                             'and write illustration refs as content ids (see asset_store.py)')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='Write a JSON profile of phase and parse_section step timings to PATH')
+    parser.add_argument('--profile-mode', choices=CAPTURE_MODES, default='timers',
+                        help='timers only, or add a cProfile function table (+ PATH.prof) or '
+                             'tracemalloc memory capture; captures cover this process only, so use -j 1')
+    parser.add_argument('--profile-top', type=int, default=10,
+                        help='Slowest sections / functions / allocation sites to report (default: 10)')
 
     args = parser.parse_args()
+    if (args.book_path is None) == (args.all is None):
+        parser.error('give either a book_path or --all SOURCE_DIR')
+    if args.jobs is None:
+        args.jobs = 0 if args.all else 1
+    cache_dir = None if args.no_cache else args.cache_dir
+
+    if args.all:
+        if args.benchmark or args.benchmark_parsers or args.profile or args.clear_cache:
+            parser.error('--all cannot be combined with --benchmark, --benchmark-parsers, '
+                         '--profile or --clear-cache')
+        output_dir = Path(args.output) if args.output else Path('extracted-content')
+        manifest = extract_books(args.all, args.format, output_dir, jobs=args.jobs,
+                                 cache_dir=cache_dir, parser=args.parser, strain=args.strain,
+                                 rules_path=args.rules, asset_dir=args.assets)
+        if not manifest:
+            return
+        print(f"\n✅ Extracted {len(manifest['books'])} books in {manifest['wall_seconds']:.2f}s "
+              f"on {manifest['jobs']} worker{'s' if manifest['jobs'] > 1 else ''}")
+        for book in manifest['books']:
+            print(f"  📖 Book {book['book_number']}: {book['sections']} sections -> {book['output']} "
+                  f"(sha256 {book['sha256'][:12]}, done after {book['finished_after']:.2f}s)")
+        print(f"  - Manifest: {output_dir / BATCH_MANIFEST}")
+        return
 
-    # Create extractor
-    extractor = LoneWolfExtractor(args.book_path)
+    if args.benchmark:
+        # Without an explicit --jobs, compare against one worker per CPU
+        benchmark_jobs(args.book_path, args.jobs if args.jobs != 1 else 0)
+        return
+
+    if args.benchmark_parsers:
+        benchmark_parsers(args.book_path)
+        return
 
-    # Extract all content
-    book_data = extractor.extract_all()
+    profile = ExtractionProfile(args.profile_mode, args.profile_top) if args.profile else None
+
+    # Create extractor
+    extractor = LoneWolfExtractor(args.book_path, jobs=args.jobs, cache_dir=cache_dir,
+                                  parser=args.parser, strain=args.strain,
+                                  rules_path=args.rules, profile=profile)
+    if args.clear_cache and extractor.cache:
+        extractor.cache.clear()
+    if args.assets:
+        store_assets(args.assets, [extractor], extractor.jobs)
 
     # Determine output path
     if args.output:
         output_path = Path(args.output)
     else:
-        book_num = book_data['book_number']
-        output_path = Path(f"extracted-content/book-{book_num}.json")
+        output_path = default_output_path(args.format, extractor.get_book_number())
 
-    # Ensure output directory exists
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if profile:
+        profile.start()
 
-    # Write to JSON
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(book_data, f, indent=2, ensure_ascii=False)
+    result = write_book(extractor, args.format, output_path)
 
     print(f"\n✅ Extraction complete!")
     print(f"📊 Stats:")
-    print(f"  - Sections: {len(book_data['sections'])}")
-    print(f"  - Disciplines: {len(book_data['disciplines'])}")
+    print(f"  - Sections: {result['sections']}")
+    print(f"  - Disciplines: {len(extractor.disciplines)}")
     print(f"  - Output: {output_path}")
-
+    print(f"  - Graph index: {result['graph']}")
+    print(f"  - Search index: {result['index']} "
+          f"({result['reindexed']} sections indexed, {result['reused']} unchanged)")
+    if result['signatures']:
+        print(f"  - Similarity signatures: {result['signatures']} ({result['rehashed']} sections hashed)")
+
+    if profile:
+        profile.stop()
+        print_profile(profile.save(args.profile, book=str(args.book_path),
+                                   book_number=extractor.get_book_number(),
+                                   format=args.format, jobs=extractor.jobs,
+                                   parser=extractor.parser, strain=extractor.strain,
+                                   cache=extractor.cache is not None))
+        print(f"  - Profile: {args.profile}")
 
 if __name__ == '__main__':
     main()
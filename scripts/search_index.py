@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Full-text search index for extracted Lone Wolf books
+An inverted index (term -> section -> token positions) over section text,
+choice text and combat enemy names, written by the extractor next to each
+book as book-N.index.json. Supports word, "quoted phrase" and prefix*
+queries across books. Each section's indexed content is hashed, so a
+re-extraction only re-tokenizes sections whose content changed.
+"""
+
+import base64
+import hashlib
+import json
+import re
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+INDEX_VERSION = 1
+
+# The stripped section text runs tagged words together ("yourCOMBAT SKILL",
+# "2ENDURANCEpoints"), so split at case and digit boundaries before lowercasing
+_BOUNDARY = re.compile(r"(?<=[a-z])(?=[A-Z]{2})|(?<=[A-Z]{2})(?=[a-z])|(?<=\d)(?=[^\W\d_])|(?<=[^\W\d_])(?=\d)")
+_TOKEN = re.compile(r"[^\W_]+")
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, as indexed and as matched by queries"""
+    return _TOKEN.findall(_BOUNDARY.sub(' ', text).lower())
+
+
+def section_fields(section: Dict) -> Iterator[str]:
+    """The indexed text of a section: its text, choice texts and enemy name"""
+    yield section.get('text', '')
+    for choice in section.get('choices', []):
+        yield choice.get('text', '')
+    combat = section.get('combat')
+    if combat:
+        yield combat.get('enemy_name', '')
+
+
+def section_terms(section: Dict) -> Dict[str, List[int]]:
+    """term -> positions in the section; phrases never span two fields"""
+    positions: Dict[str, List[int]] = {}
+    position = 0
+    for field in section_fields(section):
+        for token in tokenize(field):
+            positions.setdefault(token, []).append(position)
+            position += 1
+        position += 1
+    return positions
+
+
+def section_digest(section: Dict) -> str:
+    """Hash of a section's indexed content"""
+    content = '\0'.join(section_fields(section))
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+
+
+def _encode_postings(sections: Dict[int, List[int]]) -> str:
+    """{section: [positions]} -> base64 of varint section deltas, counts and position deltas"""
+    out = bytearray()
+
+    def varint(value: int):
+        while value > 0x7F:
+            out.append(value & 0x7F | 0x80)
+            value >>= 7
+        out.append(value)
+
+    previous_section = 0
+    for section in sorted(sections):
+        positions = sections[section]
+        varint(section - previous_section)
+        varint(len(positions))
+        previous_section = section
+        previous = 0
+        for position in positions:
+            varint(position - previous)
+            previous = position
+    return base64.b64encode(out).decode('ascii')
+
+
+def _decode_postings(encoded: str) -> Dict[int, List[int]]:
+    data = base64.b64decode(encoded)
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+
+    sections: Dict[int, List[int]] = {}
+    section = i = 0
+    while i < len(values):
+        section += values[i]
+        count = values[i + 1]
+        positions = []
+        position = 0
+        for delta in values[i + 2:i + 2 + count]:
+            position += delta
+            positions.append(position)
+        sections[section] = positions
+        i += 2 + count
+    return sections
+
+
+class BookIndex:
+    """Postings for one book: term -> {section number: [positions]}
+
+    Loaded posting lists stay encoded until a query first touches the term.
+    """
+
+    def __init__(self, book_number: int, postings: Dict[str, Dict[int, List[int]]],
+                 digests: Dict[int, str], encoded: Optional[Dict[str, str]] = None):
+        self.book_number = book_number
+        self.digests = digests
+        self._postings = postings
+        self._encoded = encoded or {}
+        self._terms: Optional[List[str]] = None
+
+    @property
+    def terms(self) -> List[str]:
+        """Sorted vocabulary (for prefix queries)"""
+        if self._terms is None:
+            self._terms = sorted(set(self._postings) | set(self._encoded))
+        return self._terms
+
+    def postings(self, term: str) -> Dict[int, List[int]]:
+        """{section: [positions]} for a term (empty if not indexed)"""
+        sections = self._postings.get(term)
+        if sections is None:
+            encoded = self._encoded.pop(term, None)
+            if encoded is None:
+                return {}
+            sections = self._postings[term] = _decode_postings(encoded)
+        return sections
+
+    def sections(self, term: str) -> Set[int]:
+        return set(self.postings(term))
+
+    def prefix(self, prefix: str) -> Set[int]:
+        """Sections containing any term that starts with prefix"""
+        terms = self.terms
+        found: Set[int] = set()
+        i = bisect_left(terms, prefix)
+        while i < len(terms) and terms[i].startswith(prefix):
+            found.update(self.postings(terms[i]))
+            i += 1
+        return found
+
+    def phrase(self, tokens: List[str]) -> Set[int]:
+        """Sections where tokens appear consecutively"""
+        lists = [self.postings(token) for token in tokens]
+        if not all(lists):
+            return set()
+        candidates = set(min(lists, key=len))
+        for postings in lists:
+            candidates.intersection_update(postings)
+
+        found = set()
+        for section in candidates:
+            following = [set(postings[section]) for postings in lists[1:]]
+            for start in lists[0][section]:
+                if all(start + offset in positions for offset, positions in enumerate(following, 1)):
+                    found.add(section)
+                    break
+        return found
+
+    def without(self, stale: Set[int]) -> Tuple[Dict[str, Dict[int, List[int]]], Dict[str, str]]:
+        """(decoded, still-encoded) postings with stale sections removed
+
+        Nothing is decoded when there is nothing to remove.
+        """
+        if not stale:
+            return {term: dict(sections) for term, sections in self._postings.items()}, dict(self._encoded)
+        postings = {}
+        for term in self.terms:
+            kept = {n: p for n, p in self.postings(term).items() if n not in stale}
+            if kept:
+                postings[term] = kept
+        return postings, {}
+
+    def to_dict(self) -> Dict:
+        postings = {}
+        for term in self.terms:
+            encoded = self._encoded.get(term)
+            postings[term] = encoded if encoded is not None else _encode_postings(self._postings[term])
+        return {
+            'index_version': INDEX_VERSION,
+            'book_number': self.book_number,
+            'digests': {str(n): self.digests[n] for n in sorted(self.digests)},
+            'postings': postings
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'BookIndex':
+        if data.get('index_version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {data.get('index_version')}")
+        digests = {int(n): digest for n, digest in data.get('digests', {}).items()}
+        return cls(data.get('book_number', 0), {}, digests, dict(data['postings']))
+
+    def save(self, path: Path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: Path) -> 'BookIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+class IndexBuilder:
+    """Builds a BookIndex section by section (works with streamed extraction)
+
+    Given the previous index for the book, sections whose indexed content is
+    unchanged keep their postings and are not re-tokenized.
+    """
+
+    def __init__(self, book_number: int = 0, previous: Optional[BookIndex] = None):
+        self.book_number = book_number
+        self.previous = previous
+        self.digests: Dict[int, str] = {}
+        self.new_terms: Dict[int, Dict[str, List[int]]] = {}
+        self.reused = 0
+        self.reindexed = 0
+
+    @classmethod
+    def updating(cls, index_path: Path, book_number: int = 0) -> 'IndexBuilder':
+        """Builder that reuses the index at index_path if it is readable"""
+        previous = None
+        if Path(index_path).exists():
+            try:
+                previous = BookIndex.load(index_path)
+            except (OSError, ValueError, KeyError):
+                previous = None
+        return cls(book_number, previous)
+
+    def add_section(self, section: Dict):
+        number = section['section']
+        digest = section_digest(section)
+        self.digests[number] = digest
+        if self.previous and self.previous.digests.get(number) == digest:
+            self.reused += 1
+        else:
+            self.new_terms[number] = section_terms(section)
+            self.reindexed += 1
+
+    def build(self) -> BookIndex:
+        postings: Dict[str, Dict[int, List[int]]] = {}
+        encoded: Dict[str, str] = {}
+        if self.previous:
+            # Keep postings of unchanged sections that are still in the book
+            stale = {n for n, digest in self.previous.digests.items()
+                     if self.digests.get(n) != digest}
+            postings, encoded = self.previous.without(stale)
+
+        for number, terms in self.new_terms.items():
+            for term, positions in terms.items():
+                if term in encoded:
+                    postings[term] = _decode_postings(encoded.pop(term))
+                postings.setdefault(term, {})[number] = positions
+        return BookIndex(self.book_number, postings, dict(self.digests), encoded)
+
+
+def index_path_for(book_path: Path) -> Path:
+    """Where the search index for a book output lives (book-N.index.json)"""
+    book_path = Path(book_path)
+    return book_path.with_name(f"{book_path.name.split('.')[0]}.index.json")
+
+
+class SearchIndex:
+    """Queries over the indexes of several books
+
+    A query is a list of clauses that must all match: plain words,
+    "quoted phrases" and prefix* terms, e.g.  "magic spear" gold*
+    """
+
+    def __init__(self, indexes: List[BookIndex]):
+        self.indexes = sorted(indexes, key=lambda index: index.book_number)
+
+    @classmethod
+    def load(cls, content_dir: Path = Path('extracted-content')) -> 'SearchIndex':
+        """Load book-N.index.json for every book-N.json in content_dir"""
+        from book_stream import book_files
+        return cls([BookIndex.load(index_path_for(path)) for path in book_files(content_dir)
+                    if index_path_for(path).exists()])
+
+    @staticmethod
+    def parse(query: str) -> List[Tuple[str, List[str]]]:
+        """Query -> [(kind, tokens)] with kind 'phrase' or 'prefix'"""
+        clauses = []
+        for quoted, word in _QUERY.findall(query):
+            if word.endswith('*'):
+                tokens = tokenize(word[:-1])
+                if len(tokens) == 1:
+                    clauses.append(('prefix', tokens))
+                    continue
+                # Prefix of a multi-token word: match the leading tokens as a phrase
+                word = word[:-1]
+            tokens = tokenize(quoted or word)
+            if tokens:
+                clauses.append(('phrase', tokens))
+        return clauses
+
+    def search(self, query: str) -> List[Tuple[int, int]]:
+        """(book number, section number) of sections matching every clause"""
+        clauses = self.parse(query)
+        if not clauses:
+            return []
+        hits = []
+        for index in self.indexes:
+            matched: Optional[Set[int]] = None
+            for kind, tokens in clauses:
+                if kind == 'prefix':
+                    sections = index.prefix(tokens[0])
+                elif len(tokens) == 1:
+                    sections = index.sections(tokens[0])
+                else:
+                    sections = index.phrase(tokens)
+                matched = sections if matched is None else matched & sections
+                if not matched:
+                    break
+            hits.extend((index.book_number, section) for section in sorted(matched or ()))
+        return hits
+
+
+def build_index(book_path: Path, index_path: Optional[Path] = None) -> IndexBuilder:
+    """(Re)index a book output in any format, reusing its previous index"""
+    from book_stream import load_book
+
+    book = load_book(book_path)
+    index_path = index_path or index_path_for(book_path)
+    builder = IndexBuilder.updating(index_path, book.get('book_number', 0))
+    for section in book['sections'].values():
+        builder.add_section(section)
+    builder.build().save(index_path)
+    return builder
+
+
+def snippet(text: str, tokens: List[str], width: int = 60) -> str:
+    """Text around the first occurrence of the first token"""
+    match = re.search(re.escape(tokens[0]), text, re.IGNORECASE) if tokens else None
+    start = max(0, match.start() - width // 2) if match else 0
+    return ('…' if start else '') + text[start:start + width].replace('\n', ' ') + '…'
+
+
+def main():
+    """Search extracted books"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Full-text search over extracted books')
+    parser.add_argument('query', nargs='?', help='Words, "quoted phrases" and prefix* terms')
+    parser.add_argument('--content-dir', default='extracted-content',
+                        help='Directory with book-N.json files (default: extracted-content)')
+    parser.add_argument('--build', action='store_true',
+                        help='(Re)build book-N.index.json for every book first')
+    parser.add_argument('--limit', type=int, default=20, help='Hits to show (default: 20)')
+    parser.add_argument('--benchmark', action='store_true', help='Time sample queries')
+
+    args = parser.parse_args()
+    content_dir = Path(args.content_dir)
+
+    if args.build:
+        from book_stream import book_files
+        for path in book_files(content_dir):
+            builder = build_index(path)
+            print(f"🔎 {index_path_for(path).name}: {builder.reindexed} sections indexed, "
+                  f"{builder.reused} unchanged")
+
+    start = time.perf_counter()
+    index = SearchIndex.load(content_dir)
+    load_ms = (time.perf_counter() - start) * 1000
+    if not index.indexes:
+        print("❌ No book-N.index.json files found (run with --build or re-extract)")
+        return
+
+    if args.benchmark:
+        queries = ['kraan', 'gold', '"magic spear"', '"turn to 141"', 'vordak*', 'sixth sense',
+                   '"kai discipline of tracking"', 'sommer*']
+        print(f"\n⏱️  Loaded {len(index.indexes)} indexes in {load_ms:.1f}ms")
+        for query in queries:
+            repeat = 1000
+            start = time.perf_counter()
+            for _ in range(repeat):
+                hits = index.search(query)
+            elapsed = (time.perf_counter() - start) / repeat
+            print(f"  {query:<30} {len(hits):>5} hits  {elapsed * 1e6:>8.1f}µs")
+
+    if not args.query:
+        return
+
+    from book_store import BookStore
+    hits = index.search(args.query)
+    tokens = [t for _, clause in SearchIndex.parse(args.query) for t in clause]
+    print(f"\n🔎 {len(hits)} sections match {args.query}")
+    with BookStore(str(content_dir)) as store:
+        for book_number, section_number in hits[:args.limit]:
+            section = store.section(book_number, section_number) or {}
+            print(f"  Book {book_number} §{section_number:<4} {snippet(section.get('text', ''), tokens)}")
+    if len(hits) > args.limit:
+        print(f"  ... and {len(hits) - args.limit} more")
+
+
+if __name__ == '__main__':
+    main()
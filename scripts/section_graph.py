@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Section graph index for extracted Lone Wolf books
+Stores each book's choice graph as CSR integer arrays (plus the reverse
+index) so reachability, orphan, dead-end-cycle and shortest-path queries
+run in linear time. The extractor writes it next to the book as
+book-N.graph.json.
+"""
+
+import json
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+GRAPH_VERSION = 1
+
+
+class GraphBuilder:
+    """Accumulates edges section by section (works with streamed extraction)"""
+
+    def __init__(self):
+        self.edges: Dict[int, List[int]] = {}
+        self.types: Dict[int, str] = {}
+
+    def add_section(self, section: Dict):
+        number = section['section']
+        self.edges[number] = [c['target'] for c in section.get('choices', []) if c.get('target')]
+        self.types[number] = section.get('type', '')
+
+    def build(self) -> 'SectionGraph':
+        numbers = sorted(self.edges)
+        victory = [n for n in numbers if self.types[n] == 'victory']
+        # The books end on their last section when no section is typed victory
+        victory_section = victory[0] if victory else (numbers[-1] if numbers else 0)
+
+        index = {number: i for i, number in enumerate(numbers)}
+        offsets = array('i', [0])
+        targets = array('i')
+        missing = 0
+        for number in numbers:
+            for target in self.edges[number]:
+                if target in index:
+                    targets.append(index[target])
+                else:
+                    missing += 1
+            offsets.append(len(targets))
+
+        return SectionGraph(array('i', numbers), offsets, targets, victory_section, missing)
+
+
+class SectionGraph:
+    """CSR adjacency over a book's sections, with a reverse index
+
+    Nodes are positions in the sorted section number array; offsets[i] to
+    offsets[i + 1] delimits node i's targets (and likewise for the reverse
+    arrays and its sources).
+    """
+
+    def __init__(self, numbers: array, offsets: array, targets: array,
+                 victory_section: int, missing_targets: int = 0):
+        self.numbers = numbers
+        self.offsets = offsets
+        self.targets = targets
+        self.victory_section = victory_section
+        self.missing_targets = missing_targets
+        self.reverse_offsets, self.reverse_sources = self._reverse()
+
+        # Section numbers are normally 1..N, so index = number - first
+        first = numbers[0] if numbers else 0
+        self._contiguous = len(numbers) == 0 or numbers[-1] - first + 1 == len(numbers)
+        self._first = first
+        self._index = None if self._contiguous else {n: i for i, n in enumerate(numbers)}
+
+    @classmethod
+    def from_sections(cls, sections: Dict[str, Dict]) -> 'SectionGraph':
+        builder = GraphBuilder()
+        for section in sections.values():
+            builder.add_section(section)
+        return builder.build()
+
+    def _reverse(self):
+        n = len(self.numbers)
+        counts = array('i', [0]) * (n + 1)
+        for target in self.targets:
+            counts[target + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        reverse_offsets = array('i', counts)
+        fill = array('i', counts[:n])
+        sources = array('i', [0]) * len(self.targets)
+        for node in range(n):
+            for k in range(self.offsets[node], self.offsets[node + 1]):
+                target = self.targets[k]
+                sources[fill[target]] = node
+                fill[target] += 1
+        return reverse_offsets, sources
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def node(self, section_number: int) -> Optional[int]:
+        """Node index of a section number, or None"""
+        if self._contiguous:
+            i = section_number - self._first
+            return i if 0 <= i < len(self.numbers) else None
+        return self._index.get(section_number)
+
+    def successors(self, section_number: int) -> List[int]:
+        i = self.node(section_number)
+        if i is None:
+            return []
+        return [self.numbers[t] for t in self.targets[self.offsets[i]:self.offsets[i + 1]]]
+
+    def predecessors(self, section_number: int) -> List[int]:
+        i = self.node(section_number)
+        if i is None:
+            return []
+        return [self.numbers[s] for s in
+                self.reverse_sources[self.reverse_offsets[i]:self.reverse_offsets[i + 1]]]
+
+    def in_degrees(self) -> Dict[int, int]:
+        """In-degree of every section"""
+        ro = self.reverse_offsets
+        return {number: ro[i + 1] - ro[i] for i, number in enumerate(self.numbers)}
+
+    def _reach(self, start_nodes: Iterable[int], offsets: array, edges: array) -> bytearray:
+        seen = bytearray(len(self.numbers))
+        queue = deque()
+        for node in start_nodes:
+            if node is not None and not seen[node]:
+                seen[node] = 1
+                queue.append(node)
+        while queue:
+            node = queue.popleft()
+            for k in range(offsets[node], offsets[node + 1]):
+                nxt = edges[k]
+                if not seen[nxt]:
+                    seen[nxt] = 1
+                    queue.append(nxt)
+        return seen
+
+    def reachable(self, start: int = 1) -> List[int]:
+        seen = self._reach([self.node(start)], self.offsets, self.targets)
+        return [n for n, flag in zip(self.numbers, seen) if flag]
+
+    def unreachable(self, start: int = 1) -> List[int]:
+        """Sections no path from start leads to"""
+        seen = self._reach([self.node(start)], self.offsets, self.targets)
+        return [n for n, flag in zip(self.numbers, seen) if not flag]
+
+    def can_reach(self, goal: int) -> List[int]:
+        """Sections with some path to goal (reverse search)"""
+        seen = self._reach([self.node(goal)], self.reverse_offsets, self.reverse_sources)
+        return [n for n, flag in zip(self.numbers, seen) if flag]
+
+    def orphaned(self, start: int = 1) -> List[int]:
+        """Sections no choice points to (other than the start section)"""
+        ro = self.reverse_offsets
+        return [n for i, n in enumerate(self.numbers) if ro[i + 1] == ro[i] and n != start]
+
+    def shortest_path(self, start: int = 1, goal: Optional[int] = None) -> Optional[List[int]]:
+        """Fewest-choices path from start to goal (default: the victory section)"""
+        goal = self.victory_section if goal is None else goal
+        start_node, goal_node = self.node(start), self.node(goal)
+        if start_node is None or goal_node is None:
+            return None
+
+        parent = array('i', [-1]) * len(self.numbers)
+        parent[start_node] = start_node
+        queue = deque([start_node])
+        while queue:
+            node = queue.popleft()
+            if node == goal_node:
+                break
+            for k in range(self.offsets[node], self.offsets[node + 1]):
+                nxt = self.targets[k]
+                if parent[nxt] == -1:
+                    parent[nxt] = node
+                    queue.append(nxt)
+
+        if parent[goal_node] == -1:
+            return None
+        path = [goal_node]
+        while path[-1] != start_node:
+            path.append(parent[path[-1]])
+        return [self.numbers[i] for i in reversed(path)]
+
+    def dead_end_cycles(self) -> List[List[int]]:
+        """Cycles with no way out: strongly connected components that have no
+        edge leaving them and are real loops (more than one section, or a
+        section that points to itself). Iterative Tarjan, linear time.
+        """
+        n = len(self.numbers)
+        offsets, targets = self.offsets, self.targets
+        index_of = array('i', [-1]) * n
+        lowlink = array('i', [0]) * n
+        on_stack = bytearray(n)
+        component = array('i', [-1]) * n
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        for root in range(n):
+            if index_of[root] != -1:
+                continue
+            work = [(root, offsets[root])]
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            while work:
+                node, k = work[-1]
+                if k < offsets[node + 1]:
+                    work[-1] = (node, k + 1)
+                    nxt = targets[k]
+                    if index_of[nxt] == -1:
+                        index_of[nxt] = lowlink[nxt] = counter
+                        counter += 1
+                        stack.append(nxt)
+                        on_stack[nxt] = 1
+                        work.append((nxt, offsets[nxt]))
+                    elif on_stack[nxt]:
+                        lowlink[node] = min(lowlink[node], index_of[nxt])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component[member] = len(components)
+                        members.append(member)
+                        if member == node:
+                            break
+                    components.append(members)
+
+        cycles = []
+        for c, members in enumerate(components):
+            exits = False
+            self_loop = False
+            for node in members:
+                for k in range(offsets[node], offsets[node + 1]):
+                    if component[targets[k]] != c:
+                        exits = True
+                    elif targets[k] == node:
+                        self_loop = True
+            if not exits and (len(members) > 1 or self_loop):
+                cycles.append(sorted(self.numbers[i] for i in members))
+        return sorted(cycles)
+
+    def to_dict(self) -> Dict:
+        return {
+            'graph_version': GRAPH_VERSION,
+            'victory_section': self.victory_section,
+            'missing_targets': self.missing_targets,
+            'numbers': self.numbers.tolist(),
+            'offsets': self.offsets.tolist(),
+            'targets': self.targets.tolist(),
+            'reverse_offsets': self.reverse_offsets.tolist(),
+            'reverse_sources': self.reverse_sources.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SectionGraph':
+        if data.get('graph_version') != GRAPH_VERSION:
+            raise ValueError(f"Unsupported graph version: {data.get('graph_version')}")
+        return cls(array('i', data['numbers']), array('i', data['offsets']),
+                   array('i', data['targets']), data['victory_section'],
+                   data.get('missing_targets', 0))
+
+    def save(self, path: Path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: Path) -> 'SectionGraph':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def graph_path_for(book_path: Path) -> Path:
+    """Where the graph index for a book output lives (book-N.graph.json)"""
+    book_path = Path(book_path)
+    return book_path.with_name(f"{book_path.name.split('.')[0]}.graph.json")
+
+
+def main():
+    """Report graph queries for extracted books"""
+    import argparse
+    from book_stream import book_files, load_book
+
+    parser = argparse.ArgumentParser(description='Section graph queries for extracted books')
+    parser.add_argument('books', nargs='*', help='Book files (default: extracted-content/book-N.json)')
+    parser.add_argument('--build', action='store_true',
+                        help='(Re)write book-N.graph.json next to each book')
+
+    args = parser.parse_args()
+    paths = [Path(p) for p in args.books] or book_files(Path('extracted-content'))
+
+    for path in paths:
+        graph = SectionGraph.from_sections(load_book(path)['sections'])
+        if args.build:
+            graph.save(graph_path_for(path))
+
+        path_to_victory = graph.shortest_path()
+        print(f"\n📖 {path.name}: {len(graph)} sections, {len(graph.targets)} links, "
+              f"victory section {graph.victory_section}")
+        print(f"  Unreachable from 1: {graph.unreachable()}")
+        print(f"  Orphaned (in-degree 0): {graph.orphaned()}")
+        print(f"  Dead-end cycles: {graph.dead_end_cycles()}")
+        if path_to_victory:
+            print(f"  Shortest path to victory: {len(path_to_victory) - 1} choices")
+        else:
+            print("  Shortest path to victory: ❌ not reachable")
+
+
+if __name__ == '__main__':
+    main()
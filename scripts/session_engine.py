@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Playthrough session engine for extracted Lone Wolf books
+Compiles a book once into per-section choice tables whose requirements
+are bitmasks (Kai Disciplines in the low bits, items the book's choices
+ask for above them), so the choices open to a character are a mask test
+per choice. Character state is a small slotted Session of plain ints that
+packs into SESSION_STRUCT.size bytes, which keeps tens of thousands of
+live sessions per process cheap to hold, advance and serialize.
+
+Only `requires` disciplines and "If you possess / have <item>" items gate
+choices; gold and "if you do not possess" conditions are treated as open.
+Items match by item_key(), so "Captain D’Val’s sword" in a choice is the
+Captain D’Val’s Sword a session picks up.
+Extracted COMBAT SKILL modifiers and ENDURANCE changes apply with their
+rounds and cancelling disciplines; ones with a text condition are skipped.
+"""
+
+import random
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from combat_sim import MAX_ROUNDS
+from combat_table import CombatResultsTable
+from route_solver import LOADOUT_SIZE, discipline_ids
+from rule_engine import RuleEngine
+
+# Item bits start above the discipline bits in a requirement mask
+ITEM_SHIFT = 16
+MAX_ITEMS = 64
+
+ITEM_KINDS = ('weapon', 'backpack', 'special')
+
+# equipment_rules item type -> item kind
+ITEM_TYPE_KINDS = {'weapon': 'weapon', 'backpack_item': 'backpack', 'special_item': 'special'}
+
+# section, COMBAT SKILL, ENDURANCE, max ENDURANCE, disciplines, gold, meals, items
+SESSION_STRUCT = struct.Struct('<HBBBHBBQ')
+
+# Kai rules: Mindblast adds 2 COMBAT SKILL; Healing restores 1 ENDURANCE per
+# section without combat
+MINDBLAST_BONUS = 2
+
+DEFAULT_CARRY_LIMITS = {'weapons': 2, 'backpack_items': 8, 'gold_crowns': 50}
+
+
+class Session:
+    """One character's progress through a book"""
+
+    __slots__ = ('section', 'combat_skill', 'endurance', 'max_endurance',
+                 'disciplines', 'gold', 'meals', 'items')
+
+    def __init__(self, section: int, combat_skill: int, endurance: int, max_endurance: int,
+                 disciplines: int, gold: int = 0, meals: int = 0, items: int = 0):
+        self.section = section
+        self.combat_skill = combat_skill
+        self.endurance = endurance
+        self.max_endurance = max_endurance
+        self.disciplines = disciplines
+        self.gold = gold
+        self.meals = meals
+        self.items = items
+
+    @property
+    def alive(self) -> bool:
+        return self.endurance > 0
+
+    def dumps(self) -> bytes:
+        return SESSION_STRUCT.pack(self.section, self.combat_skill, self.endurance, self.max_endurance,
+                                   self.disciplines, self.gold, self.meals, self.items)
+
+    @classmethod
+    def loads(cls, data: bytes, offset: int = 0) -> 'Session':
+        return cls(*SESSION_STRUCT.unpack_from(data, offset))
+
+
+def dump_sessions(sessions: Iterable[Session]) -> bytes:
+    """Sessions packed back to back"""
+    return b''.join(session.dumps() for session in sessions)
+
+
+def load_sessions(data: bytes) -> List[Session]:
+    return [Session(*fields) for fields in SESSION_STRUCT.iter_unpack(data)]
+
+
+def item_key(name: str) -> str:
+    """Name an item is matched by: case, apostrophe style and spacing ignored"""
+    return ' '.join(name.replace('’', "'").casefold().split())
+
+
+def obtainable_items(book: Dict, rules: RuleEngine) -> Set[str]:
+    """item_key of every name a book could hand a character
+
+    Names come from the starting equipment, the sections' item lists, the
+    text outside "If you possess ..." choices and the rules' implicit_items.
+    Each counts for its trailing words too, with or without a trailing
+    lowercase word ("The Sommerswerd glows" provides "Sommerswerd"), but
+    never for a leading part: "Captain D’Val’s Sword" does not provide
+    "Captain D’Val’s".
+    """
+    starting = (book.get('equipment_rules') or {}).get('starting_items', {})
+    texts = [item.get('name', '') for item in starting.get('guaranteed', [])]
+    texts += [item.get('name', '') for item in (starting.get('random_item') or {}).values()]
+    texts += [item.get('name', '') for item in (starting.get('choose') or {}).get('items', [])]
+    for section in book.get('sections', {}).values():
+        texts.append(section.get('text', ''))
+        texts.extend(section.get('items', []))
+        texts.extend(choice.get('text', '') for choice in section.get('choices', [])
+                     if not choice.get('conditional'))
+
+    obtainable = {item_key(name) for name in rules.implicit_items}
+    for text in texts:
+        for name in rules.item_names(text):
+            words = item_key(name).split()
+            obtainable.update(' '.join(words[i:]) for i in range(len(words)))
+            if len(words) > 1 and name.split()[-1].islower():
+                obtainable.update(' '.join(words[i:-1]) for i in range(len(words) - 1))
+    return obtainable
+
+
+class SessionEngine:
+    """Choice resolution, inventory and combat for sessions in one book
+
+    choices[section] is a tuple of (target, need, any_of) per choice:
+    the choice is open when the session's have-mask contains all of need
+    and, if any_of is set, at least one of any_of ("a Dagger or a Bone
+    Sword").
+    """
+
+    def __init__(self, book: Dict, disciplines: List[str], rules: Optional[RuleEngine] = None):
+        rules = rules or RuleEngine.load()
+        self.book_number = book.get('book_number')
+        self.disciplines = disciplines
+        self.discipline_bit = {d: 1 << i for i, d in enumerate(disciplines)}
+        self.items: List[str] = []
+        # item_key -> bit; items holds each item's name as first seen
+        self.item_bit: Dict[str, int] = {}
+        # Items of each kind, as masks over the session's items
+        self.kind_mask = dict.fromkeys(ITEM_KINDS, 0)
+        equipment = book.get('equipment_rules') or {}
+        self.carry_limits = dict(DEFAULT_CARRY_LIMITS, **equipment.get('carry_limits', {}))
+        self.starting_items = equipment.get('starting_items', {}).get('guaranteed', [])
+
+        sections = book.get('sections', {})
+        size = max((int(n) for n in sections), default=0) + 1
+        self.choices: List[Tuple] = [()] * size
+        # combat[section]: (enemy CS, enemy EP, COMBAT SKILL modifiers, per-round ENDURANCE losses)
+        self.combat: List[Optional[Tuple]] = [None] * size
+        self.endurance_changes: List[Tuple] = [()] * size
+        for section in sections.values():
+            number = section['section']
+            compiled = []
+            for choice in section.get('choices', []):
+                target = choice.get('target')
+                if not target or str(target) not in sections:
+                    continue
+                need, any_of = self._requirement(choice, rules)
+                compiled.append((target, need, any_of))
+            self.choices[number] = tuple(compiled)
+            changes = section.get('endurance_changes', [])
+            self.endurance_changes[number] = self._modifiers(c for c in changes if not c.get('every_round'))
+            combat = section.get('combat')
+            if combat:
+                # Per-round ENDURANCE losses of the section belong to its fight
+                self.combat[number] = (combat['combat_skill'], combat['endurance'],
+                                       self._round_modifiers(combat.get('modifiers', [])),
+                                       self._modifiers(c for c in changes if c.get('every_round')))
+
+        # Items registered so far are the ones choices ask for
+        self.gating_items = tuple(self.items)
+
+        table = book.get('combat_results_table')
+        self.table = CombatResultsTable.from_dict(table) if table else CombatResultsTable.kai()
+
+    def _requirement(self, choice: Dict, rules: RuleEngine) -> Tuple[int, int]:
+        """(all-of mask, any-of mask) a choice needs"""
+        need = self.discipline_bit.get(choice.get('requires'), 0)
+        if not choice.get('conditional'):
+            return need, 0
+        text = choice.get('text', '')
+        items = rules.analyze(text)['items']
+        if len(items) > 1 and f"{items[0]} or " in text:
+            return need, sum(self._item(name) for name in items) << ITEM_SHIFT
+        return need | sum(self._item(name) for name in items) << ITEM_SHIFT, 0
+
+    def _modifiers(self, modifiers: Iterable[Dict]) -> Tuple[Tuple[int, int], ...]:
+        """(value, mask of the discipline that cancels it) per modifier without a text condition"""
+        return tuple((m['value'], self.discipline_bit.get(m.get('unless'), 0))
+                     for m in modifiers if 'condition' not in m)
+
+    def _round_modifiers(self, modifiers: List[Dict]) -> Tuple[Tuple[int, int, int, int], ...]:
+        """(first round, last round, value, unless mask) per COMBAT SKILL modifier without a text condition"""
+        compiled = []
+        for modifier in modifiers:
+            if 'condition' in modifier:
+                continue
+            first, last = modifier.get('rounds') or (1, None)
+            compiled.append((first, last or MAX_ROUNDS, modifier['value'],
+                             self.discipline_bit.get(modifier.get('unless'), 0)))
+        return tuple(compiled)
+
+    def _item(self, name: str, kind: Optional[str] = None) -> int:
+        """Bit of an item (among session.items), registering it on first sight"""
+        key = item_key(name)
+        bit = self.item_bit.get(key)
+        if bit is None:
+            if len(self.items) == MAX_ITEMS:
+                raise ValueError(f"Book {self.book_number} has more than {MAX_ITEMS} distinct items")
+            bit = self.item_bit[key] = 1 << len(self.items)
+            self.items.append(name)
+        if kind and not any(mask & bit for mask in self.kind_mask.values()):
+            self.kind_mask[kind] |= bit
+        return bit
+
+    def unobtainable(self, obtainable: Set[str]) -> List[str]:
+        """Gating items missing from obtainable (item keys, see obtainable_items)
+
+        Also names cut off at a possessive ("Captain D’Val’s"), which no item
+        has: the text mentions the Captain, so obtainable would hold them.
+        """
+        return [name for name in self.gating_items
+                if item_key(name) not in obtainable or item_key(name).endswith("'s")]
+
+    def new_session(self, disciplines: Iterable[str], combat_skill: int, endurance: int,
+                    gold: int = 0, start: int = 1) -> Session:
+        """A character at start with the book's guaranteed starting equipment"""
+        mask = 0
+        for discipline in disciplines:
+            mask |= self.discipline_bit[discipline]
+        session = Session(start, combat_skill, endurance, endurance, mask)
+        for item in self.starting_items:
+            if item.get('type') == 'meal':
+                self.take_meal(session, item.get('quantity', 1))
+            elif item.get('type') == 'gold':
+                self.add_gold(session, item.get('quantity', 0))
+            elif item.get('name'):
+                self.take_item(session, item['name'], ITEM_TYPE_KINDS.get(item.get('type'), 'backpack'))
+        self.add_gold(session, gold)
+        return session
+
+    def available(self, session: Session) -> List[int]:
+        """Targets of the choices open to session in its current section"""
+        have = session.disciplines | session.items << ITEM_SHIFT
+        return [target for target, need, any_of in self.choices[session.section]
+                if have & need == need and (not any_of or have & any_of)]
+
+    def advance(self, session: Session, target: int, check: bool = True):
+        """Move session to target, applying its ENDURANCE changes and Healing on arrival
+
+        With check, raises ValueError unless target is an open choice.
+        """
+        if check and (not session.alive or target not in self.available(session)):
+            raise ValueError(f"Section {target} is not open from section {session.section}")
+        session.section = target
+        for value, unless in self.endurance_changes[target]:
+            if not session.disciplines & unless:
+                session.endurance = max(min(session.endurance + value, session.max_endurance), 0)
+        if (self.combat[target] is None and session.endurance < session.max_endurance
+                and session.disciplines & self.discipline_bit.get('healing', 0)):
+            session.endurance += 1
+
+    def fight(self, session: Session, rng: random.Random, max_rounds: int = MAX_ROUNDS) -> bool:
+        """Fight the current section's enemy to the end; True if Lone Wolf survives"""
+        combat = self.combat[session.section]
+        if combat is None:
+            return session.alive
+        enemy_cs, enemy_ep, modifiers, drains = combat
+        have = session.disciplines
+        ratio = session.combat_skill - enemy_cs
+        if have & self.discipline_bit.get('mindblast', 0):
+            ratio += MINDBLAST_BONUS
+        modifiers = [(first, last, value) for first, last, value, unless in modifiers if not have & unless]
+        drain = -sum(value for value, unless in drains if not have & unless)
+        resolve = self.table.resolve
+        endurance = session.endurance
+        for number in range(1, max_rounds + 1):
+            modifier = sum(value for first, last, value in modifiers if first <= number <= last)
+            result = resolve(ratio + modifier, rng.randrange(10))
+            enemy_ep = 0 if result.enemy_killed else enemy_ep - result.enemy_loss
+            endurance = 0 if result.lone_wolf_killed else endurance - result.lone_wolf_loss - drain
+            if enemy_ep <= 0 or endurance <= 0:
+                break
+        session.endurance = max(endurance, 0)
+        return session.alive
+
+    def has_item(self, session: Session, name: str) -> bool:
+        return bool(session.items & self.item_bit.get(item_key(name), 0))
+
+    def take_item(self, session: Session, name: str, kind: str = 'backpack') -> bool:
+        """Add an item if carry limits allow; False if it is refused"""
+        if kind not in ITEM_KINDS:
+            raise ValueError(f"Unknown item kind: {kind}")
+        bit = self._item(name, kind)
+        if session.items & bit:
+            return False
+        if bit & self.kind_mask['weapon']:
+            if bin(session.items & self.kind_mask['weapon']).count('1') >= self.carry_limits['weapons']:
+                return False
+        elif bit & self.kind_mask['backpack']:
+            if self.backpack_count(session) >= self.carry_limits['backpack_items']:
+                return False
+        session.items |= bit
+        return True
+
+    def drop_item(self, session: Session, name: str):
+        session.items &= ~self.item_bit.get(item_key(name), 0)
+
+    def backpack_count(self, session: Session) -> int:
+        """Backpack items carried, Meals included"""
+        return bin(session.items & self.kind_mask['backpack']).count('1') + session.meals
+
+    def take_meal(self, session: Session, quantity: int = 1) -> int:
+        """Add Meals up to the backpack limit; returns how many fit"""
+        taken = max(0, min(quantity, self.carry_limits['backpack_items'] - self.backpack_count(session)))
+        session.meals += taken
+        return taken
+
+    def add_gold(self, session: Session, amount: int) -> int:
+        """Add (or, if negative, spend) Gold Crowns within the belt pouch limit; returns the change"""
+        gold = min(max(session.gold + amount, 0), self.carry_limits['gold_crowns'])
+        change = gold - session.gold
+        session.gold = gold
+        return change
+
+
+def benchmark(engine: SessionEngine, sessions: int = 50000, steps: int = 20,
+              fights: bool = False, seed: int = 1) -> Dict:
+    """Random walks for many concurrent sessions: transitions/sec and bytes per session"""
+    import tracemalloc
+
+    rng = random.Random(seed)
+    loadouts = [rng.sample(engine.disciplines, LOADOUT_SIZE) for _ in range(64)]
+
+    def fresh() -> Session:
+        return engine.new_session(rng.choice(loadouts), 10 + rng.randrange(10),
+                                  20 + rng.randrange(10), gold=rng.randrange(10))
+
+    tracemalloc.start()
+    live = [fresh() for _ in range(sessions)]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    transitions = restarts = 0
+    available, advance, fight, choice = engine.available, engine.advance, engine.fight, rng.choice
+    start = time.perf_counter()
+    for _ in range(steps):
+        for i, session in enumerate(live):
+            open_choices = available(session)
+            if not open_choices or not session.alive:
+                live[i] = fresh()
+                restarts += 1
+                continue
+            advance(session, choice(open_choices), check=False)
+            if fights and engine.combat[session.section]:
+                fight(session, rng)
+            transitions += 1
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    packed = dump_sessions(live)
+    restored = load_sessions(packed)
+    serialize = time.perf_counter() - start
+    assert [s.dumps() for s in restored] == [s.dumps() for s in live]
+
+    return {
+        'book_number': engine.book_number,
+        'sessions': sessions,
+        'transitions': transitions,
+        'restarts': restarts,
+        'seconds': elapsed,
+        'transitions_per_sec': transitions / elapsed if elapsed else 0.0,
+        'bytes_per_session': memory / sessions,
+        'serialized_bytes_per_session': len(packed) / sessions,
+        'serialize_round_trip_seconds': serialize
+    }
+
+
+def main():
+    """Load-test the session engine on extracted books
+
+    Exits with status 1 if a choice asks for an item that neither the book
+    nor an earlier one in the list hands out (items carry over between
+    books, as the Sommerswerd does).
+    """
+    import argparse
+    import sys
+    from pathlib import Path
+    from book_stream import book_files, load_book
+
+    parser = argparse.ArgumentParser(description='Lone Wolf playthrough session engine')
+    parser.add_argument('books', nargs='*', help='Book files (default: extracted-content/book-N.json)')
+    parser.add_argument('--rules', help='Rule file (default: rules/kai.json)')
+    parser.add_argument('--sessions', type=int, default=50000, help='Concurrent sessions (default: 50000)')
+    parser.add_argument('--steps', type=int, default=20, help='Transitions per session (default: 20)')
+    parser.add_argument('--fights', action='store_true', help='Resolve combats on entering combat sections')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    parser.add_argument('--check-items', action='store_true',
+                        help='Only check that every gating item can be obtained')
+
+    args = parser.parse_args()
+    paths = [Path(p) for p in args.books] or book_files(Path('extracted-content'))
+    rules = RuleEngine.load(args.rules)
+    disciplines = discipline_ids(args.rules)
+
+    obtainable: Set[str] = set()
+    unobtainable = 0
+    for path in paths:
+        book = load_book(path)
+        start = time.perf_counter()
+        engine = SessionEngine(book, disciplines, rules)
+        compile_ms = (time.perf_counter() - start) * 1000
+        obtainable |= obtainable_items(book, rules)
+        missing = engine.unobtainable(obtainable)
+        unobtainable += len(missing)
+        print(f"\n📖 Book {book.get('book_number')}: {book.get('title')} "
+              f"(compiled in {compile_ms:.1f}ms, {len(engine.gating_items)} gating items)")
+        if missing:
+            print(f"  ❌ Never obtainable: {', '.join(missing)}")
+        if args.check_items:
+            continue
+        result = benchmark(engine, args.sessions, args.steps, args.fights, args.seed)
+        print(f"  ⏱️  {result['transitions']} transitions over {result['sessions']} sessions in "
+              f"{result['seconds']:.2f}s: {result['transitions_per_sec']:,.0f}/sec "
+              f"({result['restarts']} restarts)")
+        print(f"  💾 {result['bytes_per_session']:.0f} bytes per live session, "
+              f"{result['serialized_bytes_per_session']:.0f} bytes serialized "
+              f"(all sessions round-tripped in {result['serialize_round_trip_seconds'] * 1000:.1f}ms)")
+
+    if unobtainable:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection for extracted Lone Wolf sections
+Each section's text is reduced to a MinHash signature of its word
+shingles, written by the extractor next to each book as
+book-N.minhash.json. Banding the signatures (locality-sensitive hashing)
+puts similar sections in the same bucket, so near-duplicates within and
+across books are found by comparing bucket mates only, not every pair.
+As with the search index, a re-extraction only re-hashes sections whose
+text changed.
+"""
+
+import base64
+import hashlib
+import json
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from search_index import tokenize
+
+SIGNATURE_VERSION = 1
+
+SHINGLE_SIZE = 3      # words per shingle
+NUM_PERM = 128        # MinHash functions per signature
+BANDS = 32            # LSH bands of NUM_PERM // BANDS rows: pairs above ~0.4 similarity become candidates
+SEED = 1
+
+DEFAULT_THRESHOLD = 0.5
+
+# Universal hashes (a * x + b) mod p over 32-bit shingle hashes; a, b < 2**32 keeps a * x + b in uint64
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(SEED)
+_A = _rng.integers(1, 1 << 32, size=(NUM_PERM, 1), dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, size=(NUM_PERM, 1), dtype=np.uint64)
+
+Key = Tuple[int, int]  # (book number, section number)
+
+
+def shingles(text: str) -> Set[int]:
+    """crc32 hashes of the text's SHINGLE_SIZE-word shingles (one shingle if shorter)"""
+    tokens = tokenize(text)
+    if not tokens:
+        return set()
+    count = max(1, len(tokens) - SHINGLE_SIZE + 1)
+    return {zlib.crc32(' '.join(tokens[i:i + SHINGLE_SIZE]).encode('utf-8')) for i in range(count)}
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature (NUM_PERM uint32) of a text, None if it has no words"""
+    hashes = shingles(text)
+    if not hashes:
+        return None
+    values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    return ((_A * values + _B) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+class BookSignatures:
+    """MinHash signatures of one book's sections"""
+
+    def __init__(self, book_number: int, signatures: Dict[int, np.ndarray], digests: Dict[int, str]):
+        self.book_number = book_number
+        self.signatures = signatures
+        self.digests = digests
+
+    def to_dict(self) -> Dict:
+        return {
+            'signature_version': SIGNATURE_VERSION,
+            'book_number': self.book_number,
+            'shingle_size': SHINGLE_SIZE,
+            'num_perm': NUM_PERM,
+            'seed': SEED,
+            'digests': {str(n): self.digests[n] for n in sorted(self.digests)},
+            'signatures': {str(n): base64.b64encode(self.signatures[n].astype('<u4').tobytes()).decode('ascii')
+                           for n in sorted(self.signatures)}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'BookSignatures':
+        if data.get('signature_version') != SIGNATURE_VERSION:
+            raise ValueError(f"Unsupported signature version: {data.get('signature_version')}")
+        params = (data.get('shingle_size'), data.get('num_perm'), data.get('seed'))
+        if params != (SHINGLE_SIZE, NUM_PERM, SEED):
+            raise ValueError(f"Signatures were made with other parameters: {params}")
+        signatures = {int(n): np.frombuffer(base64.b64decode(encoded), dtype='<u4').astype(np.uint32)
+                      for n, encoded in data['signatures'].items()}
+        digests = {int(n): digest for n, digest in data.get('digests', {}).items()}
+        return cls(data.get('book_number', 0), signatures, digests)
+
+    def save(self, path: Path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: Path) -> 'BookSignatures':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+class SignatureBuilder:
+    """Builds BookSignatures section by section (works with streamed extraction)
+
+    Given the book's previous signatures, sections whose text is unchanged
+    keep their signature and are not re-hashed.
+    """
+
+    def __init__(self, book_number: int = 0, previous: Optional[BookSignatures] = None):
+        self.book_number = book_number
+        self.previous = previous
+        self.signatures: Dict[int, np.ndarray] = {}
+        self.digests: Dict[int, str] = {}
+        self.reused = 0
+        self.hashed = 0
+
+    @classmethod
+    def updating(cls, path: Path, book_number: int = 0) -> 'SignatureBuilder':
+        """Builder that reuses the signatures at path if they are readable"""
+        previous = None
+        if Path(path).exists():
+            try:
+                previous = BookSignatures.load(path)
+            except (OSError, ValueError, KeyError):
+                previous = None
+        return cls(book_number, previous)
+
+    def add_section(self, section: Dict):
+        number = section['section']
+        text = section.get('text', '')
+        digest = self.digests[number] = text_digest(text)
+        if self.previous and self.previous.digests.get(number) == digest:
+            self.reused += 1
+            if number in self.previous.signatures:
+                self.signatures[number] = self.previous.signatures[number]
+            return
+        self.hashed += 1
+        sig = signature(text)
+        if sig is not None:
+            self.signatures[number] = sig
+
+    def build(self) -> BookSignatures:
+        return BookSignatures(self.book_number, dict(self.signatures), dict(self.digests))
+
+
+def signatures_path_for(book_path: Path) -> Path:
+    """Where the MinHash signatures for a book output live (book-N.minhash.json)"""
+    book_path = Path(book_path)
+    return book_path.with_name(f"{book_path.name.split('.')[0]}.minhash.json")
+
+
+class LSHIndex:
+    """Banded LSH buckets over the signatures of several books
+
+    Two sections become candidates when all rows of any band match; only
+    candidates have their signatures compared.
+    """
+
+    def __init__(self, bands: int = BANDS):
+        if NUM_PERM % bands:
+            raise ValueError(f"{NUM_PERM} signature values do not split into {bands} bands")
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.signatures: Dict[Key, np.ndarray] = {}
+        self.buckets: List[Dict[bytes, List[Key]]] = [{} for _ in range(bands)]
+
+    @classmethod
+    def load(cls, content_dir: Path = Path('extracted-content'), bands: int = BANDS) -> 'LSHIndex':
+        """Index book-N.minhash.json for every book-N.json in content_dir"""
+        from book_stream import book_files
+        index = cls(bands)
+        for path in book_files(content_dir):
+            if signatures_path_for(path).exists():
+                index.add_book(BookSignatures.load(signatures_path_for(path)))
+        return index
+
+    def _band_keys(self, sig: np.ndarray) -> Iterator[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, sig[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key: Key, sig: np.ndarray):
+        self.signatures[key] = sig
+        for band, band_key in self._band_keys(sig):
+            self.buckets[band].setdefault(band_key, []).append(key)
+
+    def add_book(self, book: BookSignatures):
+        for number in sorted(book.signatures):
+            self.add((book.book_number, number), book.signatures[number])
+
+    def candidates(self) -> Set[Tuple[Key, Key]]:
+        """Pairs of sections sharing at least one bucket"""
+        pairs = set()
+        for buckets in self.buckets:
+            for keys in buckets.values():
+                for i, a in enumerate(keys):
+                    for b in keys[i + 1:]:
+                        pairs.add((a, b) if a < b else (b, a))
+        return pairs
+
+    def pairs(self, threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[Key, Key, float]]:
+        """Near-duplicate pairs at or above threshold, most similar first"""
+        found = []
+        for a, b in self.candidates():
+            score = similarity(self.signatures[a], self.signatures[b])
+            if score >= threshold:
+                found.append((a, b, score))
+        found.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+        return found
+
+    def query(self, sig: np.ndarray, threshold: float = DEFAULT_THRESHOLD,
+              exclude: Optional[Key] = None) -> List[Tuple[Key, float]]:
+        """Indexed sections similar to a signature, most similar first"""
+        keys = set()
+        for band, band_key in self._band_keys(sig):
+            keys.update(self.buckets[band].get(band_key, ()))
+        keys.discard(exclude)
+        hits = [(key, similarity(sig, self.signatures[key])) for key in keys]
+        return sorted((hit for hit in hits if hit[1] >= threshold), key=lambda hit: (-hit[1], hit[0]))
+
+    def clusters(self, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+        """Connected groups of near-duplicate pairs
+
+        Each cluster lists its sections, the similarity range of the pairs
+        that joined it and whether it spans more than one book.
+        """
+        parent: Dict[Key, Key] = {}
+
+        def find(key: Key) -> Key:
+            while parent.setdefault(key, key) != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        pairs = self.pairs(threshold)
+        for a, b, _ in pairs:
+            parent[find(a)] = find(b)
+
+        groups: Dict[Key, Dict] = {}
+        for a, b, score in pairs:
+            group = groups.setdefault(find(a), {'sections': set(), 'scores': []})
+            group['sections'].update((a, b))
+            group['scores'].append(score)
+
+        clusters = []
+        for group in groups.values():
+            sections = sorted(group['sections'])
+            clusters.append({
+                'sections': sections,
+                'max_similarity': max(group['scores']),
+                'min_similarity': min(group['scores']),
+                'cross_book': len({book for book, _ in sections}) > 1
+            })
+        clusters.sort(key=lambda c: (-c['max_similarity'], -len(c['sections']), c['sections']))
+        return clusters
+
+
+def build_signatures(book_path: Path, path: Optional[Path] = None) -> SignatureBuilder:
+    """(Re)hash a book output in any format, reusing its previous signatures"""
+    from book_stream import load_book
+
+    book = load_book(book_path)
+    path = path or signatures_path_for(book_path)
+    builder = SignatureBuilder.updating(path, book.get('book_number', 0))
+    for section in book['sections'].values():
+        builder.add_section(section)
+    builder.build().save(path)
+    return builder
+
+
+def parse_key(value: str) -> Key:
+    """'BOOK:SECTION' -> (book, section)"""
+    try:
+        book, section = value.split(':')
+        return int(book), int(section)
+    except ValueError:
+        raise ValueError(f"Expected BOOK:SECTION, e.g. 1:141, not {value!r}")
+
+
+def main():
+    """Report near-duplicate sections, or find sections similar to one section or text"""
+    import argparse
+    from book_store import BookStore
+    from search_index import snippet
+
+    parser = argparse.ArgumentParser(description='Near-duplicate sections within and across books')
+    parser.add_argument('section', nargs='?', help='BOOK:SECTION to find similar sections for (default: report)')
+    parser.add_argument('--text', help='Find sections similar to this text instead')
+    parser.add_argument('--content-dir', default='extracted-content',
+                        help='Directory with book-N.json files (default: extracted-content)')
+    parser.add_argument('--build', action='store_true',
+                        help='(Re)build book-N.minhash.json for every book first')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Minimum estimated similarity, 0-1 (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--limit', type=int, default=20, help='Clusters or hits to show (default: 20)')
+    parser.add_argument('--json', metavar='PATH', help='Also write the cluster report as JSON')
+
+    args = parser.parse_args()
+    content_dir = Path(args.content_dir)
+
+    if args.build:
+        from book_stream import book_files
+        for path in book_files(content_dir):
+            builder = build_signatures(path)
+            print(f"🧬 {signatures_path_for(path).name}: {builder.hashed} sections hashed, "
+                  f"{builder.reused} unchanged")
+
+    start = time.perf_counter()
+    index = LSHIndex.load(content_dir)
+    load_ms = (time.perf_counter() - start) * 1000
+    if not index.signatures:
+        print("❌ No book-N.minhash.json files found (run with --build or re-extract)")
+        return
+
+    store = BookStore(str(content_dir))
+
+    def describe(key: Key) -> str:
+        section = store.section(*key) or {}
+        words = tokenize(section.get('text', ''))[:3]
+        return f"Book {key[0]} §{key[1]:<4} {snippet(section.get('text', ''), words)}"
+
+    with store:
+        if args.section or args.text:
+            exclude = None
+            if args.text:
+                sig = signature(args.text)
+            else:
+                try:
+                    exclude = parse_key(args.section)
+                except ValueError as e:
+                    parser.error(str(e))
+                sig = index.signatures.get(exclude)
+                if sig is None:
+                    parser.error(f"No signature for book {exclude[0]} section {exclude[1]}")
+            hits = index.query(sig, args.threshold, exclude) if sig is not None else []
+            print(f"\n🧬 {len(hits)} sections at or above {args.threshold:.2f} similarity")
+            for key, score in hits[:args.limit]:
+                print(f"  {score:.2f}  {describe(key)}")
+            return
+
+        start = time.perf_counter()
+        candidates = len(index.candidates())
+        clusters = index.clusters(args.threshold)
+        elapsed = time.perf_counter() - start
+        count = len(index.signatures)
+        all_pairs = count * (count - 1) // 2
+
+        cross = sum(1 for c in clusters if c['cross_book'])
+        print(f"\n🧬 {len(clusters)} near-duplicate clusters at {args.threshold:.2f} "
+              f"({cross} across books, {len(clusters) - cross} within a book)")
+        print(f"  {count} sections, {candidates} candidate pairs of {all_pairs} "
+              f"({candidates / max(all_pairs, 1):.2%}); loaded in {load_ms:.0f}ms, clustered in {elapsed * 1000:.0f}ms")
+        for cluster in clusters[:args.limit]:
+            scope = 'across books' if cluster['cross_book'] else f"book {cluster['sections'][0][0]}"
+            print(f"\n  {len(cluster['sections'])} sections, {scope}, similarity "
+                  f"{cluster['min_similarity']:.2f}-{cluster['max_similarity']:.2f}")
+            for key in cluster['sections']:
+                print(f"    {describe(key)}")
+        if len(clusters) > args.limit:
+            print(f"\n  ... and {len(clusters) - args.limit} more")
+
+    if args.json:
+        report = {
+            'threshold': args.threshold,
+            'sections': count,
+            'candidate_pairs': candidates,
+            'clusters': [dict(c, sections=[list(key) for key in c['sections']]) for c in clusters]
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Saved report to: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,103 +2,266 @@
 """
 Validation script for extracted Lone Wolf content
 Checks for data quality issues, broken links, missing sections, etc.
+
+Usable as a library: validate_file() / validate_paths() return structured
+results without printing; print_report() and print_summary() format them.
 """
 
 import json
-from pathlib import Path
+import mmap
+import os
 from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
 
+from book_stream import book_files, load_book
+from section_graph import GraphBuilder
 
-def validate_book(json_path: Path) -> dict:
-    """Validate a single book's extracted data"""
-    print(f"\n{'='*60}")
-    print(f"Validating: {json_path.name}")
-    print(f"{'='*60}")
-
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    errors = []
-    warnings = []
-    stats = {}
-
-    # Basic metadata checks
-    stats['title'] = data.get('title', 'Unknown')
-    stats['book_number'] = data.get('book_number', 0)
-    stats['total_sections'] = len(data.get('sections', {}))
-    stats['disciplines'] = len(data.get('disciplines', []))
+ENDING_TYPES = ('defeat', 'victory', 'ending')
 
-    sections = data.get('sections', {})
-    all_section_nums = set(int(k) for k in sections.keys())
 
-    # Check for missing sections (should be consecutive from 1 to max)
-    max_section = max(all_section_nums) if all_section_nums else 0
-    expected_sections = set(range(1, max_section + 1))
-    missing_sections = expected_sections - all_section_nums
+class BookValidator:
+    """Checks a book one section at a time
 
-    if missing_sections:
-        errors.append(f"Missing sections: {sorted(missing_sections)}")
+    Keeps only section numbers, link targets and findings rather than the
+    sections themselves, so memory does not grow with the book's text.
+    Call finish() once every section has been added.
+    """
 
-    # Validate each section
-    section_types = Counter()
-    broken_links = []
-    conditional_choices = 0
-    combat_encounters = 0
-    sections_with_no_choices = []
+    def __init__(self, metadata: Dict, name: str = ''):
+        self.metadata = metadata
+        self.name = name
+        self.graph = GraphBuilder()
+        self.section_types = Counter()
+        self.errors: List[str] = []
+        # Links whose target had not been seen yet; resolved in finish()
+        self.pending_links: List[Dict] = []
+        self.conditional_choices = 0
+        self.combat_encounters = 0
+        self.listed_items = 0
+        self.sections_with_no_choices: List[int] = []
 
-    for sect_num, section in sections.items():
-        section_num = int(sect_num)
-        section_types[section.get('type', 'unknown')] += 1
+    def add_section(self, section: Dict):
+        section_num = section['section']
+        self.section_types[section.get('type', 'unknown')] += 1
+        self.graph.add_section(section)
 
-        # Check choices
         choices = section.get('choices', [])
-
-        if len(choices) == 0 and section.get('type') not in ['defeat', 'victory', 'ending']:
-            sections_with_no_choices.append(section_num)
+        if len(choices) == 0 and section.get('type') not in ENDING_TYPES:
+            self.sections_with_no_choices.append(section_num)
 
         for choice in choices:
             target = choice.get('target')
-
-            # Check if target section exists
-            if target and str(target) not in sections:
-                broken_links.append({
+            if target and target not in self.graph.edges:
+                self.pending_links.append({
                     'from': section_num,
                     'to': target,
                     'text': choice.get('text', '')[:50]
                 })
-
-            # Count conditional choices
             if choice.get('conditional'):
-                conditional_choices += 1
-
-        # Check combat encounters
-        if section.get('combat'):
-            combat_encounters += 1
-            combat = section['combat']
+                self.conditional_choices += 1
 
+        combat = section.get('combat')
+        if combat:
+            self.combat_encounters += 1
             # Validate combat has required fields
             if not combat.get('enemy_name'):
-                errors.append(f"Section {section_num}: Combat missing enemy name")
+                self.errors.append(f"Section {section_num}: Combat missing enemy name")
             if not combat.get('combat_skill'):
-                errors.append(f"Section {section_num}: Combat missing CS")
+                self.errors.append(f"Section {section_num}: Combat missing CS")
             if not combat.get('endurance'):
-                errors.append(f"Section {section_num}: Combat missing END")
+                self.errors.append(f"Section {section_num}: Combat missing END")
+
+        items = section.get('items', [])
+        self.listed_items += len(items)
+        if not all(isinstance(item, str) and item for item in items):
+            self.errors.append(f"Section {section_num}: Item list has an empty or non-text entry")
+
+    def finish(self) -> Dict:
+        """Run the whole-book checks and return the structured result"""
+        section_nums = self.graph.edges
+        errors = list(self.errors)
+
+        # Sections should be consecutive from 1 to max
+        max_section = max(section_nums) if section_nums else 0
+        missing_sections = [n for n in range(1, max_section + 1) if n not in section_nums]
+        if missing_sections:
+            errors.insert(0, f"Missing sections: {missing_sections}")
+
+        broken_links = [link for link in self.pending_links if link['to'] not in section_nums]
+
+        # Reachability over the choice graph (linear in sections + links)
+        graph = self.graph.build()
+        has_start = 1 in section_nums
+        unreachable_sections = graph.unreachable(1) if has_start else []
+        orphaned_sections = graph.orphaned(1)
+        victory_path = graph.shortest_path(1) if has_start else None
+
+        stats = {
+            'title': self.metadata.get('title', 'Unknown'),
+            'book_number': self.metadata.get('book_number', 0),
+            'total_sections': len(section_nums),
+            'disciplines': len(self.metadata.get('disciplines', [])),
+            'section_types': dict(self.section_types),
+            'conditional_choices': self.conditional_choices,
+            'combat_encounters': self.combat_encounters,
+            'listed_items': self.listed_items,
+            'unreachable_sections': len(unreachable_sections),
+            'orphaned_sections': len(orphaned_sections),
+            'victory_section': graph.victory_section,
+            'victory_path_length': len(victory_path) - 1 if victory_path else None
+        }
+
+        return {
+            'name': self.name,
+            'errors': errors,
+            'warnings': broken_links,
+            'no_choices': sorted(self.sections_with_no_choices),
+            'orphaned': orphaned_sections,
+            'unreachable': unreachable_sections,
+            'stats': stats
+        }
+
+
+def check_book(data: Dict, name: str = '') -> Dict:
+    """Validate an already-loaded book dict"""
+    validator = BookValidator(data, name)
+    for section in data.get('sections', {}).values():
+        validator.add_section(section)
+    return validator.finish()
+
+
+def iter_records(path: Path) -> Iterator[Dict]:
+    """Manifests and sections of one or more books, decoded one at a time
+
+    A record without a "section" key is a book manifest and starts a new
+    book. NDJSON is read line by line; a JSON file (which may hold several
+    concatenated books) is memory-mapped and its section byte spans are
+    indexed one book at a time, each section decoded only when it is
+    checked, so the file's text never has to fit on the heap.
+    """
+    path = Path(path)
+    if path.is_dir():
+        from book_stream import iter_shards
+        manifest, sections = iter_shards(path)
+        yield manifest
+        yield from sections
+    elif path.suffix == '.ndjson':
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.suffix == '.lwb':
+        from book_bundle import BookBundle
+        with BookBundle(path) as bundle:
+            yield bundle.manifest
+            yield from bundle.iter_sections()
+    else:
+        from book_store import iter_json_books
+        if path.stat().st_size == 0:
+            return
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for metadata, spans in iter_json_books(data):
+                yield metadata
+                for start, end in spans.values():
+                    yield json.loads(data[start:end])
+
+
+def validate_file(path: Path, stream: bool = False) -> List[Dict]:
+    """Validate every book in a file without printing; one result per book
+
+    With stream=False the book is loaded whole (any book_stream format);
+    with stream=True sections are checked as they are decoded, which also
+    handles files with several concatenated books.
+    """
+    path = Path(path)
+    if not stream:
+        return [check_book(load_book(path), path.name)]
+
+    results = []
+    validator: Optional[BookValidator] = None
+    for record in iter_records(path):
+        if 'section' not in record:
+            if validator:
+                results.append(validator.finish())
+            validator = BookValidator(record, path.name)
+        elif validator is None:
+            raise ValueError(f"{path}: section {record['section']} before any book manifest")
+        else:
+            validator.add_section(record)
+    if validator:
+        results.append(validator.finish())
+    return results
+
+
+def validate_paths(paths: List[Path], jobs: int = 1, stream: bool = False) -> Iterator[Dict]:
+    """Validate many files, in worker processes if jobs > 1 (0 = all CPUs)
+
+    Yields results in the order of paths as they become available.
+    """
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    if jobs == 1 or len(paths) < 2:
+        for path in paths:
+            yield from validate_file(path, stream)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+        for results in pool.map(validate_file, paths, [stream] * len(paths)):
+            yield from results
 
-    stats['section_types'] = dict(section_types)
-    stats['conditional_choices'] = conditional_choices
-    stats['combat_encounters'] = combat_encounters
 
-    # Report findings
+def validate_book(json_path: Path, verbose: bool = True) -> Dict:
+    """Validate a single book's extracted data"""
+    result = check_book(load_book(json_path), Path(json_path).name)
+    if verbose:
+        print_report(result)
+    return result
+
+
+def summarize(results: List[Dict]) -> Dict:
+    """Totals across book results"""
+    return {
+        'books': len(results),
+        'total_sections': sum(r['stats']['total_sections'] for r in results),
+        'combat_encounters': sum(r['stats']['combat_encounters'] for r in results),
+        'conditional_choices': sum(r['stats']['conditional_choices'] for r in results),
+        'errors': sum(len(r['errors']) for r in results),
+        'warnings': sum(len(r['warnings']) for r in results),
+        'unreachable_sections': sum(len(r['unreachable']) for r in results),
+        'orphaned_sections': sum(len(r['orphaned']) for r in results)
+    }
+
+
+def print_report(result: Dict):
+    """Print one book's validation result"""
+    stats = result['stats']
+    errors = result['errors']
+    broken_links = result['warnings']
+    sections_with_no_choices = result['no_choices']
+    orphaned_sections = result['orphaned']
+    unreachable_sections = result['unreachable']
+
+    print(f"\n{'='*60}")
+    print(f"Validating: {result['name']}")
+    print(f"{'='*60}")
+
     print(f"\n📊 Statistics:")
     print(f"  Title: {stats['title']}")
     print(f"  Book Number: {stats['book_number']}")
     print(f"  Total Sections: {stats['total_sections']}")
     print(f"  Disciplines: {stats['disciplines']}")
-    print(f"  Combat Encounters: {combat_encounters}")
-    print(f"  Conditional Choices: {conditional_choices}")
+    print(f"  Combat Encounters: {stats['combat_encounters']}")
+    print(f"  Conditional Choices: {stats['conditional_choices']}")
+    print(f"  Listed Items: {stats['listed_items']}")
+    if stats['victory_path_length'] is not None:
+        print(f"  Shortest Path to Victory ({stats['victory_section']}): "
+              f"{stats['victory_path_length']} choices")
+    else:
+        print(f"  Shortest Path to Victory ({stats['victory_section']}): not reachable")
 
     print(f"\n📈 Section Types:")
-    for stype, count in section_types.most_common():
+    for stype, count in Counter(stats['section_types']).most_common():
         print(f"  {stype}: {count}")
 
     # Report errors
@@ -119,10 +282,22 @@ def validate_book(json_path: Path) -> dict:
 
     if sections_with_no_choices:
         print(f"\n⚠️  Sections with No Choices ({len(sections_with_no_choices)}):")
-        print(f"  {sorted(sections_with_no_choices)[:20]}")
+        print(f"  {sections_with_no_choices[:20]}")
         if len(sections_with_no_choices) > 20:
             print(f"  ... and {len(sections_with_no_choices) - 20} more")
 
+    if orphaned_sections:
+        print(f"\n⚠️  Orphaned Sections - no choice leads here ({len(orphaned_sections)}):")
+        print(f"  {orphaned_sections[:20]}")
+        if len(orphaned_sections) > 20:
+            print(f"  ... and {len(orphaned_sections) - 20} more")
+
+    if unreachable_sections:
+        print(f"\n⚠️  Unreachable from Section 1 ({len(unreachable_sections)}):")
+        print(f"  {unreachable_sections[:20]}")
+        if len(unreachable_sections) > 20:
+            print(f"  ... and {len(unreachable_sections) - 20} more")
+
     # Success summary
     if not errors and not broken_links:
         print(f"\n✅ Validation PASSED - No critical issues found!")
@@ -131,56 +306,72 @@ def validate_book(json_path: Path) -> dict:
     else:
         print(f"\n❌ Validation FAILED - {len(errors)} errors found")
 
-    return {
-        'errors': errors,
-        'warnings': broken_links,
-        'stats': stats
-    }
 
+def print_summary(summary: Dict):
+    """Print the overall summary across books"""
+    print(f"\n\n{'='*60}")
+    print("OVERALL SUMMARY")
+    print(f"{'='*60}")
 
-def main():
-    """Validate all extracted books"""
-    extracted_dir = Path('extracted-content')
+    print(f"\n📚 Books Validated: {summary['books']}")
+    print(f"📄 Total Sections: {summary['total_sections']}")
+    print(f"⚔️  Combat Encounters: {summary['combat_encounters']}")
+    print(f"🔮 Conditional Choices: {summary['conditional_choices']}")
+    print(f"❌ Total Errors: {summary['errors']}")
+    print(f"⚠️  Total Warnings: {summary['warnings']}")
+    print(f"🕳️  Unreachable Sections: {summary['unreachable_sections']} "
+          f"({summary['orphaned_sections']} orphaned)")
 
-    if not extracted_dir.exists():
-        print("❌ No extracted-content directory found!")
-        return
+    if summary['errors'] == 0:
+        print(f"\n✅ All books validated successfully!")
+    else:
+        print(f"\n❌ Validation issues found - please review errors above")
 
-    json_files = sorted(extracted_dir.glob('book-*.json'))
+
+def main():
+    """Validate all extracted books"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Validate extracted Lone Wolf books')
+    parser.add_argument('books', nargs='*',
+                        help='Book files in any output format (default: extracted-content/book-N.json)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Worker processes, one book file each (default: 1, 0 = all CPUs)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Check sections as they are decoded instead of loading whole books '
+                             '(also reads concatenated multi-book files)')
+    parser.add_argument('--json', action='store_true',
+                        help='Print structured results as JSON instead of the report')
+
+    args = parser.parse_args()
+
+    if args.books:
+        json_files = [Path(p) for p in args.books]
+    else:
+        extracted_dir = Path('extracted-content')
+        if not extracted_dir.exists():
+            print("❌ No extracted-content directory found!")
+            return
+        json_files = book_files(extracted_dir)
 
     if not json_files:
         print("❌ No book JSON files found!")
         return
 
-    print(f"Found {len(json_files)} books to validate\n")
+    if not args.json:
+        print(f"Found {len(json_files)} books to validate\n")
 
     all_results = []
-    for json_file in json_files:
-        result = validate_book(json_file)
+    for result in validate_paths(json_files, jobs=args.jobs, stream=args.stream):
+        if not args.json:
+            print_report(result)
         all_results.append(result)
 
-    # Overall summary
-    print(f"\n\n{'='*60}")
-    print("OVERALL SUMMARY")
-    print(f"{'='*60}")
-
-    total_sections = sum(r['stats']['total_sections'] for r in all_results)
-    total_combat = sum(r['stats']['combat_encounters'] for r in all_results)
-    total_conditional = sum(r['stats']['conditional_choices'] for r in all_results)
-    total_errors = sum(len(r['errors']) for r in all_results)
-    total_warnings = sum(len(r['warnings']) for r in all_results)
-
-    print(f"\n📚 Books Validated: {len(all_results)}")
-    print(f"📄 Total Sections: {total_sections}")
-    print(f"⚔️  Combat Encounters: {total_combat}")
-    print(f"🔮 Conditional Choices: {total_conditional}")
-    print(f"❌ Total Errors: {total_errors}")
-    print(f"⚠️  Total Warnings: {total_warnings}")
-
-    if total_errors == 0:
-        print(f"\n✅ All books validated successfully!")
+    summary = summarize(all_results)
+    if args.json:
+        print(json.dumps({'books': all_results, 'summary': summary}, indent=2, ensure_ascii=False))
     else:
-        print(f"\n❌ Validation issues found - please review errors above")
+        print_summary(summary)
 
 
 if __name__ == '__main__':